@@ -1,3 +1,10 @@
-from .main import app
+def __getattr__(name):
+    # Built on first access so `python -m app.worker` does not construct the API
+    if name == "app":
+        from .main import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ['app']
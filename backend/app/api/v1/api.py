@@ -8,6 +8,12 @@ from .endpoints import (
     ollama,
     settings,
     datasets,
+    cache,
+    healthcheck,
+    benchmark,
+    batch_inference,
+    registry,
+    artifacts,
 )
 
 api_router = APIRouter()
@@ -19,3 +25,9 @@ api_router.include_router(user_models.router)
 api_router.include_router(ollama.router)
 api_router.include_router(settings.router)
 api_router.include_router(datasets.router)
+api_router.include_router(cache.router)
+api_router.include_router(healthcheck.router)
+api_router.include_router(benchmark.router)
+api_router.include_router(batch_inference.router)
+api_router.include_router(registry.router)
+api_router.include_router(artifacts.router)
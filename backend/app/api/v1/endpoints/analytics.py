@@ -1,23 +1,24 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, HTTPException, Query
 from ....core.database import db
-from ....core.logger import logger  # new import
+from ....services.analytics_service import AnalyticsService, RebuildInProgress
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
 @router.get("/")
-async def get_analytics():
-    logger.log("Fetching analytics data...")
-    collection = db["tuning_tasks"]
-    count = await collection.count_documents({})
-    average_progress = await collection.aggregate(
-        [{"$group": {"_id": None, "avg": {"$avg": "$progress"}}}]
-    ).to_list(1)
-    average = average_progress[0]["avg"] if average_progress else 0
-    # Display metrics in a table
-    logger.table(
-        title="Analytics Metrics",
-        columns=["Metric", "Value"],
-        rows=[["total_tasks", count], ["average_progress", round(average, 2)]],
-    )
-    return {"total_tasks": count, "average_progress": average}
+async def get_analytics(window_days: int | None = Query(None, ge=1, le=3650)):
+    """Task analytics served from incrementally maintained rollups.
+
+    ``window_days`` limits throughput, success rate and duration percentiles
+    to the last N days; status counts always reflect the current state.
+    """
+    return await AnalyticsService(db).summary(window_days)
+
+
+@router.post("/rebuild")
+async def rebuild_analytics():
+    """Recompute the rollups from the task collection (one full scan)."""
+    try:
+        return await AnalyticsService(db).rebuild()
+    except RebuildInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
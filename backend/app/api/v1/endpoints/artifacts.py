@@ -0,0 +1,26 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+from ....services.artifact_store import artifact_store
+
+router = APIRouter(prefix="/artifacts", tags=["artifacts"])
+
+
+@router.get("/stats")
+async def get_artifact_stats():
+    """Stored vs. logical bytes across every saved and fine-tuned model."""
+    return await asyncio.to_thread(artifact_store.stats)
+
+
+@router.post("/gc")
+async def collect_garbage():
+    """Delete blobs that no saved model or task output references."""
+    return await asyncio.to_thread(artifact_store.gc)
+
+
+@router.get("/refs/{ref}")
+async def get_manifest(ref: str):
+    manifest = artifact_store.get_manifest(ref)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Artifact ref not found")
+    return manifest
@@ -1,34 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from openai import BadRequestError
 from app.services.assistant_service import AssistantService
+from app.services.chat_stream import sse_response
+from app.services.context_budget import context_manager, summary_prompt
 from app.core.logger import logger
 
 router = APIRouter(prefix="/assistant", tags=["assistant"])
+# Own logger name so it can be sampled and size-capped separately
+log = logger.child("assistant")
 
 
 class ChatRequest(BaseModel):
     messages: list[dict]
     model: str | None = None
+    temperature: float | None = None
+    seed: int | None = None
+    cache: bool = False  # Opt in to the response cache for deterministic requests
+    context_budget: int | None = None  # Max prompt tokens (default from config)
+    context_strategy: str | None = None  # "truncate" or "summarize"
 
 
 async def get_service():
     return AssistantService()
 
 
+async def fit_context(req: ChatRequest, model: str, service: AssistantService):
+    """Trim the conversation to the context budget before sending it."""
+
+    async def summarize(messages: list[dict]) -> str:
+        return await service.chat(summary_prompt(messages), model=model)
+
+    messages, info = await context_manager.fit(
+        req.messages,
+        model,
+        budget=req.context_budget,
+        strategy=req.context_strategy,
+        summarizer=summarize,
+    )
+    if info["dropped_messages"]:
+        log.log(f"Assistant context trimmed: {info}")
+    return messages, info
+
+
 @router.post("/chat")
 async def chat(req: ChatRequest, service: AssistantService = Depends(get_service)):
     model = req.model or "o4-mini"
     # Log request details
-    logger.log(f"Assistant chat request: model={model}, messages={len(req.messages)}")
+    log.log(f"Assistant chat request: model={model}, messages={len(req.messages)}")
     try:
-        result = await service.chat(req.messages, model=model)
-        # Log response
-        logger.log(f"Assistant chat response: {result}")
-        return {"response": result}
+        messages, context = await fit_context(req, model, service)
+        result = await service.chat(
+            messages,
+            model=model,
+            temperature=req.temperature,
+            seed=req.seed,
+            cache=req.cache,
+        )
+        # Log response size; the body only at DEBUG
+        log.log(f"Assistant chat response: {len(result)} chars")
+        log.log(f"Assistant chat response body: {result}", level=logging.DEBUG)
+        return {"response": result, "context": context}
     except BadRequestError as e:
-        logger.log("OpenAI BadRequest error", exc_info=True)
+        log.log("OpenAI BadRequest error", level=logging.WARNING, exc_info=True)
         raise HTTPException(status_code=400, detail=e.args[0])
     except Exception:
-        logger.log("Assistant endpoint error", exc_info=True)
+        log.log("Assistant endpoint error", level=logging.ERROR, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    service: AssistantService = Depends(get_service),
+):
+    """Stream the assistant response as Server-Sent Events."""
+    model = req.model or "o4-mini"
+    log.log(f"Assistant stream request: model={model}, messages={len(req.messages)}")
+    messages, _ = await fit_context(req, model, service)
+    return sse_response(request, "assistant", messages, model)
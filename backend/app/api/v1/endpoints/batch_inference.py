@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+import os
+
+from ....core.database import db
+from ....core.settings_store import settings_store
+from ....services.tuning_service import TuningService
+from ....services.batch_inference_worker import JOB_TYPE, resolve_output_path
+from ....schemas.tuning import BatchInferenceCreate, TuningCreate
+
+router = APIRouter(prefix="/batch-inference", tags=["batch-inference"])
+
+
+def get_service():
+    return TuningService(db)
+
+
+@router.post("/")
+async def create_batch_job(data: BatchInferenceCreate, service=Depends(get_service)):
+    """Queue a batch-inference job; poll it via /tuning/{id}/progress."""
+    if not os.path.exists(data.dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if data.output_path:
+        output_dir = settings_store.get("batch_output_dir", "batch_outputs")
+        try:
+            resolve_output_path(output_dir, data.output_path, None)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    create = TuningCreate(
+        dataset_id=data.dataset_id,
+        parameters=data.model_dump(exclude={"dataset_id"}),
+    )
+    task = await service.create_task(create, job_type=JOB_TYPE)
+    return {"id": str(task.id)}
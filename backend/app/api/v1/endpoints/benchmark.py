@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from bson import ObjectId
+
+from ....core.database import db
+from ....schemas.base import PyObjectId
+from ....schemas.benchmark import Benchmark, BenchmarkCreate
+from ....services.benchmark_service import BenchmarkService
+
+router = APIRouter(prefix="/benchmark", tags=["benchmark"])
+
+
+def get_service():
+    return BenchmarkService(db)
+
+
+@router.post("/", response_model=Benchmark)
+async def run_benchmark(data: BenchmarkCreate, service=Depends(get_service)):
+    """Run a prompt set against several models and compare latency/throughput."""
+    return await service.run(data)
+
+
+@router.get("/", response_model=list[Benchmark])
+async def list_benchmarks(service=Depends(get_service)):
+    return await service.list_benchmarks()
+
+
+@router.get("/{benchmark_id}", response_model=Benchmark)
+async def get_benchmark(benchmark_id: PyObjectId, service=Depends(get_service)):
+    benchmark = await service.get_benchmark(ObjectId(benchmark_id))
+    if not benchmark:
+        raise HTTPException(status_code=404, detail="Benchmark not found")
+    return benchmark
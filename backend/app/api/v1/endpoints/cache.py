@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from ....services.response_cache import response_cache
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+@router.get("/stats")
+async def get_cache_stats():
+    return response_cache.get_stats()
+
+
+@router.delete("/")
+async def clear_cache():
+    await response_cache.clear()
+    return {"status": "ok"}
+
+
+@router.delete("/models/{model}")
+async def invalidate_model(model: str):
+    removed = await response_cache.invalidate_model(model)
+    return {"status": "ok", "removed": removed}
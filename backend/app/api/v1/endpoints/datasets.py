@@ -1,6 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from ...services.dataset_service import DatasetService
-from ...schemas.dataset import DatasetInfo
+from ....services.dataset_service import DatasetService
+from ....schemas.dataset import DatasetInfo
 
 router = APIRouter(prefix="/datasets", tags=["datasets"])
 service = DatasetService()
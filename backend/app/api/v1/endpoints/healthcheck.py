@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends
+from app.core.clients import clients
+from app.core.logger import log_pipeline
 from app.services.healthcheck_service import HealthCheckService
+from app.services.progress_broker import progress_broker
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -12,3 +15,21 @@ async def get_status(service: HealthCheckService = Depends()):
 @router.get("/pulse")
 async def pulse(service: HealthCheckService = Depends()):
     return service.pulse()
+
+
+@router.get("/clients")
+async def client_stats():
+    """Connection pool utilization for shared outbound clients."""
+    return clients.stats()
+
+
+@router.get("/progress-broker")
+async def progress_broker_stats():
+    """Subscribers and backpressure counters for WebSocket progress fan-out."""
+    return progress_broker.stats()
+
+
+@router.get("/logging")
+async def logging_stats():
+    """Queue depth and drop/sample/truncation counters of the log pipeline."""
+    return log_pipeline.stats()
@@ -1,39 +1,39 @@
-from fastapi import APIRouter, Body
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, Body, HTTPException, Query, Response
 from fastapi.responses import JSONResponse
-from huggingface_hub import list_models
-from ....core.config import settings
 from app.core.logger import logger  # new import
+from app.core.settings_store import settings_store
 from app.services.hf_model_io import HFModelIO
+from app.services.model_catalog import model_catalog
+from app.services.model_transfer import transfer_manager
 import tempfile
+import logging
 import os
-import json
 
 router = APIRouter(prefix="/models", tags=["models"])
 
 
 @router.get("/")
-async def get_models():
-    logger.log("Fetching Huggingface models...")
-    models = await run_in_threadpool(
-        list_models,
-        filter="text-generation",
-        limit=50,
-        token=settings.huggingface_token,
-        full=True,  # get all metadata
-    )
-    # Map to dicts with id, downloads, pipeline_tag (task), and tags (categories)
-    items = [
-        {
-            "id": getattr(m, "modelId"),
-            "downloads": getattr(m, "downloads", 0),
-            "task": getattr(m, "pipeline_tag", None),
-            "tags": getattr(m, "tags", []),
-        }
-        for m in models
-    ]
+async def get_models(
+    response: Response,
+    q: str | None = None,
+    tag: str | None = None,
+    task: str | None = None,
+    sort: str = "downloads",
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """List HF models from the local catalog cache.
+
+    Returns a plain list for compatibility; the cursor for the next page is in
+    the ``X-Next-Cursor`` header.
+    """
+    page = _query_catalog(q, tag, task, sort, cursor, limit)
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    items = page["items"]
     logger.table(
         title="Huggingface Models",
+        level=logging.DEBUG,
         columns=["Model ID", "Downloads", "Task", "Tags"],
         rows=[
             [it["id"], it["downloads"], it["task"], ", ".join(it["tags"] or [])]
@@ -43,21 +43,50 @@ async def get_models():
     return items
 
 
+@router.get("/catalog")
+async def get_catalog(
+    q: str | None = None,
+    tag: str | None = None,
+    task: str | None = None,
+    sort: str = "downloads",
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Paginated catalog search with freshness metadata."""
+    return _query_catalog(q, tag, task, sort, cursor, limit)
+
+
+@router.post("/catalog/refresh")
+async def refresh_catalog():
+    ok = await model_catalog.refresh()
+    return {
+        "status": "ok" if ok else "stale",
+        "error": model_catalog.last_error,
+        "refreshed_at": model_catalog.refreshed_at,
+    }
+
+
+def _query_catalog(q, tag, task, sort, cursor, limit) -> dict:
+    try:
+        return model_catalog.query(q, tag, task, sort, cursor, limit)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/pull")
 async def pull_hf_model(
     repo_id: str = Body(..., embed=True),
     local_dir: str = Body(None, embed=True),
+    wait: bool = Body(True, embed=True),
 ):
-    """Download a HuggingFace model to local storage."""
-    # Try to load from settings file if present
-    hf_token = os.environ.get("HF_TOKEN")
-    hf_user = os.environ.get("HF_USER")
-    settings_path = os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json")
-    if os.path.exists(settings_path):
-        with open(settings_path, "r") as f:
-            data = json.load(f)
-            hf_token = data.get("hf_token", hf_token)
-            hf_user = data.get("hf_user", hf_user)
+    """Download a HuggingFace model to local storage.
+
+    With ``wait=false`` the transfer runs in the background and its id is
+    returned immediately; poll ``/models/transfers/{id}`` for progress.
+    """
+    # Settings take precedence over the environment
+    hf_token = settings_store.get("hf_token", os.environ.get("HF_TOKEN"))
+    hf_user = settings_store.get("hf_user", os.environ.get("HF_USER"))
     if not hf_token or not hf_user:
         return JSONResponse(
             status_code=400, content={"error": "HuggingFace credentials not set"}
@@ -65,9 +94,11 @@ async def pull_hf_model(
     if not local_dir:
         local_dir = tempfile.mkdtemp(prefix="hfmodel_")
     try:
-        hf = HFModelIO(hf_token, hf_user)
-        path = hf.download_model(repo_id, local_dir)
-        return {"status": "ok", "local_dir": path}
+        job = HFModelIO(hf_token, hf_user).start_download(repo_id, local_dir)
+        if not wait:
+            return JSONResponse(status_code=202, content=job.snapshot())
+        await transfer_manager.wait(job)
+        return {"status": "ok", "local_dir": job.local_dir, "job_id": job.id}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
@@ -77,23 +108,36 @@ async def push_hf_model(
     local_dir: str = Body(..., embed=True),
     repo_name: str = Body(..., embed=True),
     private: bool = Body(True, embed=True),
+    wait: bool = Body(True, embed=True),
 ):
     """Push a local model directory to HuggingFace Hub."""
-    hf_token = os.environ.get("HF_TOKEN")
-    hf_user = os.environ.get("HF_USER")
-    settings_path = os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json")
-    if os.path.exists(settings_path):
-        with open(settings_path, "r") as f:
-            data = json.load(f)
-            hf_token = data.get("hf_token", hf_token)
-            hf_user = data.get("hf_user", hf_user)
+    hf_token = settings_store.get("hf_token", os.environ.get("HF_TOKEN"))
+    hf_user = settings_store.get("hf_user", os.environ.get("HF_USER"))
     if not hf_token or not hf_user:
         return JSONResponse(
             status_code=400, content={"error": "HuggingFace credentials not set"}
         )
     try:
-        hf = HFModelIO(hf_token, hf_user)
-        repo_id = hf.push_model(local_dir, repo_name, private=private)
-        return {"status": "ok", "repo_id": repo_id}
+        job = HFModelIO(hf_token, hf_user).start_push(
+            local_dir, repo_name, private=private
+        )
+        if not wait:
+            return JSONResponse(status_code=202, content=job.snapshot())
+        await transfer_manager.wait(job)
+        return {"status": "ok", "repo_id": job.repo_id, "job_id": job.id}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@router.get("/transfers")
+async def list_transfers():
+    """Progress of all model transfers started since the server came up."""
+    return transfer_manager.list_jobs()
+
+
+@router.get("/transfers/{job_id}")
+async def get_transfer(job_id: str):
+    job = transfer_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    return job.snapshot()
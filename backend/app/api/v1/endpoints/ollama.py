@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from ....services import OllamaService
+from ....services.admission import AdmissionRejected, admission_controller
+from ....services.chat_stream import sse_response
+from ....services.context_budget import context_manager, summary_prompt
+from ....services.model_residency import residency_manager
 
 router = APIRouter(prefix="/ollama", tags=["ollama"])
 
@@ -9,6 +13,13 @@ def get_service():
     return OllamaService()
 
 
+def get_client_id(request: Request) -> str:
+    """Identify the caller for fair scheduling across clients."""
+    return request.headers.get("X-Client-Id") or (
+        request.client.host if request.client else "anonymous"
+    )
+
+
 @router.get("/models")
 async def list_models(service: OllamaService = Depends(get_service)):
     return await service.list_models()
@@ -17,12 +28,81 @@ async def list_models(service: OllamaService = Depends(get_service)):
 class ChatRequest(BaseModel):
     messages: list[dict]
     model: str
+    options: dict | None = None  # Ollama generation options (temperature, seed, ...)
+    cache: bool = False  # Opt in to the response cache for deterministic requests
+    context_budget: int | None = None  # Max prompt tokens (default from config)
+    context_strategy: str | None = None  # "truncate" or "summarize"
+
+
+async def fit_context(req: ChatRequest, service: OllamaService, client_id: str):
+    """Trim the conversation to the context budget before sending it."""
+
+    async def summarize(messages: list[dict]) -> str:
+        # Greedy decoding makes summaries cacheable across identical histories
+        return await service.chat(
+            summary_prompt(messages),
+            req.model,
+            options={"temperature": 0},
+            cache=True,
+            client_id=client_id,
+        )
+
+    return await context_manager.fit(
+        req.messages,
+        req.model,
+        budget=req.context_budget,
+        strategy=req.context_strategy,
+        summarizer=summarize,
+    )
 
 
 @router.post("/chat")
-async def chat(req: ChatRequest, service: OllamaService = Depends(get_service)):
-    response = await service.chat(req.messages, req.model)
-    return {"response": response}
+async def chat(
+    req: ChatRequest,
+    service: OllamaService = Depends(get_service),
+    client_id: str = Depends(get_client_id),
+):
+    try:
+        messages, context = await fit_context(req, service, client_id)
+        response = await service.chat(
+            messages,
+            req.model,
+            options=req.options,
+            cache=req.cache,
+            client_id=client_id,
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+    return {"response": response, "context": context}
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    service: OllamaService = Depends(get_service),
+    client_id: str = Depends(get_client_id),
+):
+    """Stream the Ollama response as Server-Sent Events."""
+    try:
+        messages, _ = await fit_context(req, service, client_id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+    return sse_response(request, "ollama", messages, req.model, client_id)
+
+
+@router.get("/admission")
+async def admission_stats():
+    """Active requests, queue depth and wait times per model."""
+    return admission_controller.snapshot()
 
 
 class PullRequest(BaseModel):
@@ -45,3 +125,29 @@ class CreateRequest(BaseModel):
 async def create(req: CreateRequest, service: OllamaService = Depends(get_service)):
     await service.create_model(req.name, req.modelfile, req.gguf_path)
     return {"status": "ok"}
+
+
+@router.get("/residency")
+async def residency():
+    """Loaded models, pins, recency and the memory budget."""
+    await residency_manager.refresh()
+    return residency_manager.snapshot()
+
+
+@router.post("/residency/{model}/warm")
+async def warm_model(model: str):
+    seconds = await residency_manager.warm(model)
+    return {"status": "ok", "load_seconds": seconds}
+
+
+@router.post("/residency/{model}/pin")
+async def pin_model(model: str):
+    residency_manager.pin(model)
+    await residency_manager.warm(model)
+    return {"status": "ok"}
+
+
+@router.delete("/residency/{model}/pin")
+async def unpin_model(model: str):
+    residency_manager.unpin(model)
+    return {"status": "ok"}
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Query
+from ....services.model_registry import model_registry
+
+router = APIRouter(prefix="/registry", tags=["registry"])
+
+
+@router.get("/")
+async def list_local_models(
+    format: str | None = Query(None, description="'gguf' or 'safetensors'"),
+    architecture: str | None = None,
+    quantization: str | None = Query(None, description="e.g. 'Q4' matches Q4_K_M"),
+    dtype: str | None = None,
+    min_params: int | None = None,
+    max_params: int | None = None,
+    min_context: int | None = None,
+    max_size_bytes: int | None = None,
+):
+    """Query local models by metadata read from their file headers."""
+    return model_registry.query(
+        format=format,
+        architecture=architecture,
+        quantization=quantization,
+        dtype=dtype,
+        min_params=min_params,
+        max_params=max_params,
+        min_context=min_context,
+        max_size_bytes=max_size_bytes,
+    )
+
+
+@router.get("/model")
+async def get_local_model(path: str):
+    entry = model_registry.get(path)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Model not indexed")
+    return {k: v for k, v in entry.items() if k != "fingerprint"}
+
+
+@router.post("/scan")
+async def scan_local_models():
+    """Rescan ``local_model_dir`` now; only changed files are re-read."""
+    return await model_registry.refresh()
@@ -1,13 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter
 from pydantic import BaseModel
 from app.core.config import settings
-import os
-import json
+from app.core.settings_store import settings_store
 
 router = APIRouter()
 
-SETTINGS_FILE = os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json")
-
 
 class SettingsUpdate(BaseModel):
     local_model_dir: str | None = None
@@ -18,9 +15,8 @@ class SettingsUpdate(BaseModel):
 
 @router.get("/settings", response_model=SettingsUpdate)
 def get_settings():
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, "r") as f:
-            data = json.load(f)
+    data = settings_store.all()
+    if data:
         return SettingsUpdate(**data)
     # fallback to env/config
     return SettingsUpdate(
@@ -33,7 +29,8 @@ def get_settings():
 
 @router.post("/settings", response_model=SettingsUpdate)
 def update_settings(update: SettingsUpdate):
-    data = update.dict()
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(data, f)
-    return update
+    # Only the fields sent are merged, so keys outside this schema (such as
+    # batch_output_dir) survive. Written atomically; every service sees the
+    # new values on its next read.
+    data = settings_store.update(update.model_dump(exclude_unset=True))
+    return SettingsUpdate(**data)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from bson import ObjectId
 import logging
 
 from ....core.database import db
+from ....core.responses import check_conditional
+from ....services.training_metrics import MetricsStore
 from ....services.tuning_service import TuningService
 from ....schemas.tuning import TuningCreate, Tuning, TuningProgress, PyObjectId
 
@@ -29,9 +32,44 @@ async def start_tuning(data: TuningCreate, service=Depends(get_service)):
 
 
 @router.get("/", response_model=list[Tuning])
-async def list_tasks(service=Depends(get_service)):
+async def list_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    status: list[str] | None = Query(None),
+    job_type: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    service=Depends(get_service),
+):
+    """List task summaries, newest first.
+
+    Per-step curves are omitted; fetch ``/tuning/{id}`` for the full task.
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    """
     try:
-        return await service.list_tasks()
+        tasks, next_cursor = await service.list_tasks(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            job_type=job_type,
+            created_after=created_after,
+            created_before=created_before,
+        )
+        conditional = check_conditional(
+            request,
+            [(str(t.id), t.updated_at) for t in tasks],
+            extra=f"{request.url.query}|{next_cursor}",
+        )
+        if conditional.not_modified:
+            return conditional.not_modified_response()
+        conditional.apply(response)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return tasks
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error listing tuning tasks: {e}")
         raise HTTPException(
@@ -56,10 +94,20 @@ async def get_task(task_id: str, service=Depends(get_service)):
 
 
 @router.get("/{task_id}/progress", response_model=TuningProgress)
-async def get_progress(task_id: str, service=Depends(get_service)):
+async def get_progress(
+    task_id: str, request: Request, response: Response, service=Depends(get_service)
+):
     try:
         # Handle both ObjectId and string task IDs
         search_id = ObjectId(task_id) if hasattr(service, "collection") else task_id
+        # Answer unchanged polls from the version alone, before loading the task
+        exists, updated_at = await service.get_updated_at(search_id)
+        if not exists:
+            raise HTTPException(status_code=404, detail="Task not found")
+        conditional = check_conditional(request, [(task_id, updated_at)])
+        if conditional.not_modified:
+            return conditional.not_modified_response()
+        conditional.apply(response)
         task = await service.get_task(search_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
@@ -70,8 +118,28 @@ async def get_progress(task_id: str, service=Depends(get_service)):
             result=task.result,
             updated_at=task.updated_at,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting tuning progress: {e}")
         raise HTTPException(
             status_code=500, detail=f"Failed to get tuning progress: {str(e)}"
         )
+
+
+@router.get("/{task_id}/metrics")
+async def get_metrics(
+    task_id: str,
+    metric: str = "loss",
+    start_step: int | None = None,
+    end_step: int | None = None,
+    points: int = Query(500, ge=3, le=10000),
+):
+    """Training curve for ``metric``, downsampled server-side with LTTB."""
+    store = MetricsStore(db)
+    return await store.series(task_id, metric, start_step, end_step, points)
+
+
+@router.get("/{task_id}/metrics/names")
+async def get_metric_names(task_id: str):
+    return await MetricsStore(db).metric_names(task_id)
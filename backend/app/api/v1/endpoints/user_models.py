@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
 from bson import ObjectId
 import logging
 
 from ....core.database import db
+from ....core.responses import check_conditional
+from ....core.settings_store import settings_store
 from ....services import ModelService, TuningService
 from ....services.model_service import ModelService
 from ....schemas.model import SavedModel, SavedModelCreate, PyObjectId
@@ -27,9 +30,37 @@ def get_tuning_service():
 
 
 @router.get("/", response_model=list[SavedModel])
-async def list_models(service=Depends(get_model_service)):
+async def list_models(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    name: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    service=Depends(get_model_service),
+):
     try:
-        return await service.list_models()
+        models, next_cursor = await service.list_models(
+            limit=limit,
+            cursor=cursor,
+            name=name,
+            created_after=created_after,
+            created_before=created_before,
+        )
+        conditional = check_conditional(
+            request,
+            [(str(m.id), m.updated_at) for m in models],
+            extra=f"{request.url.query}|{next_cursor}",
+        )
+        if conditional.not_modified:
+            return conditional.not_modified_response()
+        conditional.apply(response)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return models
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing models: {e}")
         # Return empty list if database fails
@@ -41,9 +72,11 @@ async def save_model(
     payload: SavedModelCreate, service: ModelService = Depends(get_model_service)
 ):
     # Use settings or default for model_dir
-    settings = service._load_settings()
-    model_dir = settings.get("local_model_dir", "saved_models")
-    saved = await service.save_model(payload, model_dir)
+    model_dir = settings_store.get("local_model_dir", "saved_models")
+    try:
+        saved = await service.save_model(payload, model_dir)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return saved
 
 
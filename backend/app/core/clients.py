@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+
+from typing import TYPE_CHECKING
+
+import httpx
+import ollama
+from openai import AsyncOpenAI
+
+from .config import settings
+from .database import Database
+from .metrics import observe_upstream
+
+if TYPE_CHECKING:  # imported on first use; the hub client is slow to import
+    from huggingface_hub import HfApi
+
+logger = logging.getLogger(__name__)
+
+
+def _httpx_pool_stats(client: httpx.AsyncClient | None) -> dict:
+    """Best-effort view of an httpx connection pool (uses httpcore internals)."""
+    if client is None:
+        return {"created": False}
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+    return {
+        "created": True,
+        "connections": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "waiting": len(getattr(pool, "_requests", []) or []),
+        "max_connections": getattr(pool, "_max_connections", None),
+    }
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Pooled transport that records latency and errors of every upstream call.
+
+    Latency is measured to the response headers; the operation label is the
+    first ``segments`` path segments (``/api/chat``) unless ``operation``
+    maps the path itself, keeping the series count bounded.
+    """
+
+    def __init__(self, service: str, segments: int = 2, operation=None, **kwargs):
+        super().__init__(**kwargs)
+        self.service = service
+        self.segments = segments
+        self.operation = operation
+
+    def _operation(self, path: str) -> str:
+        if self.operation is not None:
+            return self.operation(path)
+        return "/" + "/".join(path.strip("/").split("/")[: self.segments])
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = self._operation(request.url.path)
+        start = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            observe_upstream(self.service, operation, time.perf_counter() - start, True)
+            raise
+        status = response.status_code
+        observe_upstream(
+            self.service,
+            operation,
+            time.perf_counter() - start,
+            status >= 500 or status == 429,
+        )
+        return response
+
+
+class ClientRegistry:
+    """Application-wide outbound clients with pooled connections.
+
+    Clients are created lazily (or eagerly in :meth:`startup`) and shared by
+    every request, then closed once in :meth:`shutdown`.
+    """
+
+    def __init__(self):
+        self._ollama: ollama.AsyncClient | None = None
+        self._openai: AsyncOpenAI | None = None
+        self._hf: dict[str, "HfApi"] = {}
+        self._saved_token: str | None = None
+        self._hf_lock = threading.Lock()
+
+    def _limits(self, max_connections: int, max_keepalive: int) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_keepalive
+        )
+
+    @property
+    def ollama(self) -> ollama.AsyncClient:
+        if self._ollama is None:
+            self._ollama = ollama.AsyncClient(
+                host=settings.ollama_host,
+                transport=InstrumentedTransport(
+                    "ollama",
+                    limits=self._limits(
+                        settings.ollama_max_connections, settings.ollama_max_keepalive
+                    ),
+                ),
+            )
+        return self._ollama
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            # Retries are handled by retry_async, so the SDK retry loop is off
+            self._openai = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    transport=InstrumentedTransport(
+                        "openai",
+                        segments=3,
+                        limits=self._limits(
+                            settings.openai_max_connections, settings.openai_max_keepalive
+                        ),
+                    ),
+                    timeout=httpx.Timeout(settings.openai_timeout, connect=10.0),
+                ),
+            )
+        return self._openai
+
+    @property
+    def mongo(self):
+        return Database.get_client()
+
+    def hf_api(self, token: str | None) -> "HfApi":
+        """Return a cached ``HfApi`` for ``token``, persisting it once."""
+        from huggingface_hub import HfApi, HfFolder
+
+        key = token or ""
+        with self._hf_lock:
+            api = self._hf.get(key)
+            if api is None:
+                api = HfApi(endpoint=settings.hf_endpoint, token=token)
+                self._hf[key] = api
+            if token and token != self._saved_token:
+                # Only touch the token file when the token actually changes
+                if HfFolder.get_token() != token:
+                    HfFolder.save_token(token)
+                self._saved_token = token
+        return api
+
+    async def startup(self) -> None:
+        self.ollama
+        self.openai
+        self.mongo
+        logger.info("Client registry started")
+
+    async def shutdown(self) -> None:
+        if self._ollama is not None:
+            await self._ollama._client.aclose()
+            self._ollama = None
+        if self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+        self._hf.clear()
+        Database.close()
+        logger.info("Client registry closed")
+
+    def stats(self) -> dict:
+        return {
+            "ollama": _httpx_pool_stats(
+                self._ollama._client if self._ollama is not None else None
+            ),
+            "openai": _httpx_pool_stats(
+                self._openai._client if self._openai is not None else None
+            ),
+            "huggingface": {"apis": len(self._hf)},
+            "mongo": {
+                "max_pool_size": settings.mongodb_max_pool_size,
+                **Database.pool_monitor.stats(),
+            },
+        }
+
+
+# Singleton registry used by services and endpoints
+clients = ClientRegistry()
@@ -6,8 +6,115 @@ class Settings(BaseSettings):
     app_name: str = "CodeTune Backend"
     mongodb_uri: str = Field(..., description="MongoDB URI")
     mongodb_db: str = Field(default="codetune", description="MongoDB database name")
+    mongodb_max_pool_size: int = Field(default=50, description="MongoDB pool size")
     openai_api_key: str = Field(..., description="OpenAI API key")
     huggingface_token: str | None = Field(default=None, description="HuggingFace token")
+    openai_base_url: str | None = Field(
+        default=None, description="Override for OpenAI-compatible API base URL"
+    )
+    openai_timeout: float = Field(default=60.0, description="Per-request timeout (s)")
+    openai_max_retries: int = Field(default=3, description="Retries on transient errors")
+    openai_max_connections: int = Field(default=20, description="HTTP pool size")
+    openai_max_keepalive: int = Field(default=10, description="Idle pooled connections")
+    response_cache_max_entries: int = Field(default=1024, description="LRU size")
+    response_cache_ttl: float = Field(default=3600.0, description="Entry TTL (s)")
+    response_cache_persistent: bool = Field(
+        default=False, description="Also store cached responses in MongoDB"
+    )
+    ollama_host: str | None = Field(
+        default=None, description="Ollama server URL (defaults to OLLAMA_HOST)"
+    )
+    ollama_max_connections: int = Field(default=20, description="HTTP pool size")
+    ollama_max_keepalive: int = Field(default=10, description="Idle pooled connections")
+    ollama_max_concurrency: int = Field(default=2, description="Concurrent chats per model")
+    ollama_max_queue: int = Field(default=32, description="Queued chats per model")
+    ollama_queue_timeout: float = Field(default=30.0, description="Max queue wait (s)")
+    ollama_memory_budget_mb: int = Field(
+        default=0, description="Memory budget for loaded models (0 = unlimited)"
+    )
+    ollama_hot_keep_alive: str = Field(
+        default="-1m", description="Keep-alive for hot models ('-1m' keeps them loaded)"
+    )
+    ollama_cold_keep_alive: str = Field(default="5m", description="Keep-alive for cold models")
+    ollama_hot_window: float = Field(default=600.0, description="Seconds a model stays hot")
+    ollama_residency_interval: float = Field(default=30.0, description="Budget check interval")
+    context_budget_tokens: int = Field(default=8000, description="Chat context budget")
+    context_budgets: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-model overrides of context_budget_tokens (by name or name:tag)",
+    )
+    context_keep_recent: int = Field(default=6, description="Turns always kept verbatim")
+    context_strategy: str = Field(
+        default="truncate", description="'truncate' or 'summarize' older turns"
+    )
+    hf_catalog_snapshot: str = Field(
+        default="hf_catalog.json", description="On-disk HF catalog snapshot"
+    )
+    hf_catalog_fixture: str | None = Field(
+        default=None, description="JSON file used instead of the Hub (tests/offline)"
+    )
+    hf_catalog_refresh_interval: float = Field(default=3600.0, description="Seconds")
+    hf_catalog_limit: int = Field(default=1000, description="Models fetched per refresh")
+    hf_endpoint: str = Field(
+        default="https://huggingface.co", description="HuggingFace Hub base URL"
+    )
+    hf_transfer_max_concurrency: int = Field(
+        default=4, description="Files transferred in parallel across all jobs"
+    )
+    hf_transfer_bandwidth_mbps: float = Field(
+        default=0.0, description="Shared transfer bandwidth cap in Mbit/s (0 = unlimited)"
+    )
+    model_registry_index: str = Field(
+        default="model_registry.json", description="On-disk local model index"
+    )
+    model_registry_scan_interval: float = Field(
+        default=60.0, description="Seconds between local model rescans"
+    )
+    artifact_store_dir: str = Field(
+        default="artifacts", description="Content-addressed model file store"
+    )
+    artifact_link_mode: str = Field(
+        default="hardlink", description="'hardlink', 'reflink' or 'copy'"
+    )
+    artifact_gc_grace_seconds: float = Field(
+        default=3600.0, description="Minimum age before unreferenced blobs are deleted"
+    )
+    progress_broker_url: str | None = Field(
+        default=None, description="redis:// URL for cross-node progress fan-out"
+    )
+    gzip_minimum_size: int = Field(
+        default=1024, description="Smallest response body (bytes) that is gzipped"
+    )
+    log_format: str = Field(
+        default="rich", description="'rich' for development consoles or 'json'"
+    )
+    log_level: str = Field(default="INFO")
+    log_queue_size: int = Field(
+        default=10000, description="Records buffered for the log thread before dropping"
+    )
+    log_max_message_chars: int = Field(
+        default=4000, description="Longer log messages are truncated"
+    )
+    log_sample_rates: dict[str, float] = Field(
+        default_factory=dict,
+        description="Fraction of sub-WARNING records kept per logger name prefix",
+    )
+    log_max_chars: dict[str, int] = Field(
+        default_factory=dict, description="Per-logger overrides of log_max_message_chars"
+    )
+    embedded_workers: bool = Field(
+        default=True,
+        description="Run the tuning and batch workers inside the API process; "
+        "set false when they run separately via 'python -m app.worker'",
+    )
+    worker_metrics_port: int | None = Field(
+        default=None, description="Port for the worker process's /metrics"
+    )
+    task_lease_seconds: float = Field(
+        default=60.0,
+        description="How long a worker's claim on a task lasts without renewal; "
+        "batch jobs whose lease expires are taken over by another worker",
+    )
 
     model_config = {"env_file": ".env", "case_sensitive": False, "extra": "ignore"}
 
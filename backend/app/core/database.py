@@ -1,17 +1,99 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from .config import settings
+from .metrics import MONGO_ERRORS, MONGO_LATENCY
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Track MongoDB connection pool usage for the client stats endpoint."""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open = max(0, self.open - 1)
+
+    def connection_check_out_started(self, event):
+        self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        self.waiting = max(0, self.waiting - 1)
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.waiting = max(0, self.waiting - 1)
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out = max(0, self.checked_out - 1)
+
+    def stats(self) -> dict:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "waiting": self.waiting,
+            "checkout_failures": self.checkout_failures,
+        }
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Feed MongoDB command round-trip times into the metrics registry."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_ERRORS.labels(event.command_name).inc()
+
 
 class Database:
     client: AsyncIOMotorClient | None = None
+    pool_monitor = PoolMonitor()
+    command_timer = CommandTimer()
 
     @classmethod
     def get_client(cls) -> AsyncIOMotorClient:
         if not cls.client:
-            cls.client = AsyncIOMotorClient(settings.mongodb_uri)
+            cls.client = AsyncIOMotorClient(
+                settings.mongodb_uri,
+                maxPoolSize=settings.mongodb_max_pool_size,
+                event_listeners=[cls.pool_monitor, cls.command_timer],
+            )
         return cls.client
 
     @classmethod
     def get_db(cls):
         return cls.get_client()[settings.mongodb_db]
 
+    @classmethod
+    def close(cls) -> None:
+        if cls.client:
+            cls.client.close()
+            cls.client = None
+
 db = Database.get_db()
@@ -1,3 +1,12 @@
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
 from rich.console import Console
 from rich.table import Table
 from rich.tree import Tree
@@ -13,32 +22,237 @@ from rich.progress import (
 from rich.status import Status
 from rich.markdown import Markdown
 from rich.syntax import Syntax
+from rich.logging import RichHandler
 from rich.traceback import install as install_traceback
 
 # Enable rich tracebacks
 install_traceback()
 
 
-class Logger:
+# Attributes every LogRecord has; anything else arrived through ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def _for_logger(name: str, mapping: dict):
+    """Value of the longest logger-name prefix in ``mapping`` matching ``name``."""
+    best, value = -1, None
+    for prefix, candidate in mapping.items():
+        if name == prefix or name.startswith(prefix + ".") or prefix in ("", "root"):
+            if len(prefix) > best:
+                best, value = len(prefix), candidate
+    return value
+
+
+def _render_table(title: str, columns: list[str], rows: list[list]) -> Table:
+    table = Table(title=title)
+    for col in columns:
+        table.add_column(col)
+    for row in rows:
+        table.add_row(*row)
+    return table
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; ``extra`` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleHandler(RichHandler):
+    """Rich output for development; renders records logged with a table."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        table = getattr(record, "table", None)
+        if table:
+            self.console.print(_render_table(record.getMessage(), **table))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of sub-WARNING records per logger name prefix."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = _for_logger(record.name, self.rates)
+        if rate is None or rate >= 1 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class PipelineQueueHandler(QueueHandler):
+    """Hand records to the log thread doing as little as possible in the caller.
+
+    Only the ``%`` arguments are merged (so mutable arguments are captured
+    now) and the message is capped at the logger's size limit. Exception
+    text, JSON encoding and console rendering happen on the listener thread.
+    When the queue is full the record is dropped and counted instead of
+    blocking the request.
+    """
+
+    def __init__(self, q: queue.Queue, max_chars: int, max_chars_by_logger: dict[str, int]):
+        super().__init__(q)
+        self.max_chars = max_chars
+        self.max_chars_by_logger = max_chars_by_logger
+        self.dropped = 0
+        self.truncated = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        message = record.getMessage()
+        limit = _for_logger(record.name, self.max_chars_by_logger) or self.max_chars
+        if limit and len(message) > limit:
+            message = f"{message[:limit]}... [{len(message) - limit} chars truncated]"
+            self.truncated += 1
+        record.msg, record.args = message, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room so shutdown still flushes a full queue
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """Route all stdlib logging through a queue drained by one background thread.
+
+    Request handlers only enqueue records; formatting and console/stdout I/O
+    happen on the listener thread. ``json`` output is meant for production
+    log collectors, ``rich`` for a developer's terminal.
+    """
+
     def __init__(self):
-        self.console = Console()
+        self.handler: PipelineQueueHandler | None = None
+        self.sampler: SamplingFilter | None = None
+        self.listener: QueueListener | None = None
+        self.fmt = None
+
+    def configure(
+        self,
+        fmt: str = "rich",
+        level: str = "INFO",
+        queue_size: int = 10000,
+        max_chars: int = 4000,
+        max_chars_by_logger: dict[str, int] | None = None,
+        sample_rates: dict[str, float] | None = None,
+        console: Console | None = None,
+    ) -> None:
+        self.stop()
+        if fmt == "json":
+            sink = logging.StreamHandler(sys.stdout)
+            sink.setFormatter(JSONFormatter())
+        else:
+            sink = ConsoleHandler(console=console, rich_tracebacks=True)
+            sink.setFormatter(logging.Formatter("%(message)s"))
+        self.fmt = fmt
+        self.handler = PipelineQueueHandler(
+            queue.Queue(queue_size), max_chars, max_chars_by_logger or {}
+        )
+        self.sampler = SamplingFilter(sample_rates or {})
+        self.handler.addFilter(self.sampler)
 
-    def log(self, *args, **kwargs):
-        """Log a message with rich formatting."""
-        self.console.log(*args, **kwargs)
+        root = logging.getLogger()
+        root.handlers = [self.handler]
+        root.setLevel(level.upper())
+        # Send uvicorn's access and error logs down the same pipeline
+        for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers = []
+            uvicorn_logger.propagate = True
+
+        self.listener = _Listener(self.handler.queue, sink, respect_handler_level=True)
+        self.listener.start()
+
+    def configure_from(self, config, console: Console | None = None) -> None:
+        """Configure from the ``log_*`` fields of the app settings."""
+        self.configure(
+            fmt=config.log_format,
+            level=config.log_level,
+            queue_size=config.log_queue_size,
+            max_chars=config.log_max_message_chars,
+            max_chars_by_logger=config.log_max_chars,
+            sample_rates=config.log_sample_rates,
+            console=console,
+        )
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> dict:
+        handler = self.handler
+        return {
+            "format": self.fmt,
+            "running": self.listener is not None,
+            "queued": handler.queue.qsize() if handler else 0,
+            "dropped": handler.dropped if handler else 0,
+            "truncated": handler.truncated if handler else 0,
+            "sampled_out": self.sampler.sampled_out if self.sampler else 0,
+        }
+
+
+class Logger:
+    def __init__(self, name: str = "codetune", console: Console | None = None):
+        self.name = name
+        self.console = console or Console()
+        self._logger = logging.getLogger(name)
+
+    def child(self, suffix: str) -> "Logger":
+        """Logger for ``<name>.<suffix>``, so it can be sampled or capped on its own."""
+        return Logger(f"{self.name}.{suffix}", self.console)
+
+    def log(self, *args, level: int = logging.INFO, exc_info=None, **fields):
+        """Queue a log message; keyword arguments become structured fields."""
+        if not self._logger.isEnabledFor(level):
+            return
+        message = " ".join(str(arg) for arg in args)
+        self._logger.log(
+            level, message, exc_info=exc_info, extra=fields or None, stacklevel=2
+        )
 
     def print(self, *args, **kwargs):
-        """Print rich renderables or text."""
+        """Print rich renderables or text (synchronously; not for request paths)."""
         self.console.print(*args, **kwargs)
 
-    def table(self, title: str, columns: list[str], rows: list[list]):
-        """Render a table given column names and row data."""
-        table = Table(title=title)
-        for col in columns:
-            table.add_column(col)
-        for row in rows:
-            table.add_row(*[str(cell) for cell in row])
-        self.console.print(table)
+    def table(
+        self, title: str, columns: list[str], rows: list[list], level: int = logging.INFO
+    ):
+        """Log tabular data: a rendered table on the console, rows in JSON."""
+        if not self._logger.isEnabledFor(level):
+            return
+        rows = [[str(cell) for cell in row] for row in rows]
+        self._logger.log(
+            level, title, extra={"table": {"columns": columns, "rows": rows}}, stacklevel=2
+        )
 
     def tree(self, label: str) -> Tree:
         """Create a tree with the given root label."""
@@ -80,3 +294,5 @@ class Logger:
 
 # Singleton logger instance
 logger = Logger()
+# Singleton pipeline; configured once at startup
+log_pipeline = LogPipeline()
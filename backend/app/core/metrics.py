@@ -0,0 +1,423 @@
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        # bisect_left puts a value equal to a bound in that bound's bucket (le)
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """A named metric family; ``labels(*values)`` returns the child series.
+
+    Children are cached per label tuple, so the hot path is one dict lookup
+    and one short lock; everything else happens at scrape time. Label values
+    should be strings so the cache lookup hits.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            values = tuple(str(v) for v in values)
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def series(self) -> list[tuple[str, ...]]:
+        """Label tuples observed so far."""
+        return list(self._children)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._samples(_labels(self.labelnames, values), values, child))
+        return lines
+
+    def _samples(self, labels: str, values: tuple[str, ...], child) -> list[str]:
+        return [f"{self.name}{labels} {_number(child.value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self, labels: str, values: tuple[str, ...], child) -> list[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = _labels(self.labelnames, values, f'le="{_number(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+Collector = Callable[[], Awaitable[None]]
+
+
+class MetricsRegistry:
+    """All metric families of the process, rendered in Prometheus text format.
+
+    Collectors are async callbacks run at scrape time to refresh gauges that
+    are cheaper to read on demand (queue depth) than to keep up to date.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Collector] = []
+
+    def _register(self, metric: Metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Serve ``GET /metrics`` on a bare asyncio server.
+
+        For processes that do not run the API, such as ``app.worker``.
+        """
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request_line = (await reader.readline()).split()
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                path = request_line[1].split(b"?")[0] if len(request_line) > 1 else b""
+                if path == b"/metrics":
+                    status, ctype = "200 OK", CONTENT_TYPE
+                    body = (await self.render()).encode()
+                else:
+                    status, ctype, body = "404 Not Found", "text/plain", b"Not Found"
+                head = (
+                    f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                )
+                writer.write(head.encode() + body)
+                await writer.drain()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    async def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                await collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry; the families below are shared across the app
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "codetune_http_requests_total", "HTTP requests by route and status",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = metrics.histogram(
+    "codetune_http_request_duration_seconds",
+    "Time to finish the HTTP response, by route", ("method", "route"),
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "codetune_http_requests_in_flight", "HTTP requests currently being served"
+)
+UPSTREAM_LATENCY = metrics.histogram(
+    "codetune_upstream_request_seconds",
+    "Latency of calls to Ollama, OpenAI and HuggingFace", ("service", "operation"),
+)
+UPSTREAM_ERRORS = metrics.counter(
+    "codetune_upstream_errors_total",
+    "Failed upstream calls (exceptions, 429 and 5xx)", ("service", "operation"),
+)
+MONGO_LATENCY = metrics.histogram(
+    "codetune_mongo_command_seconds", "MongoDB command round-trip time", ("command",)
+)
+MONGO_ERRORS = metrics.counter(
+    "codetune_mongo_command_errors_total", "Failed MongoDB commands", ("command",)
+)
+TASK_STAGE_SECONDS = metrics.histogram(
+    "codetune_task_stage_seconds", "Time tasks spent in each stage",
+    ("job_type", "stage"), buckets=STAGE_BUCKETS,
+)
+TASKS_FINISHED = metrics.counter(
+    "codetune_tasks_finished_total", "Tasks that reached a terminal status",
+    ("job_type", "status"),
+)
+QUEUE_DEPTH = metrics.gauge(
+    "codetune_task_queue_depth", "Queued tasks by job type", ("job_type",)
+)
+QUEUE_OLDEST_AGE = metrics.gauge(
+    "codetune_task_queue_oldest_age_seconds",
+    "Age of the oldest queued task by job type", ("job_type",),
+)
+
+PROCESS_RSS = metrics.gauge(
+    "codetune_process_resident_memory_bytes", "Resident set size of this process"
+)
+PROCESS_STARTUP = metrics.gauge(
+    "codetune_process_startup_seconds",
+    "Seconds from process start until the app finished starting up",
+)
+
+# Fallback when /proc is not available: roughly when the app began importing
+_IMPORTED_AT = time.time()
+
+
+def process_start_time() -> float:
+    """Wall-clock time the process was started (Linux), else module import time."""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Field 22 (after the parenthesised command name) is start time in ticks
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open("/proc/stat", "rb") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith(b"btime"))
+        return boot + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return _IMPORTED_AT
+
+
+def mark_started() -> float:
+    """Record how long startup took (imports included); returns the seconds."""
+    seconds = max(0.0, time.time() - process_start_time())
+    PROCESS_STARTUP.set(seconds)
+    return seconds
+
+
+def resident_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    # Peak rather than current RSS; reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def _collect_process() -> None:
+    PROCESS_RSS.set(resident_memory_bytes())
+
+
+metrics.add_collector(_collect_process)
+
+
+def observe_upstream(service: str, operation: str, seconds: float, error: bool) -> None:
+    UPSTREAM_LATENCY.labels(service, operation).observe(seconds)
+    if error:
+        UPSTREAM_ERRORS.labels(service, operation).inc()
+
+
+class track_upstream:
+    """Time a block as one upstream call; an exception counts as an error.
+
+    Usable with both ``with`` and ``async with``.
+    """
+
+    __slots__ = ("service", "operation", "start")
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe_upstream(
+            self.service, self.operation, time.perf_counter() - self.start, exc_type is not None
+        )
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class MetricsMiddleware:
+    """Record latency, status and in-flight count for every HTTP request.
+
+    Requests are labelled by route template (``/api/v1/tuning/{task_id}``),
+    not the raw path, to keep the series count bounded. Streaming responses
+    are timed until the body is finished.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+        in_flight = HTTP_IN_FLIGHT.labels()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # Routers that do not set scope["route"] still leave the endpoint
+            route = scope.get("route")
+            endpoint = scope.get("endpoint")
+            path = getattr(route, "path", None) or getattr(
+                endpoint, "__name__", "unmatched"
+            )
+            method = scope.get("method", "")
+            HTTP_LATENCY.labels(method, path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
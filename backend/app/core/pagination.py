@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+# Newest first, with _id as the tiebreaker so the order is total
+NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    """Opaque cursor pointing just past ``doc`` in ``NEWEST_FIRST`` order."""
+    created = doc.get("created_at")
+    key = [created.isoformat() if created else None, str(doc["_id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def keyset_filter(cursor: str) -> dict:
+    """Mongo filter selecting documents after ``cursor`` in ``NEWEST_FIRST`` order.
+
+    Raises ``ValueError`` for malformed cursors.
+    """
+    try:
+        created, oid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        oid = ObjectId(oid)
+        created = datetime.fromisoformat(created) if created else None
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if created is None:
+        # Documents without created_at sort last; page through them by _id
+        return {"created_at": None, "_id": {"$lt": oid}}
+    return {
+        "$or": [
+            {"created_at": {"$lt": created}},
+            {"created_at": created, "_id": {"$lt": oid}},
+            {"created_at": None},
+        ]
+    }
+
+
+def date_filter(
+    created_after: datetime | None = None, created_before: datetime | None = None
+) -> dict:
+    bounds = {}
+    if created_after:
+        bounds["$gte"] = created_after
+    if created_before:
+        bounds["$lt"] = created_before
+    return {"created_at": bounds} if bounds else {}
@@ -0,0 +1,103 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
+
+try:  # optional: falls back to the stdlib encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed.
+
+    FastAPI still validates and filters through ``response_model`` before
+    ``render`` sees the content; only the final encoding changes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ConditionalResult:
+    """Validators for one response and whether the client already has it."""
+
+    def __init__(self, etag: str, last_modified: datetime | None, not_modified: bool):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+
+    @property
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers)
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+
+def _utc(moment: datetime) -> datetime:
+    # Mongo hands back naive UTC datetimes
+    moment = moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    return moment.replace(microsecond=0)
+
+
+def check_conditional(
+    request: Request, versions: list[tuple[str, datetime | None]], extra: str = ""
+) -> ConditionalResult:
+    """Derive an ETag/Last-Modified from ``(id, updated_at)`` pairs.
+
+    ``extra`` folds in anything else that changes the representation (query
+    string, next cursor). ``If-None-Match`` takes precedence over
+    ``If-Modified-Since`` as in RFC 9110.
+    """
+    digest = hashlib.sha1(extra.encode())
+    stamps = []
+    for key, updated_at in versions:
+        digest.update(f"{key}:{updated_at.isoformat() if updated_at else ''};".encode())
+        if updated_at:
+            stamps.append(_utc(updated_at))
+    etag = f'W/"{digest.hexdigest()}"'
+    last_modified = max(stamps) if stamps else None
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip() for t in if_none_match.split(",")}
+        not_modified = "*" in tags or etag in tags or etag[2:] in tags
+        return ConditionalResult(etag, last_modified, not_modified)
+    not_modified = False
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            not_modified = last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            not_modified = False
+    return ConditionalResult(etag, last_modified, not_modified)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip for regular responses; event streams are passed through untouched
+    so tokens are not held back by the compressor."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            path = scope.get("path", "")
+            accept = dict(scope.get("headers") or []).get(b"accept", b"")
+            if path.endswith("/stream") or b"text/event-stream" in accept:
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
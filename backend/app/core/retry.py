@@ -0,0 +1,60 @@
+import asyncio
+import random
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether ``exc`` is worth retrying: a connection failure, timeout, 5xx or 429.
+
+    Client errors such as 404 (model not found) or 400 fail the same way on
+    every attempt, so they are raised straight away.
+    """
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status == 429
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    try:
+        import httpx
+    except ImportError:  # pragma: no cover - httpx ships with ollama and openai
+        return False
+    return isinstance(exc, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter for the given (0-based) attempt."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+async def retry_async(
+    func: Callable[[], Awaitable[T]],
+    retries: int = 3,
+    retry_on: tuple[type[BaseException], ...] = (Exception,),
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+    retry_if: Callable[[BaseException], bool] | None = None,
+) -> T:
+    """Await ``func()`` retrying on ``retry_on`` errors with jittered backoff.
+
+    ``retry_if`` narrows ``retry_on`` further; errors it rejects are raised
+    without retrying.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await func()
+        except retry_on as e:
+            if attempt >= retries or (retry_if and not retry_if(e)):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(
+                "Retrying after error",
+                extra={"attempt": attempt + 1, "delay": round(delay, 3), "error": str(e)},
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[dict, dict], None]
+
+
+class SettingsStore:
+    """In-memory view of ``settings.json`` shared by every service.
+
+    Reads are served from memory. The file's mtime is checked at most every
+    ``check_interval`` seconds (and by ``watch`` in the background), so edits
+    made outside the API are picked up without re-parsing on every call.
+    Writes go to a temporary file that atomically replaces the original, so
+    readers never see a half-written file. Listeners are called with
+    ``(new, old)`` whenever the contents change.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._data: dict = {}
+        self._mtime: int | None = None
+        self._checked = 0.0
+        self._lock = threading.RLock()
+        self._listeners: list[Listener] = []
+        self._running = False
+        self._load()
+
+    def _stat(self) -> int | None:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> bool:
+        """Re-read the file if it changed; returns True when contents changed."""
+        mtime = self._stat()
+        with self._lock:
+            self._checked = time.monotonic()
+            if mtime == self._mtime:
+                return False
+            data: dict = {}
+            if mtime is not None:
+                try:
+                    with open(self.path, "r") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Keep the last good settings; retry once the file changes again
+                    logger.warning(f"Could not read {self.path}: {e}")
+                    self._mtime = mtime
+                    return False
+            self._mtime = mtime
+            old, self._data = self._data, data
+        if old != data:
+            self._notify(data, old)
+            return True
+        return False
+
+    def _notify(self, new: dict, old: dict) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(dict(new), dict(old))
+            except Exception:
+                logger.warning("Settings listener failed", exc_info=True)
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self._load()
+
+    def all(self) -> dict:
+        self._maybe_reload()
+        with self._lock:
+            return dict(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._maybe_reload()
+        with self._lock:
+            value = self._data.get(key)
+        return default if value is None else value
+
+    def reload(self) -> bool:
+        return self._load()
+
+    def update(self, values: dict, replace: bool = False) -> dict:
+        """Merge (or with ``replace``, overwrite) settings and persist them."""
+        with self._lock:
+            old = dict(self._data)
+            data = dict(values) if replace else {**old, **values}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".settings-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._data = data
+            self._mtime = self._stat()
+            self._checked = time.monotonic()
+        if old != data:
+            self._notify(data, old)
+        return dict(data)
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def watch(self, interval: float = 2.0) -> None:
+        """Poll the file's mtime so listeners fire even when nobody reads."""
+        self._running = True
+        while self._running:
+            await asyncio.sleep(interval)
+            try:
+                self._load()
+            except Exception as e:
+                logger.error(f"Settings watch error: {e}")
+
+    def stop(self) -> None:
+        self._running = False
+
+
+# Singleton store; every reader of settings.json goes through it
+settings_store = SettingsStore(os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json"))
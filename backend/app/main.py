@@ -7,20 +7,34 @@ from fastapi import (
     Query,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from .core.config import settings
+from .core.metrics import CONTENT_TYPE, MetricsMiddleware, mark_started, metrics
+from .core.responses import FastJSONResponse, SelectiveGZipMiddleware
 from .api.v1.api import api_router
 from app.services.healthcheck_service import HealthCheckService
 from app.services.tuning_worker import TuningWorker
+from app.services.batch_inference_worker import BatchInferenceWorker
+from app.services.model_service import ModelService
+from app.services.analytics_service import AnalyticsService
+from app.services.training_metrics import MetricsStore
+from app.services.tuning_service import TuningService
+from app.core.clients import clients
+from app.services.chat_stream import WebSocketChatSession
+from app.services.progress_broker import ProgressSession, progress_broker
+from app.services.model_residency import residency_manager
+from app.services.model_catalog import model_catalog
+from app.services.model_transfer import transfer_manager
+from app.services.model_registry import model_registry
+from app.core.settings_store import settings_store
 from app.core.database import db
 import asyncio
-import logging
-from rich.logging import RichHandler
-from app.core.logger import logger  # new import
+import json
+from app.core.logger import log_pipeline, logger  # new import
 from typing import Optional
 
-logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[RichHandler()])
-app = FastAPI(title=settings.app_name)
+log_pipeline.configure_from(settings, console=logger.console)
+app = FastAPI(title=settings.app_name, default_response_class=FastJSONResponse)
 logger.log(f"Starting {settings.app_name} application")
 
 
@@ -35,6 +49,10 @@ app.add_middleware(
     max_age=600,  # Cache preflight response for 600 seconds
 )
 logger.log("CORS middleware configured: allow all origins, methods, headers")
+# Compress large bodies for clients that accept it; streams are left alone
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=settings.gzip_minimum_size)
+# Outermost, so latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
 logger.log("API router included at path /api/v1")
@@ -46,16 +64,61 @@ async def root():
     return {"message": "CodeTune backend running"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, queue, task and upstream metrics."""
+    return Response(await metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.on_event("startup")
 async def startup_event():
+    await clients.startup()
+    logger.log("Shared outbound clients created")
+    try:
+        await TuningService(db).ensure_indexes()
+        await ModelService(db).ensure_indexes()
+        await MetricsStore(db).ensure_collection()
+        await AnalyticsService(db).ensure_rollups()
+        logger.log("MongoDB indexes ensured")
+    except Exception as e:
+        logger.log(f"Could not create MongoDB indexes: {e}")
+    metrics.add_collector(TuningService(db).collect_queue_metrics)
     logger.log("Executing startup event: launching HealthCheckService continuous_pulse")
     health_service = HealthCheckService()
     asyncio.create_task(health_service.continuous_pulse())
     logger.log("HealthCheckService continuous_pulse task started")
-    # Start TuningWorker
-    worker = TuningWorker(db)
-    asyncio.create_task(worker.run())
-    logger.log("TuningWorker background task started")
+    if settings.embedded_workers:
+        # Start TuningWorker; the ML stack is only imported once a task trains
+        worker = TuningWorker(db)
+        asyncio.create_task(worker.run())
+        logger.log("TuningWorker background task started")
+        batch_worker = BatchInferenceWorker(db)
+        asyncio.create_task(batch_worker.run())
+        logger.log("BatchInferenceWorker background task started")
+    else:
+        logger.log("Embedded workers disabled; run 'python -m app.worker' separately")
+    asyncio.create_task(residency_manager.run(settings.ollama_residency_interval))
+    logger.log("Ollama residency manager started")
+    asyncio.create_task(model_catalog.run())
+    logger.log("HuggingFace catalog refresher started")
+    asyncio.create_task(model_registry.run())
+    logger.log("Local model registry scanner started")
+    asyncio.create_task(settings_store.watch())
+    logger.log("Settings file watcher started")
+    logger.log(f"Startup complete in {mark_started():.2f}s")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    residency_manager.stop()
+    model_catalog.stop()
+    model_registry.stop()
+    settings_store.stop()
+    await transfer_manager.close()
+    await progress_broker.close()
+    await clients.shutdown()
+    logger.log("Shared outbound clients closed")
+    log_pipeline.stop()
 
 
 # --- Global exception handlers to ensure CORS headers on all errors ---
@@ -64,6 +127,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     response = JSONResponse(
         status_code=exc.status_code,
         content={"error": {"message": exc.detail, "type": "HTTPException"}},
+        headers=exc.headers,
     )
     response.headers["Access-Control-Allow-Origin"] = "*"
     response.headers["Access-Control-Allow-Headers"] = "*"
@@ -91,15 +155,29 @@ async def websocket_endpoint(
 ):
     logger.log(f"WebSocket connection request: clientId={clientId}")
     await websocket.accept()
+    session = WebSocketChatSession(
+        websocket, client_id=clientId or getattr(websocket.client, "host", "anonymous")
+    )
+    progress = ProgressSession(session.send, TuningService(db).progress_snapshot)
     try:
         logger.log(f"WebSocket connected: clientId={clientId}")
         while True:
             try:
                 data = await websocket.receive_text()
-                logger.log(f"WebSocket received from {clientId}: {data}")
-                # --- Place for custom message handling logic ---
-                # For now, just echo the message back
-                await websocket.send_text(f"Echo: {data}")
+                try:
+                    message = json.loads(data)
+                except ValueError:
+                    message = None
+                if isinstance(message, dict) and message.get("type") in (
+                    "subscribe",
+                    "unsubscribe",
+                ):
+                    await progress.handle(message)
+                elif isinstance(message, dict) and "type" in message:
+                    await session.handle(message)
+                else:
+                    # Plain text messages are still echoed back
+                    await websocket.send_text(f"Echo: {data}")
             except WebSocketDisconnect:
                 logger.log(f"WebSocket disconnected: clientId={clientId}")
                 break  # Exit the loop cleanly on disconnect
@@ -118,3 +196,7 @@ async def websocket_endpoint(
             await websocket.close(code=1011)
         except RuntimeError:
             pass  # Already closed
+    finally:
+        # Cancel any in-flight generations and subscriptions for this connection
+        await session.close()
+        await progress.close()
@@ -1,6 +1,7 @@
 from .tuning import Tuning, TuningCreate, TuningProgress, PyObjectId
 from .model import SavedModel, SavedModelCreate
 from .dataset import DatasetInfo
+from .benchmark import Benchmark, BenchmarkCreate, BenchmarkTarget
 
 __all__ = [
     "Tuning",
@@ -9,5 +10,8 @@ __all__ = [
     "SavedModel",
     "SavedModelCreate",
     "DatasetInfo",
+    "Benchmark",
+    "BenchmarkCreate",
+    "BenchmarkTarget",
     "PyObjectId",
 ]
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from .base import DBModelMixin
+
+
+class BenchmarkTarget(BaseModel):
+    model: str
+    provider: str = "ollama"  # "ollama" or "assistant" (OpenAI)
+    saved_model_id: str | None = None
+
+
+class BenchmarkCreate(BaseModel):
+    prompts: list[str] = Field(..., min_length=1)
+    targets: list[BenchmarkTarget] = Field(..., min_length=1)
+    system: str | None = None
+    concurrency: int = Field(default=4, ge=1, le=64)
+
+
+class Benchmark(DBModelMixin):
+    prompts: list[str]
+    targets: list[BenchmarkTarget]
+    concurrency: int
+    results: list[dict] = []
+    summary: list[dict] = []
+    wall_seconds: float | None = None
@@ -7,6 +7,7 @@ class SavedModelCreate(BaseModel):
     dataset_id: str | None = None
     parameters: dict | None = None
     result: dict | None = None
+    evaluation: dict | None = None
 
 
 class SavedModel(DBModelMixin):
@@ -14,5 +15,8 @@ class SavedModel(DBModelMixin):
     dataset_id: str | None = None
     parameters: dict | None = None
     result: dict | None = None
+    evaluation: dict | None = None  # Held-out perplexity for base vs fine-tuned
+    benchmark: dict | None = None  # Latest comparison row from /benchmark
     local_path: str | None = None  # Add this field for save location
+    artifact: dict | None = None  # Artifact store ref and dedup byte counts
     hf_repo_id: str | None = None
@@ -8,9 +8,21 @@ class TuningCreate(BaseModel):
     parameters: dict
 
 
+class BatchInferenceCreate(BaseModel):
+    dataset_id: str
+    model: str
+    concurrency: int = Field(default=4, ge=1, le=64)
+    max_retries: int = Field(default=3, ge=0)
+    options: dict | None = None
+    system: str | None = None
+    prompt_field: str = "prompt"
+    output_path: str | None = None
+
+
 class Tuning(DBModelMixin):
     dataset_id: str
     parameters: dict
+    job_type: str = "tuning"  # "tuning" or "batch_inference"
     status: str = "queued"
     progress: float = 0.0
     result: dict | None = None
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)."""
+
+    # Surfaced to HTTP clients as 429, and retried as such by retry_async
+    status_code = 429
+
+    def __init__(self, model: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Model {model} is busy: {reason}")
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ModelAdmission:
+    """Bounded concurrency and a fair wait queue for a single model.
+
+    Up to ``max_concurrency`` requests run at once. Waiters are grouped by
+    client and served round-robin across clients, so one client flooding the
+    queue cannot starve the others.
+    """
+
+    def __init__(self, model: str, max_concurrency: int, max_queue: int, timeout: float):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        # client id -> FIFO of waiter futures; ordering drives the round-robin
+        self._waiters: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self.stats = {
+            "admitted": 0,
+            "rejected_full": 0,
+            "rejected_timeout": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def _record_wait(self, waited: float) -> None:
+        self.stats["wait_seconds_total"] += waited
+        self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+    async def acquire(self, client_id: str) -> None:
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self.stats["admitted"] += 1
+            self._record_wait(0.0)
+            return
+        if self.queued >= self.max_queue:
+            self.stats["rejected_full"] += 1
+            raise AdmissionRejected(self.model, "queue full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client_id, deque()).append(future)
+        self.queued += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted at the last moment; keep the slot
+                self.stats["admitted"] += 1
+                self._record_wait(time.perf_counter() - start)
+                return
+            future.cancel()
+            self._remove(client_id, future)
+            self.stats["rejected_timeout"] += 1
+            raise AdmissionRejected(self.model, "queue wait timed out")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+                self._remove(client_id, future)
+            raise
+        self.stats["admitted"] += 1
+        self._record_wait(time.perf_counter() - start)
+
+    def _remove(self, client_id: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(client_id)
+        if queue and future in queue:
+            queue.remove(future)
+            self.queued -= 1
+            if not queue:
+                del self._waiters[client_id]
+
+    def release(self) -> None:
+        """Free a slot and hand it to the next client in round-robin order."""
+        while self._waiters:
+            client_id, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            self.queued -= 1
+            # Rotate this client to the back so others go next
+            del self._waiters[client_id]
+            if queue:
+                self._waiters[client_id] = queue
+            if not future.done():
+                # The slot transfers directly to the waiter; active is unchanged
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def snapshot(self) -> dict:
+        admitted = self.stats["admitted"]
+        return {
+            "model": self.model,
+            "active": self.active,
+            "queued": self.queued,
+            "waiting_clients": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            **self.stats,
+            "wait_seconds_avg": (
+                self.stats["wait_seconds_total"] / admitted if admitted else 0.0
+            ),
+        }
+
+
+class AdmissionController:
+    """Per-model admission control in front of Ollama inference."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        max_queue: int = 32,
+        timeout: float = 30.0,
+        overrides: dict[str, int] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.overrides = overrides or {}
+        self._models: dict[str, ModelAdmission] = {}
+
+    def for_model(self, model: str) -> ModelAdmission:
+        if model not in self._models:
+            self._models[model] = ModelAdmission(
+                model,
+                self.overrides.get(model, self.max_concurrency),
+                self.max_queue,
+                self.timeout,
+            )
+        return self._models[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str, client_id: str = "anonymous"):
+        admission = self.for_model(model)
+        await admission.acquire(client_id)
+        try:
+            yield
+        finally:
+            admission.release()
+
+    def snapshot(self) -> dict:
+        models = [m.snapshot() for m in self._models.values()]
+        return {
+            "models": models,
+            "active": sum(m["active"] for m in models),
+            "queued": sum(m["queued"] for m in models),
+        }
+
+
+# Singleton controller shared by all Ollama chat paths
+admission_controller = AdmissionController(
+    max_concurrency=settings.ollama_max_concurrency,
+    max_queue=settings.ollama_max_queue,
+    timeout=settings.ollama_queue_timeout,
+)
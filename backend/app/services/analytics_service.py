@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+TOTALS_ID = "totals"
+TERMINAL_STATUSES = ("completed", "failed")
+# Log-scale duration histogram: bucket i holds durations in [2**(i-1), 2**i) seconds
+HISTOGRAM_BUCKETS = 24
+
+REBUILD_GATE_ID = "rebuild"
+# Writers re-check the rebuild gate at most this often. A rebuild waits longer
+# than that (plus time for a write) before scanning, so no task write can
+# slip in unseen between the scan and the swap.
+GATE_CHECK_SECONDS = 0.5
+REBUILD_GRACE_SECONDS = 2.0
+# A gate left behind by a crashed rebuild stops blocking writers after this
+REBUILD_LEASE_SECONDS = 600
+
+
+class RebuildInProgress(Exception):
+    """Another rebuild holds the write gate."""
+
+
+def _bucket(seconds: float) -> int:
+    if seconds < 1:
+        return 0
+    return min(HISTOGRAM_BUCKETS - 1, int(math.log2(seconds)) + 1)
+
+
+def _day_id(moment: datetime) -> str:
+    return f"day:{moment.date().isoformat()}"
+
+
+def percentiles(histogram: dict, quantiles=(0.5, 0.95, 0.99)) -> dict:
+    """Approximate percentiles (upper bucket bound, in seconds) from a histogram."""
+    counts = [int(histogram.get(str(i), 0)) for i in range(HISTOGRAM_BUCKETS)]
+    total = sum(counts)
+    result = {"count": total}
+    for q in quantiles:
+        key = f"p{int(q * 100)}"
+        if not total:
+            result[key] = None
+            continue
+        target, seen = q * total, 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                result[key] = float(2**i) if i else 1.0
+                break
+    return result
+
+
+def _merge(target: dict, source: dict) -> None:
+    for key, value in (source or {}).items():
+        target[key] = target.get(key, 0) + value
+
+
+class AnalyticsService:
+    """Task analytics kept as rollups updated on every state change.
+
+    ``task_analytics`` holds one ``totals`` document (current count per
+    status and the running progress sum) and one document per day with
+    created/completed/failed counts and log-scale histograms of queue wait,
+    per-stage and total durations. Reads touch at most one document per day
+    of the requested window, independent of the number of tasks.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.tasks = db["tuning_tasks"]
+        self.collection = db["task_analytics"]
+        self.gates = db["task_analytics_gates"]
+        self.grace_seconds = REBUILD_GRACE_SECONDS
+        self._gate_checked_at = float("-inf")
+
+    async def wait_until_writable(self) -> None:
+        """Wait while a rebuild is running. Call before changing a task.
+
+        Task writes, and the rollup updates that follow them, are held back
+        for the length of a rebuild, so none lands on the collection that the
+        rebuild is about to replace.
+        """
+        while time.monotonic() - self._gate_checked_at > GATE_CHECK_SECONDS:
+            gate = await self.gates.find_one(
+                {"_id": REBUILD_GATE_ID, "until": {"$gt": datetime.utcnow()}}
+            )
+            if gate is None:
+                self._gate_checked_at = time.monotonic()
+                return
+            await asyncio.sleep(GATE_CHECK_SECONDS)
+
+    async def record_created(self, created_at: datetime) -> None:
+        await self.collection.update_one(
+            {"_id": TOTALS_ID},
+            {"$inc": {"total_tasks": 1, "status.queued": 1}},
+            upsert=True,
+        )
+        await self.collection.update_one(
+            {"_id": _day_id(created_at)},
+            {"$inc": {"created": 1}, "$setOnInsert": {"date": created_at.date().isoformat()}},
+            upsert=True,
+        )
+
+    async def record_update(
+        self, before: dict, status: str, progress: float, now: datetime
+    ) -> None:
+        """Fold one task update into the rollups.
+
+        ``before`` is the task as it was prior to the update (status,
+        progress, created_at, status_changed_at).
+        """
+        old_status = before.get("status") or "queued"
+        totals_inc = {"progress_sum": progress - float(before.get("progress") or 0.0)}
+        if old_status != status:
+            totals_inc[f"status.{old_status}"] = -1
+            totals_inc[f"status.{status}"] = 1
+        await self.collection.update_one(
+            {"_id": TOTALS_ID}, {"$inc": totals_inc}, upsert=True
+        )
+        if old_status == status:
+            return
+
+        entered = before.get("status_changed_at") or before.get("created_at") or now
+        day_inc = {f"stage.{old_status}.{_bucket((now - entered).total_seconds())}": 1}
+        if old_status == "queued":
+            wait = (now - (before.get("created_at") or now)).total_seconds()
+            day_inc[f"queue_wait.{_bucket(wait)}"] = 1
+        if status in TERMINAL_STATUSES and old_status not in TERMINAL_STATUSES:
+            day_inc[status] = 1
+            started = before.get("created_at") or now
+            day_inc[f"total_duration.{_bucket((now - started).total_seconds())}"] = 1
+        await self.collection.update_one(
+            {"_id": _day_id(now)},
+            {"$inc": day_inc, "$setOnInsert": {"date": now.date().isoformat()}},
+            upsert=True,
+        )
+
+    async def summary(self, window_days: int | None = None) -> dict:
+        totals = await self.collection.find_one({"_id": TOTALS_ID}) or {}
+        # Only per-day documents carry ``date``; served from the date index
+        query: dict = {"date": {"$exists": True}}
+        if window_days:
+            since = (datetime.utcnow() - timedelta(days=window_days - 1)).date()
+            query["date"] = {"$gte": since.isoformat()}
+        days = await self.collection.find(query).sort("date", 1).to_list(length=None)
+
+        queue_wait: dict = {}
+        total_duration: dict = {}
+        stages: dict[str, dict] = {}
+        created = completed = failed = 0
+        for day in days:
+            created += day.get("created", 0)
+            completed += day.get("completed", 0)
+            failed += day.get("failed", 0)
+            _merge(queue_wait, day.get("queue_wait"))
+            _merge(total_duration, day.get("total_duration"))
+            for stage, histogram in (day.get("stage") or {}).items():
+                _merge(stages.setdefault(stage, {}), histogram)
+
+        total_tasks = totals.get("total_tasks", 0)
+        finished = completed + failed
+        return {
+            "total_tasks": total_tasks,
+            "average_progress": (
+                totals.get("progress_sum", 0.0) / total_tasks if total_tasks else 0
+            ),
+            "status_counts": {k: v for k, v in (totals.get("status") or {}).items() if v},
+            "window_days": window_days,
+            "created": created,
+            "completed": completed,
+            "failed": failed,
+            "success_rate": completed / finished if finished else None,
+            "queue_wait_seconds": percentiles(queue_wait),
+            "total_duration_seconds": percentiles(total_duration),
+            "stage_duration_seconds": {
+                stage: percentiles(histogram) for stage, histogram in stages.items()
+            },
+            "throughput_per_day": [
+                {
+                    "date": day["date"],
+                    "created": day.get("created", 0),
+                    "completed": day.get("completed", 0),
+                    "failed": day.get("failed", 0),
+                }
+                for day in days
+            ],
+        }
+
+    async def rebuild(self) -> dict:
+        """Recompute the rollups from ``tuning_tasks`` with one scan.
+
+        Used once when no rollup exists yet. Duration histograms cannot be
+        reconstructed from the documents, so they start empty. The rollups are
+        built in a scratch collection and renamed over the live one, so
+        readers never see them half-written. Task writes are held at the gate
+        (see :meth:`wait_until_writable`) until the swap is done, then land on
+        the new rollups. Raises :class:`RebuildInProgress` if another rebuild
+        holds the gate.
+        """
+        now = datetime.utcnow()
+        until = now + timedelta(seconds=REBUILD_LEASE_SECONDS)
+        try:
+            await self.gates.insert_one({"_id": REBUILD_GATE_ID, "until": until})
+        except DuplicateKeyError:
+            # Take over a gate left behind by a rebuild that died
+            taken = await self.gates.update_one(
+                {"_id": REBUILD_GATE_ID, "until": {"$lte": now}},
+                {"$set": {"until": until}},
+            )
+            if not taken.modified_count:
+                raise RebuildInProgress("Task analytics are already being rebuilt")
+        try:
+            # Let writes that passed the gate before it closed finish first
+            await asyncio.sleep(self.grace_seconds)
+            return await self._rebuild_rollups()
+        finally:
+            await self.gates.delete_one({"_id": REBUILD_GATE_ID})
+
+    async def _rebuild_rollups(self) -> dict:
+        scratch = self.collection.database[f"{self.collection.name}_rebuild"]
+        await scratch.drop()
+        totals: dict = {"_id": TOTALS_ID, "total_tasks": 0, "progress_sum": 0.0, "status": {}}
+        days: dict[str, dict] = {}
+        cursor = self.tasks.find(
+            {}, {"status": 1, "progress": 1, "created_at": 1, "updated_at": 1}
+        )
+        async for doc in cursor:
+            status = doc.get("status", "queued")
+            totals["total_tasks"] += 1
+            totals["progress_sum"] += float(doc.get("progress") or 0.0)
+            totals["status"][status] = totals["status"].get(status, 0) + 1
+            created_at = doc.get("created_at")
+            if created_at:
+                day = days.setdefault(
+                    _day_id(created_at),
+                    {"_id": _day_id(created_at), "date": created_at.date().isoformat()},
+                )
+                day["created"] = day.get("created", 0) + 1
+            finished_at = doc.get("updated_at")
+            if status in TERMINAL_STATUSES and finished_at:
+                day = days.setdefault(
+                    _day_id(finished_at),
+                    {"_id": _day_id(finished_at), "date": finished_at.date().isoformat()},
+                )
+                day[status] = day.get(status, 0) + 1
+        await scratch.insert_one(totals)
+        if days:
+            await scratch.insert_many(list(days.values()))
+        await scratch.create_index("date")
+        await scratch.rename(self.collection.name, dropTarget=True)
+        logger.info(f"Rebuilt task analytics from {totals['total_tasks']} tasks")
+        return {"tasks": totals["total_tasks"], "days": len(days)}
+
+    async def ensure_rollups(self) -> None:
+        await self.collection.create_index("date")
+        if await self.collection.find_one({"_id": TOTALS_ID}) is None:
+            try:
+                await self.rebuild()
+            except RebuildInProgress:
+                logger.info("Task analytics are being rebuilt by another instance")
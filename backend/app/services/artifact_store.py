@@ -0,0 +1,322 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 4 * 1024 * 1024
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write clones (btrfs, XFS)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src: str, dest: str) -> None:
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class ArtifactStore:
+    """Content-addressed store for model files.
+
+    Every file is hashed and kept once under ``blobs/<sha256>``. A manifest
+    (``refs/<ref>.json``) maps relative paths to blob digests, and model
+    directories are materialized from a manifest by hardlink (or reflink /
+    copy). A blob is deleted by ``gc`` once no manifest references it.
+
+    Blobs are always the store's own read-only files (reflinked or copied in),
+    never the caller's inode, so rewriting a source file later cannot change
+    a blob behind its digest. Hashing is skipped for files that are links to
+    a blob or were ingested unchanged before, which is what makes re-saving a
+    directory near-instant.
+    """
+
+    def __init__(
+        self,
+        root: str = "artifacts",
+        link_mode: str = "hardlink",
+        gc_grace_seconds: float = 3600.0,
+    ):
+        self.root = root
+        self.link_mode = link_mode
+        self.gc_grace_seconds = gc_grace_seconds
+        self.blob_dir = os.path.join(root, "blobs")
+        self.ref_dir = os.path.join(root, "refs")
+        self._lock = threading.RLock()
+        self._inodes: dict[str, tuple[str, int, int]] | None = None
+        # Source files already hashed by this process, same shape as ``inodes``
+        self._sources: dict[str, tuple[str, int, int]] = {}
+
+    # -- paths and bookkeeping -------------------------------------------
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def _ref_path(self, ref: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in ref)
+        return os.path.join(self.ref_dir, f"{safe}.json")
+
+    def _ensure_dirs(self) -> None:
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.ref_dir, exist_ok=True)
+
+    @staticmethod
+    def _inode_key(st: os.stat_result) -> str:
+        return f"{st.st_dev}:{st.st_ino}"
+
+    @property
+    def inodes(self) -> dict[str, tuple[str, int, int]]:
+        """``dev:ino`` of every blob mapped to ``(digest, size, mtime_ns)``."""
+        if self._inodes is None:
+            self._inodes = {}
+            if os.path.isdir(self.blob_dir):
+                for dirpath, _, filenames in os.walk(self.blob_dir):
+                    for name in filenames:
+                        st = os.stat(os.path.join(dirpath, name))
+                        self._inodes[self._inode_key(st)] = (
+                            name,
+                            st.st_size,
+                            st.st_mtime_ns,
+                        )
+        return self._inodes
+
+    # -- ingest ------------------------------------------------------------
+
+    def _store_file(self, path: str, dedupe: bool) -> tuple[str, int, bool]:
+        """Add ``path`` to the store; returns ``(digest, size, newly_stored)``."""
+        st = os.stat(path)
+        key = self._inode_key(st)
+        known = self.inodes.get(key) or self._sources.get(key)
+        # A link to a blob, or a file hashed before, needs no hashing unless
+        # it was modified in place since
+        if known and known[1:] == (st.st_size, st.st_mtime_ns):
+            if os.path.exists(self.blob_path(known[0])):
+                return known[0], st.st_size, False
+        digest = _hash_file(path)
+        self._sources[key] = (digest, st.st_size, st.st_mtime_ns)
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            if dedupe:
+                self._replace_with_clone(blob, path)
+            return digest, st.st_size, False
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp = f"{blob}.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            _reflink(path, tmp)
+        except OSError:
+            shutil.copyfile(path, tmp)
+        # Blobs are shared by every ref, so guard against in-place writes
+        os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(tmp, blob)
+        blob_st = os.stat(blob)
+        self.inodes[self._inode_key(blob_st)] = (
+            digest,
+            blob_st.st_size,
+            blob_st.st_mtime_ns,
+        )
+        return digest, st.st_size, True
+
+    def _replace_with_clone(self, blob: str, path: str) -> None:
+        """Swap a duplicate source file for a copy-on-write clone of the blob.
+
+        A clone shares the blob's blocks but not its inode, so the source
+        stays independently writable. A hardlink would let a later write to
+        the source change the blob.
+        """
+        tmp = f"{path}.dedupe"
+        try:
+            _reflink(blob, tmp)
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+            os.replace(tmp, path)
+        except OSError:
+            # No reflink support: keep the duplicate rather than fail
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def ingest(self, source_dir: str, ref: str, dedupe: bool = True) -> dict:
+        """Store every file under ``source_dir`` and record it as ``ref``.
+
+        With ``dedupe`` the source files that duplicate an existing blob are
+        replaced by reflinks to it where the filesystem supports them,
+        reclaiming their space immediately.
+        """
+        with self._lock:
+            self._ensure_dirs()
+            files: dict[str, dict] = {}
+            new_bytes = 0
+            for dirpath, dirnames, filenames in os.walk(source_dir):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for name in filenames:
+                    if name.endswith((".part", ".tmp", ".dedupe")):
+                        continue
+                    full = os.path.join(dirpath, name)
+                    if os.path.islink(full):
+                        continue
+                    rel = os.path.relpath(full, source_dir).replace(os.sep, "/")
+                    digest, size, new = self._store_file(full, dedupe)
+                    files[rel] = {"digest": digest, "size": size}
+                    new_bytes += size if new else 0
+            manifest = {
+                "ref": ref,
+                "source": os.path.abspath(source_dir),
+                "created_at": time.time(),
+                "files": files,
+                "bytes": sum(f["size"] for f in files.values()),
+                "new_bytes": new_bytes,
+            }
+            self._write_manifest(ref, manifest)
+            return manifest
+
+    def _write_manifest(self, ref: str, manifest: dict) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.ref_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._ref_path(ref))
+
+    def get_manifest(self, ref: str) -> dict | None:
+        path = self._ref_path(ref)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def copy_ref(self, ref: str, new_ref: str) -> dict:
+        """Record another reference to the same content without touching files."""
+        manifest = self.get_manifest(ref)
+        if manifest is None:
+            raise KeyError(f"Unknown artifact ref {ref}")
+        manifest = {**manifest, "ref": new_ref, "created_at": time.time(), "new_bytes": 0}
+        with self._lock:
+            self._ensure_dirs()
+            self._write_manifest(new_ref, manifest)
+        return manifest
+
+    def delete_ref(self, ref: str) -> bool:
+        path = self._ref_path(ref)
+        with self._lock:
+            if os.path.exists(path):
+                os.remove(path)
+                return True
+        return False
+
+    # -- materialize -------------------------------------------------------
+
+    def _place(self, blob: str, dest: str) -> None:
+        tmp = f"{dest}.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        modes = {"reflink": ("reflink", "copy"), "copy": ("copy",)}.get(
+            self.link_mode, ("hardlink", "reflink", "copy")
+        )
+        for mode in modes:
+            try:
+                if mode == "hardlink":
+                    os.link(blob, tmp)
+                elif mode == "reflink":
+                    _reflink(blob, tmp)
+                else:
+                    shutil.copyfile(blob, tmp)
+                break
+            except OSError:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        else:
+            raise OSError(f"Could not materialize {dest}")
+        os.replace(tmp, dest)
+
+    def materialize(self, ref: str, dest_dir: str) -> str:
+        """Recreate the directory recorded as ``ref`` at ``dest_dir``."""
+        manifest = self.get_manifest(ref)
+        if manifest is None:
+            raise KeyError(f"Unknown artifact ref {ref}")
+        for rel, entry in manifest["files"].items():
+            dest = os.path.join(dest_dir, *rel.split("/"))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            blob = self.blob_path(entry["digest"])
+            if os.path.exists(dest) and os.path.samefile(dest, blob):
+                continue
+            self._place(blob, dest)
+        return dest_dir
+
+    # -- maintenance -------------------------------------------------------
+
+    def _referenced(self) -> set[str]:
+        digests: set[str] = set()
+        if not os.path.isdir(self.ref_dir):
+            return digests
+        for name in os.listdir(self.ref_dir):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.ref_dir, name), "r") as f:
+                digests.update(e["digest"] for e in json.load(f)["files"].values())
+        return digests
+
+    def gc(self) -> dict:
+        """Delete blobs no manifest references (older than the grace period)."""
+        with self._lock:
+            referenced = self._referenced()
+            removed = freed = 0
+            cutoff = time.time() - self.gc_grace_seconds
+            if os.path.isdir(self.blob_dir):
+                for dirpath, _, filenames in os.walk(self.blob_dir):
+                    for name in filenames:
+                        if name in referenced:
+                            continue
+                        path = os.path.join(dirpath, name)
+                        st = os.stat(path)
+                        if st.st_mtime > cutoff:
+                            continue  # May belong to an ingest in progress
+                        os.remove(path)
+                        self.inodes.pop(self._inode_key(st), None)
+                        removed += 1
+                        # Space only comes back once no materialized copy links it
+                        if st.st_nlink == 1:
+                            freed += st.st_size
+            return {"removed_blobs": removed, "freed_bytes": freed}
+
+    def stats(self) -> dict:
+        blobs = stored = 0
+        if os.path.isdir(self.blob_dir):
+            for dirpath, _, filenames in os.walk(self.blob_dir):
+                for name in filenames:
+                    blobs += 1
+                    stored += os.path.getsize(os.path.join(dirpath, name))
+        refs = logical = 0
+        if os.path.isdir(self.ref_dir):
+            for name in os.listdir(self.ref_dir):
+                if name.endswith(".json"):
+                    with open(os.path.join(self.ref_dir, name), "r") as f:
+                        logical += json.load(f)["bytes"]
+                    refs += 1
+        return {
+            "root": self.root,
+            "refs": refs,
+            "blobs": blobs,
+            "stored_bytes": stored,
+            "logical_bytes": logical,
+            "dedup_ratio": round(logical / stored, 2) if stored else None,
+        }
+
+
+# Singleton store shared by saved models and the tuning worker
+artifact_store = ArtifactStore(
+    root=settings.artifact_store_dir,
+    link_mode=settings.artifact_link_mode,
+    gc_grace_seconds=settings.artifact_gc_grace_seconds,
+)
@@ -1,21 +1,58 @@
 import logging
-from openai import OpenAI
-from typing import List, Dict, Any
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from typing import List, Dict, Any, AsyncIterator
+from app.core.clients import clients
 from app.core.config import settings
+from app.core.retry import retry_async
+from .response_cache import response_cache
 
 
 logger = logging.getLogger(__name__)
 
+RETRYABLE_ERRORS = (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
 
 class AssistantService:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    def __init__(
+        self,
+        client: AsyncOpenAI | None = None,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+    ):
+        # The shared client keeps one HTTP connection pool for all requests
+        self.client = client or clients.openai
+        self.timeout = timeout if timeout is not None else settings.openai_timeout
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.openai_max_retries
+        )
+
+    async def _create(self, **kwargs):
+        return await retry_async(
+            lambda: self.client.chat.completions.create(
+                timeout=self.timeout, **kwargs
+            ),
+            retries=self.max_retries,
+            retry_on=RETRYABLE_ERRORS,
+        )
 
     async def chat(
         self,
         messages: List[Dict[str, Any]],
         model: str = "o4-mini",
         source: str = "assistant",
+        temperature: float | None = None,
+        seed: int | None = None,
+        cache: bool = False,
     ) -> str:
         """
         Chat with OpenAI using the Chat Completions API.
@@ -24,20 +61,36 @@ class AssistantService:
             messages: List of message dictionaries with 'role' and 'content' keys
             model: OpenAI model to use for completion
             source: 'assistant' or 'model-tester' for logging
+            temperature: Optional sampling temperature (model default if None)
+            seed: Optional sampling seed
+            cache: Serve/store deterministic responses via the response cache
 
         Returns:
             String response from the assistant
         """
+        params = {
+            k: v for k, v in {"temperature": temperature, "seed": seed}.items()
+            if v is not None
+        }
+        if cache:
+            return await response_cache.cached(
+                "openai",
+                model,
+                messages,
+                params,
+                lambda: self.chat(messages, model, source, temperature, seed),
+            )
         logger.debug(
             "Starting chat",
             extra={"model": model, "message_count": len(messages), "source": source},
         )
         try:
-            # Use default temperature for this model (only default supported)
-            response = self.client.chat.completions.create(
+            # Only send sampling params when given (some models only support defaults)
+            response = await self._create(
                 model=model,
                 messages=messages,  # type: ignore
                 max_completion_tokens=1000,
+                **params,
             )
 
             content = response.choices[0].message.content
@@ -55,11 +108,45 @@ class AssistantService:
             )
             raise
 
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = "o4-mini",
+        source: str = "assistant",
+    ) -> AsyncIterator[str]:
+        """Yield response tokens from OpenAI as they arrive.
+
+        Closing the generator (e.g. when the client disconnects) closes the
+        upstream HTTP stream, which cancels generation on the server side.
+        """
+        logger.debug(
+            "Starting chat stream",
+            extra={"model": model, "message_count": len(messages), "source": source},
+        )
+        stream = await self._create(
+            model=model,
+            messages=messages,  # type: ignore
+            max_completion_tokens=1000,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    yield token
+        finally:
+            await stream.close()
+
     async def create_completion(
         self,
         prompt: str,
         model: str = "o4-mini",
         source: str = "assistant",
+        temperature: float | None = None,
+        seed: int | None = None,
+        cache: bool = False,
     ) -> str:
         """
         Create a simple completion from a prompt.
@@ -68,20 +155,36 @@ class AssistantService:
             prompt: The input prompt string
             model: OpenAI model to use
             source: 'assistant' or 'model-tester' for logging
+            temperature: Optional sampling temperature (model default if None)
+            seed: Optional sampling seed
+            cache: Serve/store deterministic responses via the response cache
 
         Returns:
             String response from the model
         """
+        params = {
+            k: v for k, v in {"temperature": temperature, "seed": seed}.items()
+            if v is not None
+        }
+        if cache:
+            return await response_cache.cached(
+                "openai",
+                model,
+                [{"role": "user", "content": prompt}],
+                params,
+                lambda: self.create_completion(prompt, model, source, temperature, seed),
+            )
         logger.debug(
             "Starting completion",
             extra={"model": model, "prompt": prompt, "source": source},
         )
         try:
             # Use default settings; temperature overridden only when supported
-            response = self.client.chat.completions.create(
+            response = await self._create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],  # type: ignore
                 max_completion_tokens=1000,
+                **params,
             )
 
             content = response.choices[0].message.content
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+
+from app.core.retry import is_transient, retry_async
+from app.core.settings_store import settings_store
+from .ollama_service import OllamaService
+from .tuning_service import TuningService, new_worker_id
+
+logger = logging.getLogger("batch_inference_worker")
+
+JOB_TYPE = "batch_inference"
+
+
+def iter_prompts(dataset_path: str, prompt_field: str = "prompt"):
+    """Yield ``(index, messages)`` for each record of a dataset file.
+
+    JSONL records may carry a ``messages`` list or a prompt under
+    ``prompt_field``; any other line is treated as a plain-text prompt.
+    """
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        index = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = None
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+            if isinstance(record, dict) and isinstance(record.get("messages"), list):
+                messages = record["messages"]
+            elif isinstance(record, dict) and prompt_field in record:
+                messages = [{"role": "user", "content": str(record[prompt_field])}]
+            else:
+                messages = [{"role": "user", "content": line}]
+            yield index, messages
+            index += 1
+
+
+def count_prompts(dataset_path: str) -> int:
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def resolve_output_path(output_dir: str, requested: str | None, job_id) -> str:
+    """Return the output file for a job, confined to ``output_dir``.
+
+    ``requested`` is taken relative to ``output_dir``; anything resolving
+    outside it (``..`` segments, absolute paths, symlinks) is rejected with
+    ``ValueError``.
+    """
+    base = os.path.realpath(output_dir)
+    path = os.path.realpath(os.path.join(base, requested or f"batch_{job_id}.jsonl"))
+    if path == base or os.path.commonpath([base, path]) != base:
+        raise ValueError(f"output_path must be a file inside {output_dir}")
+    return path
+
+
+def load_checkpoint(output_path: str) -> set[int]:
+    """Return indices already answered in ``output_path``.
+
+    The output file is the checkpoint: every finished prompt is appended as
+    one JSON line, so a restart skips whatever is already there. Records
+    carrying an ``error`` are not counted, so a resumed job retries them.
+    A trailing partial line from a crash is terminated so new records start
+    cleanly.
+    """
+    done: set[int] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+                if "error" not in record:
+                    done.add(int(record["index"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return done
+
+
+class BatchInferenceWorker:
+    """Run queued batch-inference jobs from the ``tuning_tasks`` collection.
+
+    Jobs share the tuning task collection (``job_type="batch_inference"``) so
+    they are queued, listed and polled through the same progress API.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, poll_interval: float = 2.0):
+        self.db = db
+        self.service = TuningService(db)
+        self.poll_interval = poll_interval
+        self.worker_id = new_worker_id()
+        self._running = False
+
+    async def run(self):
+        self._running = True
+        logger.info("BatchInferenceWorker started.")
+        while self._running:
+            try:
+                await self.process_queued_jobs()
+            except Exception as e:
+                logger.error(f"Batch worker error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stop(self):
+        self._running = False
+
+    async def process_queued_jobs(self):
+        # Running jobs whose lease expired lost their worker; they resume from
+        # the output checkpoint
+        while self._running:
+            doc = await self.service.claim_task(
+                [JOB_TYPE], self.worker_id, reclaim_expired=True
+            )
+            if doc is None:
+                return
+            await self.service.run_leased(
+                doc["_id"], self.worker_id, self.run_job(doc["_id"], doc)
+            )
+
+    async def run_job(self, job_id: ObjectId, doc: dict):
+        params = doc.get("parameters", {})
+        try:
+            model = params.get("model")
+            dataset_path = doc.get("dataset_id")
+            if not (model and dataset_path and os.path.exists(dataset_path)):
+                raise ValueError("Batch inference job needs a model and an existing dataset")
+            concurrency = max(1, int(params.get("concurrency", 4)))
+            max_retries = int(params.get("max_retries", 3))
+            options = params.get("options")
+            prompt_field = params.get("prompt_field", "prompt")
+            system = params.get("system")
+            output_dir = settings_store.get("batch_output_dir", "batch_outputs")
+            output_path = resolve_output_path(
+                output_dir, params.get("output_path"), job_id
+            )
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            total = count_prompts(dataset_path)
+            done = load_checkpoint(output_path)
+            resumed = len(done)
+            if resumed:
+                logger.info(f"Resuming batch job {job_id} at {resumed}/{total}")
+            state = {"completed": resumed, "failed": 0, "new": 0}
+            started = time.perf_counter()
+            service = OllamaService()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+            write_lock = asyncio.Lock()
+
+            def snapshot(status: str) -> dict:
+                elapsed = time.perf_counter() - started
+                return {
+                    "job_type": JOB_TYPE,
+                    "model": model,
+                    "output_path": output_path,
+                    "total": total,
+                    "completed": state["completed"],
+                    "failed": state["failed"],
+                    "resumed_from": resumed,
+                    "elapsed_seconds": round(elapsed, 1),
+                    "prompts_per_second": (
+                        round(state["new"] / elapsed, 3) if elapsed > 0 else None
+                    ),
+                    "status": status,
+                }
+
+            async def report(status: str = "running"):
+                processed = state["completed"] + state["failed"]
+                progress = processed / total if total else 1.0
+                await self.service.update_progress(
+                    job_id, progress, status, result=snapshot(status)
+                )
+
+            async def worker(out):
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        queue.task_done()
+                        return
+                    index, messages = item
+                    if system:
+                        messages = [{"role": "system", "content": system}, *messages]
+                    record = {"index": index, "messages": messages}
+                    try:
+                        record["response"] = await retry_async(
+                            lambda: service.chat(
+                                messages,
+                                model,
+                                options=options,
+                                client_id=f"batch:{job_id}",
+                            ),
+                            retries=max_retries,
+                            retry_if=is_transient,
+                        )
+                    except Exception as e:
+                        # Written for inspection but skipped by load_checkpoint,
+                        # so the prompt is retried when the job is resumed
+                        record["error"] = str(e)
+                        state["failed"] += 1
+                    async with write_lock:
+                        out.write(json.dumps(record) + "\n")
+                        out.flush()
+                        if "error" not in record:
+                            state["completed"] += 1
+                        state["new"] += 1
+                    queue.task_done()
+
+            async def producer():
+                for index, messages in iter_prompts(dataset_path, prompt_field):
+                    if index in done:
+                        continue
+                    await queue.put((index, messages))
+                for _ in range(concurrency):
+                    await queue.put(None)
+
+            async def reporter():
+                while True:
+                    await asyncio.sleep(2.0)
+                    await report()
+
+            await report()
+            with open(output_path, "a", encoding="utf-8") as out:
+                tasks = [asyncio.create_task(worker(out)) for _ in range(concurrency)]
+                tasks.append(asyncio.create_task(producer()))
+                progress_task = asyncio.create_task(reporter())
+                try:
+                    # A failing worker (e.g. a write error) must not leave the
+                    # producer blocked on a full queue, so stop at the first error
+                    finished, _ = await asyncio.wait(
+                        tasks, return_when=asyncio.FIRST_EXCEPTION
+                    )
+                    for task in finished:
+                        if task.exception() is not None:
+                            raise task.exception()
+                finally:
+                    progress_task.cancel()
+                    for task in tasks:
+                        task.cancel()
+                    while not queue.empty():
+                        queue.get_nowait()
+                        queue.task_done()
+
+            await self.service.update_progress(
+                job_id, 1.0, "completed", result=snapshot("completed")
+            )
+            logger.info(f"Completed batch job {job_id}")
+        except Exception as e:
+            logger.error(f"Batch job failed {job_id}: {e}")
+            await self.service.update_progress(
+                job_id, 1.0, "failed", result={"job_type": JOB_TYPE, "error": str(e)}
+            )
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import statistics
+import time
+from datetime import datetime
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ..schemas.benchmark import Benchmark, BenchmarkCreate, BenchmarkTarget
+from .admission import admission_controller
+from .chat_stream import StreamMetrics, measured, open_token_stream
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(results: list[dict]) -> list[dict]:
+    """Aggregate per-prompt results into one comparison row per model."""
+    rows = []
+    keys = list(dict.fromkeys((r["provider"], r["model"]) for r in results))
+    for provider, model in keys:
+        runs = [r for r in results if r["provider"] == provider and r["model"] == model]
+        ok = [r for r in runs if not r.get("error")]
+        ttft = [r["ttft_ms"] for r in ok if r["ttft_ms"] is not None]
+        total = [r["total_ms"] for r in ok]
+        queue = [r.get("queue_ms") or 0.0 for r in ok]
+        tps = [r["tokens_per_second"] for r in ok if r["tokens_per_second"]]
+        rows.append(
+            {
+                "provider": provider,
+                "model": model,
+                "saved_model_id": runs[0].get("saved_model_id"),
+                "runs": len(runs),
+                "errors": len(runs) - len(ok),
+                "queue_ms_mean": statistics.fmean(queue) if queue else None,
+                "ttft_ms_mean": statistics.fmean(ttft) if ttft else None,
+                "ttft_ms_p50": _percentile(ttft, 50),
+                "ttft_ms_p95": _percentile(ttft, 95),
+                "total_ms_mean": statistics.fmean(total) if total else None,
+                "total_ms_p95": _percentile(total, 95),
+                "tokens_per_second_mean": statistics.fmean(tps) if tps else None,
+                "tokens_total": sum(r["tokens"] for r in ok),
+            }
+        )
+    return rows
+
+
+class BenchmarkService:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db["model_benchmarks"]
+        self.models = db["saved_models"]
+
+    async def _run_one(
+        self,
+        target: BenchmarkTarget,
+        index: int,
+        messages: list[dict],
+        sem: asyncio.Semaphore,
+        model_sem: asyncio.Semaphore,
+    ) -> dict:
+        async with sem, model_sem:
+            metrics = StreamMetrics(provider=target.provider, model=target.model)
+            stream = measured(
+                open_token_stream(
+                    target.provider,
+                    messages,
+                    target.model,
+                    "benchmark",
+                    usage=metrics.usage,
+                ),
+                metrics,
+            )
+            parts: list[str] = []
+            error = None
+            try:
+                async for token in stream:
+                    parts.append(token)
+            except Exception as e:
+                logger.warning(
+                    "Benchmark request failed",
+                    extra={"model": target.model, "error": str(e)},
+                )
+                error = str(e)
+            finally:
+                await stream.aclose()
+        return {
+            **metrics.as_dict(),
+            "saved_model_id": target.saved_model_id,
+            "prompt_index": index,
+            "response": "".join(parts),
+            "error": error,
+        }
+
+    async def run(self, data: BenchmarkCreate) -> Benchmark:
+        """Fan every prompt out to every target under a concurrency cap.
+
+        Ollama targets are further capped at the model's admission capacity,
+        so benchmark requests never queue behind each other (or time out) in
+        the admission controller.
+        """
+        sem = asyncio.Semaphore(data.concurrency)
+        model_sems: dict[tuple[str, str], asyncio.Semaphore] = {}
+        jobs = []
+        for target in data.targets:
+            key = (target.provider, target.model)
+            if key not in model_sems:
+                limit = data.concurrency
+                if target.provider == "ollama":
+                    limit = min(
+                        limit, admission_controller.for_model(target.model).max_concurrency
+                    )
+                model_sems[key] = asyncio.Semaphore(limit)
+            for index, prompt in enumerate(data.prompts):
+                messages = [{"role": "user", "content": prompt}]
+                if data.system:
+                    messages.insert(0, {"role": "system", "content": data.system})
+                jobs.append(self._run_one(target, index, messages, sem, model_sems[key]))
+        start = time.perf_counter()
+        results = await asyncio.gather(*jobs)
+        wall = time.perf_counter() - start
+
+        summary = summarize(results)
+        document = data.model_dump()
+        document.update(
+            {
+                "results": results,
+                "summary": summary,
+                "wall_seconds": wall,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        res = await self.collection.insert_one(document)
+        document["_id"] = res.inserted_id
+        await self._attach_to_saved_models(res.inserted_id, summary)
+        return Benchmark(**document)
+
+    async def _attach_to_saved_models(self, benchmark_id: ObjectId, summary: list[dict]):
+        """Store each model's latest benchmark row on its SavedModel record."""
+        for row in summary:
+            model_id = row.get("saved_model_id")
+            if not model_id or not ObjectId.is_valid(model_id):
+                continue
+            await self.models.update_one(
+                {"_id": ObjectId(model_id)},
+                {
+                    "$set": {
+                        "benchmark": {**row, "benchmark_id": str(benchmark_id)},
+                        "updated_at": datetime.utcnow(),
+                    }
+                },
+            )
+
+    async def get_benchmark(self, benchmark_id: ObjectId) -> Benchmark | None:
+        doc = await self.collection.find_one({"_id": benchmark_id})
+        return Benchmark(**doc) if doc else None
+
+    async def list_benchmarks(self, limit: int = 50) -> list[Benchmark]:
+        cursor = (
+            self.collection.find({}, {"results": 0})
+            .sort("created_at", -1)
+            .limit(limit)
+        )
+        return [Benchmark(**doc) async for doc in cursor]
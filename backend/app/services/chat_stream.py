@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import Request, WebSocket
+from fastapi.responses import StreamingResponse
+
+from .admission import AdmissionRejected
+from .assistant_service import AssistantService
+from .context_budget import context_manager, summary_prompt
+from .ollama_service import OllamaService
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("assistant", "ollama")
+
+
+@dataclass
+class StreamMetrics:
+    provider: str
+    model: str
+    started: float = field(default_factory=time.perf_counter)
+    first_token_at: float | None = None
+    finished_at: float | None = None
+    tokens: int = 0
+    # Filled by providers that report it (see OllamaService.stream_chat)
+    usage: dict = field(default_factory=dict)
+
+    def record_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        end = self.finished_at or time.perf_counter()
+        # Latency counts from when the request got an inference slot, so time
+        # spent in the admission queue is reported separately
+        start = self.usage.get("admitted_at") or self.started
+        total = end - start
+        ttft = (self.first_token_at - start) if self.first_token_at else None
+        tokens = self.tokens
+        generation = (end - self.first_token_at) if self.first_token_at else None
+        if self.usage.get("eval_count"):
+            # Stream chunks are not tokens; use the model's own count
+            tokens = self.usage["eval_count"]
+            if self.usage.get("eval_duration"):
+                generation = self.usage["eval_duration"] / 1e9
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "queue_ms": round((start - self.started) * 1000, 1),
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "total_ms": round(total * 1000, 1),
+            "tokens": tokens,
+            "tokens_per_second": (
+                round(tokens / generation, 2) if generation else None
+            ),
+        }
+
+
+def open_token_stream(
+    provider: str,
+    messages: list[dict],
+    model: str,
+    client_id: str = "anonymous",
+    usage: dict | None = None,
+) -> AsyncIterator[str]:
+    """Return the upstream token stream for ``provider``.
+
+    ``usage`` is filled with admission and token counts where the provider
+    reports them (Ollama).
+    """
+    if provider == "assistant":
+        return AssistantService().stream_chat(messages, model=model)
+    if provider == "ollama":
+        return OllamaService().stream_chat(
+            messages, model, client_id=client_id, usage=usage
+        )
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+async def fit_messages(
+    provider: str,
+    messages: list[dict],
+    model: str,
+    client_id: str = "anonymous",
+    budget: int | None = None,
+    strategy: str | None = None,
+) -> tuple[list[dict], dict]:
+    """Trim ``messages`` to the context budget as the REST chat endpoints do."""
+
+    async def summarize(older: list[dict]) -> str:
+        if provider == "assistant":
+            return await AssistantService().chat(summary_prompt(older), model=model)
+        return await OllamaService().chat(
+            summary_prompt(older),
+            model,
+            options={"temperature": 0},
+            cache=True,
+            client_id=client_id,
+        )
+
+    return await context_manager.fit(
+        messages, model, budget=budget, strategy=strategy, summarizer=summarize
+    )
+
+
+async def measured(
+    tokens: AsyncIterator[str], metrics: StreamMetrics
+) -> AsyncIterator[str]:
+    """Pass tokens through while recording time-to-first-token metrics.
+
+    The upstream generator is always closed, so cancelling or abandoning this
+    stream cancels the upstream generation too.
+    """
+    try:
+        async for token in tokens:
+            metrics.record_token()
+            yield token
+    finally:
+        metrics.finish()
+        await tokens.aclose()
+        logger.info("Chat stream finished", extra=metrics.as_dict())
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def sse_response(
+    request: Request,
+    provider: str,
+    messages: list[dict],
+    model: str,
+    client_id: str = "anonymous",
+) -> StreamingResponse:
+    """Stream tokens to the client as Server-Sent Events.
+
+    Emits one ``data`` event per token, then a ``done`` event carrying the
+    stream metrics, or an ``error`` event if the upstream call fails.
+    """
+    metrics = StreamMetrics(provider=provider, model=model)
+
+    async def events():
+        stream = measured(
+            open_token_stream(provider, messages, model, client_id), metrics
+        )
+        try:
+            async for token in stream:
+                if await request.is_disconnected():
+                    logger.info(
+                        "SSE client disconnected, cancelling upstream",
+                        extra={"provider": provider, "model": model},
+                    )
+                    break
+                yield sse_event({"token": token})
+            else:
+                yield sse_event(metrics.as_dict(), event="done")
+        except AdmissionRejected as e:
+            yield sse_event(
+                {"message": str(e), "status": 429, "retry_after": e.retry_after},
+                event="error",
+            )
+        except Exception as e:
+            logger.error("Chat stream error", exc_info=True, extra={"model": model})
+            yield sse_event({"message": str(e)}, event="error")
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class WebSocketChatSession:
+    """Run streaming chats over a WebSocket connection.
+
+    Clients send ``{"type": "chat", "id": ..., "provider": ..., "model": ...,
+    "messages": [...]}`` (optionally with ``context_budget`` and
+    ``context_strategy``) and receive ``token`` messages followed by a ``done``
+    message with stream metrics and the context report.
+    ``{"type": "cancel", "id": ...}`` stops a running chat; disconnecting cancels every chat started by the connection.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        stream_factory: Callable[..., AsyncIterator[str]] = open_token_stream,
+        client_id: str = "anonymous",
+        context_fitter: Callable[..., Awaitable[tuple]] = fit_messages,
+    ):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.stream_factory = stream_factory
+        self.context_fitter = context_fitter
+        self.tasks: dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, payload: dict) -> None:
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    async def handle(self, message: dict) -> None:
+        kind = message.get("type")
+        request_id = str(message.get("id", ""))
+        if kind == "cancel":
+            task = self.tasks.pop(request_id, None)
+            if task:
+                task.cancel()
+            return
+        if kind != "chat":
+            await self.send({"type": "error", "id": request_id, "message": "Unknown type"})
+            return
+        provider = message.get("provider", "ollama")
+        if provider not in PROVIDERS or not message.get("model"):
+            await self.send(
+                {"type": "error", "id": request_id, "message": "Invalid chat request"}
+            )
+            return
+        task = asyncio.create_task(self._run(request_id, provider, message))
+        self.tasks[request_id] = task
+        task.add_done_callback(
+            lambda t: self.tasks.pop(request_id, None)
+            if self.tasks.get(request_id) is t
+            else None
+        )
+
+    async def _run(self, request_id: str, provider: str, message: dict) -> None:
+        model = message["model"]
+        metrics = StreamMetrics(provider=provider, model=model)
+        stream = None
+        try:
+            messages, context = await self.context_fitter(
+                provider,
+                message.get("messages", []),
+                model,
+                self.client_id,
+                budget=message.get("context_budget"),
+                strategy=message.get("context_strategy"),
+            )
+            stream = measured(
+                self.stream_factory(provider, messages, model, self.client_id), metrics
+            )
+            async for token in stream:
+                await self.send({"type": "token", "id": request_id, "token": token})
+            done = {"type": "done", "id": request_id, **metrics.as_dict()}
+            await self.send({**done, "context": context})
+        except asyncio.CancelledError:
+            raise
+        except AdmissionRejected as e:
+            await self.send(
+                {
+                    "type": "error",
+                    "id": request_id,
+                    "message": str(e),
+                    "status": 429,
+                    "retry_after": e.retry_after,
+                }
+            )
+        except Exception as e:
+            logger.error("WebSocket chat error", exc_info=True, extra={"model": model})
+            try:
+                await self.send({"type": "error", "id": request_id, "message": str(e)})
+            except Exception:
+                pass
+        finally:
+            if stream is not None:
+                await stream.aclose()
+
+    async def close(self) -> None:
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+
+try:  # Optional: exact token counts for OpenAI models
+    import tiktoken
+except ImportError:  # pragma: no cover - falls back to a character heuristic
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing tokens (role markers etc.) used by chat templates
+MESSAGE_OVERHEAD = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+Summarizer = Callable[[list[dict]], Awaitable[str]]
+
+
+class TokenCounter:
+    """Count tokens per model, using tiktoken when it knows the model."""
+
+    def __init__(self):
+        self._encoders: dict[str, object | None] = {}
+
+    def _encoder(self, model: str):
+        if model not in self._encoders:
+            encoder = None
+            if tiktoken is not None:
+                try:
+                    encoder = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoder = None
+            self._encoders[model] = encoder
+        return self._encoders[model]
+
+    def count_text(self, text: str, model: str) -> int:
+        encoder = self._encoder(model)
+        if encoder is not None:
+            return len(encoder.encode(text))
+        # Roughly four characters per token for English text and code
+        return max(1, len(text) // 4) if text else 0
+
+    def count_message(self, message: dict, model: str) -> int:
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        return MESSAGE_OVERHEAD + self.count_text(content, model)
+
+    def count(self, messages: list[dict], model: str) -> int:
+        return sum(self.count_message(m, model) for m in messages)
+
+
+def _without(messages: list[dict], dropped: set[int], summary: str | None) -> list[dict]:
+    """``messages`` minus the positions in ``dropped``, otherwise in order.
+
+    The summary, if any, takes the place of the first dropped message.
+    """
+    result = []
+    for i, message in enumerate(messages):
+        if i not in dropped:
+            result.append(message)
+        elif summary is not None:
+            result.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+            summary = None
+    return result
+
+
+def _prefix_hashes(messages: list[dict], scope: str = "") -> list[str]:
+    """Rolling hash for every prefix, so summaries can be reused incrementally.
+
+    ``scope`` (model and budget) is hashed first, so a summary written for one
+    model or budget is never served to another.
+    """
+    hashes = []
+    digest = hashlib.sha256(scope.encode())
+    for message in messages:
+        digest.update(json.dumps(message, sort_keys=True, default=str).encode())
+        hashes.append(digest.copy().hexdigest())
+    return hashes
+
+
+class ContextManager:
+    """Fit chat histories into a per-model token budget.
+
+    System prompts (in their original positions) and the most recent turns
+    are always kept. Older turns are either dropped (``truncate``) or folded
+    into a running summary (``summarize``). Summaries are cached by model,
+    budget and conversation prefix, so each turn only summarizes the messages
+    that newly fell out of the window.
+    """
+
+    def __init__(
+        self,
+        default_budget: int = 8000,
+        keep_recent: int = 6,
+        strategy: str = "truncate",
+        budgets: dict[str, int] | None = None,
+        max_summaries: int = 512,
+    ):
+        self.default_budget = default_budget
+        self.keep_recent = keep_recent
+        self.strategy = strategy
+        self.budgets = budgets or {}
+        self.counter = TokenCounter()
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+        self.max_summaries = max_summaries
+        self.stats = {"summary_hits": 0, "summary_misses": 0}
+
+    def budget_for(self, model: str) -> int:
+        """Budget for ``model``, falling back from ``name:tag`` to ``name``."""
+        if model in self.budgets:
+            return self.budgets[model]
+        return self.budgets.get(model.split(":", 1)[0], self.default_budget)
+
+    def _remember(self, key: str, summary: str) -> None:
+        self._summaries[key] = summary
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.max_summaries:
+            self._summaries.popitem(last=False)
+
+    async def _summarize(
+        self, older: list[dict], summarizer: Summarizer, scope: str
+    ) -> str:
+        hashes = _prefix_hashes(older, scope)
+        if hashes[-1] in self._summaries:
+            self.stats["summary_hits"] += 1
+            self._summaries.move_to_end(hashes[-1])
+            return self._summaries[hashes[-1]]
+        self.stats["summary_misses"] += 1
+        # Extend the longest already-summarized prefix instead of starting over
+        start, previous = 0, None
+        for i in range(len(hashes) - 2, -1, -1):
+            if hashes[i] in self._summaries:
+                start, previous = i + 1, self._summaries[hashes[i]]
+                break
+        pending = older[start:]
+        if previous:
+            pending = [{"role": "system", "content": SUMMARY_PREFIX + previous}, *pending]
+        summary = await summarizer(pending)
+        self._remember(hashes[-1], summary)
+        return summary
+
+    async def fit(
+        self,
+        messages: list[dict],
+        model: str,
+        budget: int | None = None,
+        strategy: str | None = None,
+        summarizer: Summarizer | None = None,
+    ) -> tuple[list[dict], dict]:
+        """Return ``messages`` trimmed to the budget plus a short report."""
+        budget = budget or self.budget_for(model)
+        strategy = strategy or self.strategy
+        original = self.counter.count(messages, model)
+        info = {
+            "budget": budget,
+            "strategy": strategy,
+            "original_tokens": original,
+            "tokens": original,
+            "dropped_messages": 0,
+            "summarized": False,
+        }
+        if original <= budget:
+            return messages, info
+
+        system = [m for m in messages if m.get("role") == "system"]
+        positions = [i for i, m in enumerate(messages) if m.get("role") != "system"]
+        turns = [messages[i] for i in positions]
+        system_tokens = self.counter.count(system, model)
+        scope = f"{model}\0{budget}"
+        can_summarize = strategy == "summarize" and summarizer is not None
+
+        if can_summarize:
+            reused = self._reuse_summary(messages, positions, model, budget, scope)
+            if reused is not None:
+                result, dropped = reused
+                info.update(
+                    summarized=True,
+                    dropped_messages=dropped,
+                    tokens=self.counter.count(result, model),
+                )
+                self.stats["summary_hits"] += 1
+                return result, info
+            # Leave room for the summary and headroom so the next few turns
+            # fit behind the same summary without summarizing again
+            remaining = int(budget * 0.75) - system_tokens - min(512, budget // 8)
+        else:
+            remaining = budget - system_tokens
+
+        # Walk back from the newest turn; the last ``keep_recent`` turns are
+        # always kept, older ones only while they still fit
+        kept: list[dict] = []
+        for i, message in enumerate(reversed(turns)):
+            cost = self.counter.count_message(message, model)
+            if i >= self.keep_recent and cost > remaining:
+                break
+            kept.insert(0, message)
+            remaining -= cost
+        older = turns[: len(turns) - len(kept)]
+
+        summary = None
+        if older and can_summarize:
+            try:
+                summary = await self._summarize(older, summarizer, scope)
+                info["summarized"] = True
+            except Exception:
+                logger.warning("Context summarization failed, truncating", exc_info=True)
+        result = _without(messages, set(positions[: len(older)]), summary)
+        info["dropped_messages"] = len(older)
+        info["tokens"] = self.counter.count(result, model)
+        return result, info
+
+    def _reuse_summary(
+        self,
+        messages: list[dict],
+        positions: list[int],
+        model: str,
+        budget: int,
+        scope: str,
+    ) -> tuple[list[dict], int] | None:
+        """Reuse the most recent cached summary boundary that still fits.
+
+        ``positions`` are the indices of the non-system turns in ``messages``.
+        """
+        hashes = _prefix_hashes([messages[i] for i in positions], scope)
+        for k in range(len(positions) - 1, 0, -1):
+            summary = self._summaries.get(hashes[k - 1])
+            if summary is None:
+                continue
+            result = _without(messages, set(positions[:k]), summary)
+            if self.counter.count(result, model) <= budget:
+                self._summaries.move_to_end(hashes[k - 1])
+                return result, k
+            # Earlier boundaries keep even more verbatim turns, so stop here
+            return None
+        return None
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "cached_summaries": len(self._summaries)}
+
+
+def summary_prompt(messages: list[dict]) -> list[dict]:
+    """Build the chat request used to summarize older turns."""
+    transcript = "\n".join(f"{m.get('role')}: {m.get('content')}" for m in messages)
+    return [
+        {
+            "role": "system",
+            "content": (
+                "Summarize the conversation below in a few sentences. Keep facts, "
+                "decisions, names and open questions; omit pleasantries."
+            ),
+        },
+        {"role": "user", "content": transcript},
+    ]
+
+
+# Singleton context manager shared by the chat endpoints
+context_manager = ContextManager(
+    default_budget=settings.context_budget_tokens,
+    keep_recent=settings.context_keep_recent,
+    strategy=settings.context_strategy,
+    budgets=settings.context_budgets,
+)
@@ -1,20 +1,15 @@
 import os
-import json
 import shutil
 from fastapi import UploadFile
 
+from app.core.settings_store import settings_store
 
-class DatasetService:
-    def __init__(self):
-        self.settings_file = os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json")
-        self.dataset_dir = self._load_dir()
 
-    def _load_dir(self) -> str:
-        if os.path.exists(self.settings_file):
-            with open(self.settings_file, "r") as f:
-                data = json.load(f)
-                return data.get("dataset_dir", "datasets")
-        return "datasets"
+class DatasetService:
+    @property
+    def dataset_dir(self) -> str:
+        # Follows settings changes without re-reading the file
+        return settings_store.get("dataset_dir", "datasets")
 
     def save_dataset(self, file: UploadFile) -> str:
         os.makedirs(self.dataset_dir, exist_ok=True)
@@ -1,35 +1,58 @@
 import os
-from huggingface_hub import HfApi, HfFolder, upload_folder
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from typing import TYPE_CHECKING
+from app.core.clients import clients
+from app.core.metrics import track_upstream
+from app.services.model_transfer import TransferJob, transfer_manager
+
+if TYPE_CHECKING:  # huggingface_hub is only imported once a client is needed
+    from huggingface_hub import HfApi
 
 
 class HFModelIO:
-    def __init__(self, token: str, user: str):
+    def __init__(self, token: str, user: str, api: "HfApi | None" = None):
         self.token = token
         self.user = user
-        self.api = HfApi(token=token)
-        HfFolder.save_token(token)
+        # Shared per-token HfApi; the token is persisted once, not per instance
+        self.api = api or clients.hf_api(token)
 
     def push_model(self, model_dir: str, repo_name: str, private: bool = True):
         repo_id = f"{self.user}/{repo_name}"
         # Create repo if not exists
-        self.api.create_repo(repo_id, private=private, exist_ok=True)
+        with track_upstream("huggingface", "create_repo"):
+            self.api.create_repo(repo_id, private=private, exist_ok=True)
         # Upload all files in model_dir
-        upload_folder(
-            folder_path=model_dir,
-            repo_id=repo_id,
-            token=self.token,
-            commit_message="Upload fine-tuned model from CodeTune",
-        )
+        with track_upstream("huggingface", "upload_folder"):
+            self.api.upload_folder(
+                folder_path=model_dir,
+                repo_id=repo_id,
+                token=self.token,
+                commit_message="Upload fine-tuned model from CodeTune",
+            )
         return repo_id
 
     def download_model(self, repo_id: str, local_dir: str):
-        self.api.snapshot_download(
-            repo_id=repo_id, local_dir=local_dir, token=self.token
-        )
+        with track_upstream("huggingface", "snapshot_download"):
+            self.api.snapshot_download(
+                repo_id=repo_id, local_dir=local_dir, token=self.token
+            )
         return local_dir
 
+    def start_push(
+        self, model_dir: str, repo_name: str, private: bool = True
+    ) -> TransferJob:
+        """Upload ``model_dir`` as a background job with per-file progress."""
+        return transfer_manager.start_upload(
+            model_dir, f"{self.user}/{repo_name}", self.token, private=private
+        )
+
+    def start_download(self, repo_id: str, local_dir: str) -> TransferJob:
+        """Download ``repo_id`` as a resumable, checksum-verified background job."""
+        return transfer_manager.start_download(repo_id, local_dir, self.token)
+
     def load_model(self, local_dir: str):
+        # Deferred so the API process never pays for transformers/torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
         model = AutoModelForCausalLM.from_pretrained(local_dir)
         tokenizer = AutoTokenizer.from_pretrained(local_dir)
         return model, tokenizer
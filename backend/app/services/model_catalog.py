@@ -0,0 +1,223 @@
+import asyncio
+import base64
+import bisect
+import json
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.core.metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+
+SORT_FIELDS = ("downloads", "likes", "id")
+
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+
+
+def _to_item(m) -> dict:
+    """Normalize a ``ModelInfo`` (or fixture dict) into a catalog entry."""
+    get = m.get if isinstance(m, dict) else lambda k, d=None: getattr(m, k, d)
+    last_modified = get("last_modified") or get("lastModified")
+    return {
+        "id": get("id") or get("modelId"),
+        "downloads": get("downloads", 0) or 0,
+        "likes": get("likes", 0) or 0,
+        "task": get("pipeline_tag") or get("task"),
+        "tags": list(get("tags", []) or []),
+        "last_modified": str(last_modified) if last_modified else None,
+    }
+
+
+class ModelCatalog:
+    """Locally cached, indexed view of the HuggingFace model catalog.
+
+    The catalog is loaded from a snapshot on disk at startup, refreshed from
+    the Hub in the background, and queried entirely in memory. If a refresh
+    fails the previous snapshot keeps being served and is flagged as stale.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str = "hf_catalog.json",
+        fixture_path: str | None = None,
+        refresh_interval: float = 3600.0,
+        fetch_limit: int = 1000,
+        token: str | None = None,
+    ):
+        self.snapshot_path = snapshot_path
+        self.fixture_path = fixture_path
+        self.refresh_interval = refresh_interval
+        self.fetch_limit = fetch_limit
+        self.token = token
+        self.refreshed_at: float | None = None
+        self.last_error: str | None = None
+        self._running = False
+        self._refresh_lock = asyncio.Lock()
+        self._set_items([])
+
+    def _set_items(self, items: list[dict]) -> None:
+        """Rebuild the indexes; swapped in one assignment so readers never
+        see a half-built catalog."""
+        by_id = {it["id"]: it for it in items if it.get("id")}
+        by_tag: dict[str, set[str]] = {}
+        by_task: dict[str, set[str]] = {}
+        for model_id, it in by_id.items():
+            for tag in it["tags"]:
+                by_tag.setdefault(tag.lower(), set()).add(model_id)
+            if it["task"]:
+                by_task.setdefault(it["task"].lower(), set()).add(model_id)
+        orders = {}
+        for field in SORT_FIELDS:
+            ordered = sorted(by_id.values(), key=lambda it: self._sort_key(it, field))
+            orders[field] = (ordered, [self._sort_key(it, field) for it in ordered])
+        self._index = {
+            "by_id": by_id,
+            "by_tag": by_tag,
+            "by_task": by_task,
+            "orders": orders,
+        }
+
+    @staticmethod
+    def _sort_key(item: dict, field: str) -> tuple:
+        if field == "id":
+            return (item["id"],)
+        # Descending by the metric, ties broken by id for a stable keyset
+        return (-(item.get(field) or 0), item["id"])
+
+    def load_snapshot(self) -> bool:
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "r") as f:
+                data = json.load(f)
+            self._set_items(data.get("items", []))
+            self.refreshed_at = data.get("refreshed_at")
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load catalog snapshot: {e}")
+            return False
+
+    def _save_snapshot(self, items: list[dict]) -> None:
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"refreshed_at": self.refreshed_at, "items": items}, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def _fetch(self) -> list[dict]:
+        if self.fixture_path:
+            with open(self.fixture_path, "r") as f:
+                return [_to_item(m) for m in json.load(f)]
+        from huggingface_hub import list_models
+
+        with track_upstream("huggingface", "list_models"):
+            models = list_models(
+                filter="text-generation",
+                sort="downloads",
+                direction=-1,
+                limit=self.fetch_limit,
+                token=self.token,
+                full=True,
+            )
+            # list_models pages lazily, so the listing happens here
+            return [_to_item(m) for m in models]
+
+    async def refresh(self) -> bool:
+        """Fetch the catalog from the Hub; keep serving old data on failure."""
+        async with self._refresh_lock:
+            try:
+                items = await asyncio.to_thread(self._fetch)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"HF catalog refresh failed, serving stale data: {e}")
+                return False
+            self._set_items(items)
+            self.refreshed_at = time.time()
+            self.last_error = None
+            try:
+                await asyncio.to_thread(self._save_snapshot, items)
+            except OSError as e:
+                logger.warning(f"Could not persist catalog snapshot: {e}")
+            logger.info(f"HF catalog refreshed with {len(items)} models")
+            return True
+
+    async def run(self) -> None:
+        self._running = True
+        self.load_snapshot()
+        while self._running:
+            age = time.time() - (self.refreshed_at or 0)
+            if age >= self.refresh_interval:
+                await self.refresh()
+            await asyncio.sleep(min(self.refresh_interval, 60.0))
+
+    def stop(self) -> None:
+        self._running = False
+
+    @property
+    def stale(self) -> bool:
+        if self.refreshed_at is None:
+            return True
+        return (
+            self.last_error is not None
+            or time.time() - self.refreshed_at > 2 * self.refresh_interval
+        )
+
+    def query(
+        self,
+        q: str | None = None,
+        tag: str | None = None,
+        task: str | None = None,
+        sort: str = "downloads",
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> dict:
+        """Return one page of matching models using keyset pagination."""
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {SORT_FIELDS}")
+        index = self._index
+        ordered, keys = index["orders"][sort]
+        candidates: set[str] | None = None
+        if tag:
+            candidates = set(index["by_tag"].get(tag.lower(), set()))
+        if task:
+            ids = index["by_task"].get(task.lower(), set())
+            candidates = ids if candidates is None else candidates & ids
+        needle = q.lower() if q else None
+
+        start = bisect.bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+        items: list[dict] = []
+        next_cursor = None
+        for position in range(start, len(ordered)):
+            item = ordered[position]
+            if candidates is not None and item["id"] not in candidates:
+                continue
+            if needle and needle not in item["id"].lower():
+                continue
+            if len(items) == limit:
+                next_cursor = encode_cursor(self._sort_key(items[-1], sort))
+                break
+            items.append(item)
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "total": len(index["by_id"]),
+            "refreshed_at": self.refreshed_at,
+            "stale": self.stale,
+        }
+
+
+# Singleton catalog populated in the background at startup
+model_catalog = ModelCatalog(
+    snapshot_path=settings.hf_catalog_snapshot,
+    fixture_path=settings.hf_catalog_fixture,
+    refresh_interval=settings.hf_catalog_refresh_interval,
+    fetch_limit=settings.hf_catalog_limit,
+    token=settings.huggingface_token,
+)
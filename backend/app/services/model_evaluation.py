@@ -0,0 +1,138 @@
+import math
+import os
+import time
+import logging
+from itertools import chain
+
+import torch
+from torch.utils.data import DataLoader
+from datasets import load_dataset, Dataset
+from transformers import AutoModelForCausalLM, AutoTokenizer, default_data_collator
+
+logger = logging.getLogger(__name__)
+
+EVAL_SPLIT_SEED = 42
+
+
+def split_dataset(dataset_path: str, eval_split: float) -> tuple[Dataset, Dataset | None]:
+    """Load a text dataset and carve out a deterministic held-out split.
+
+    The same seed is used everywhere so training and evaluation always agree on
+    which rows are held out.
+    """
+    dataset = load_dataset("text", data_files=dataset_path)["train"]
+    dataset = dataset.filter(lambda row: bool(row["text"].strip()))
+    if eval_split <= 0 or len(dataset) < 2:
+        return dataset, None
+    split = dataset.train_test_split(test_size=eval_split, seed=EVAL_SPLIT_SEED)
+    return split["train"], split["test"]
+
+
+def pack_dataset(
+    dataset: Dataset, tokenizer, block_size: int, num_proc: int | None = None
+) -> Dataset:
+    """Tokenize and pack rows into contiguous ``block_size`` token blocks."""
+    block_size = min(block_size, tokenizer.model_max_length or block_size)
+
+    def tokenize(batch):
+        return tokenizer(batch["text"])
+
+    def group(batch):
+        concatenated = {k: list(chain(*batch[k])) for k in batch.keys()}
+        total = (len(concatenated["input_ids"]) // block_size) * block_size
+        blocks = {
+            k: [v[i : i + block_size] for i in range(0, total, block_size)]
+            for k, v in concatenated.items()
+        }
+        blocks["labels"] = [ids.copy() for ids in blocks["input_ids"]]
+        return blocks
+
+    tokenized = dataset.map(
+        tokenize, batched=True, num_proc=num_proc, remove_columns=["text"]
+    )
+    return tokenized.map(group, batched=True, num_proc=num_proc)
+
+
+class ModelEvaluator:
+    """Batched, no-grad perplexity evaluation over a packed held-out split."""
+
+    def __init__(
+        self,
+        batch_size: int = 8,
+        block_size: int = 512,
+        num_workers: int | None = None,
+    ):
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.num_workers = (
+            num_workers if num_workers is not None else min(4, os.cpu_count() or 1)
+        )
+
+    def evaluate(self, model_dir: str, eval_dataset: Dataset) -> dict:
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        model = AutoModelForCausalLM.from_pretrained(model_dir)
+        model.eval()
+
+        packed = pack_dataset(
+            eval_dataset,
+            tokenizer,
+            self.block_size,
+            num_proc=self.num_workers if self.num_workers > 1 else None,
+        )
+        if len(packed) == 0:
+            return {"eval_loss": None, "perplexity": None, "eval_blocks": 0}
+        packed.set_format("torch")
+        loader = DataLoader(
+            packed,
+            batch_size=self.batch_size,
+            num_workers=self.num_workers,
+            collate_fn=default_data_collator,
+        )
+
+        total_loss = 0.0
+        total_tokens = 0
+        start = time.perf_counter()
+        with torch.no_grad():
+            for batch in loader:
+                outputs = model(**batch)
+                # Labels are shifted inside the model, so each block scores
+                # one token fewer than its length.
+                tokens = batch["labels"][:, 1:].numel()
+                total_loss += float(outputs.loss) * tokens
+                total_tokens += tokens
+        elapsed = time.perf_counter() - start
+
+        eval_loss = total_loss / total_tokens if total_tokens else None
+        return {
+            "eval_loss": eval_loss,
+            "perplexity": math.exp(eval_loss) if eval_loss is not None else None,
+            "eval_blocks": len(packed),
+            "eval_tokens": total_tokens,
+            "eval_seconds": elapsed,
+            "tokens_per_second": total_tokens / elapsed if elapsed > 0 else None,
+        }
+
+    def compare(self, base_dir: str, finetuned_dir: str, eval_dataset: Dataset) -> dict:
+        """Evaluate the base and fine-tuned checkpoints on the same split."""
+        base = self.evaluate(base_dir, eval_dataset)
+        finetuned = self.evaluate(finetuned_dir, eval_dataset)
+        delta = None
+        if base["perplexity"] is not None and finetuned["perplexity"] is not None:
+            delta = finetuned["perplexity"] - base["perplexity"]
+        logger.info(
+            "Evaluation complete",
+            extra={
+                "base_perplexity": base["perplexity"],
+                "finetuned_perplexity": finetuned["perplexity"],
+            },
+        )
+        return {
+            "base": base,
+            "finetuned": finetuned,
+            "perplexity_delta": delta,
+            "improved": delta is not None and delta < 0,
+            "eval_samples": len(eval_dataset),
+            "batch_size": self.batch_size,
+            "block_size": self.block_size,
+            "num_workers": self.num_workers,
+        }
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+from collections import Counter
+
+from app.core.config import settings
+from app.core.settings_store import settings_store
+
+logger = logging.getLogger(__name__)
+
+GGUF_MAGIC = b"GGUF"
+
+# ``general.file_type`` values written by llama.cpp
+GGUF_FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1",
+    10: "Q2_K", 11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S",
+    15: "Q4_K_M", 16: "Q5_K_S", 17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS",
+    20: "IQ2_XS", 21: "Q2_K_S", 22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S",
+    25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M", 28: "IQ2_S", 29: "IQ2_M",
+    30: "IQ4_XS", 31: "IQ1_M", 32: "BF16",
+}
+
+# ggml tensor types, used when a GGUF has no ``general.file_type``
+GGML_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 6: "Q5_0", 7: "Q5_1", 8: "Q8_0",
+    9: "Q8_1", 10: "Q2_K", 11: "Q3_K", 12: "Q4_K", 13: "Q5_K", 14: "Q6_K",
+    15: "Q8_K", 16: "IQ2_XXS", 17: "IQ2_XS", 18: "IQ3_XXS", 19: "IQ1_S",
+    20: "IQ4_NL", 21: "IQ3_S", 22: "IQ2_S", 23: "IQ4_XS", 24: "I8", 25: "I16",
+    26: "I32", 27: "I64", 28: "F64", 29: "IQ1_M", 30: "BF16",
+}
+
+# GGUF metadata value types: struct format for scalars, None for compound types
+_GGUF_SCALARS = {
+    0: "<B", 1: "<b", 2: "<H", 3: "<h", 4: "<I", 5: "<i", 6: "<f", 7: "<?",
+    10: "<Q", 11: "<q", 12: "<d",
+}
+_GGUF_STRING = 8
+_GGUF_ARRAY = 9
+
+CONTEXT_KEYS = (
+    "max_position_embeddings",
+    "n_positions",
+    "max_sequence_length",
+    "seq_length",
+    "n_ctx",
+)
+
+
+class _Reader:
+    """Minimal little-endian reader over a binary file."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def unpack(self, fmt: str):
+        size = struct.calcsize(fmt)
+        data = self.f.read(size)
+        if len(data) != size:
+            raise ValueError("Unexpected end of file")
+        return struct.unpack(fmt, data)[0]
+
+    def string(self) -> str:
+        length = self.unpack("<Q")
+        return self.f.read(length).decode("utf-8", errors="replace")
+
+    def value(self, vtype: int, keep_arrays: bool):
+        if vtype in _GGUF_SCALARS:
+            return self.unpack(_GGUF_SCALARS[vtype])
+        if vtype == _GGUF_STRING:
+            return self.string()
+        if vtype == _GGUF_ARRAY:
+            item_type = self.unpack("<I")
+            count = self.unpack("<Q")
+            if not keep_arrays and item_type in _GGUF_SCALARS:
+                # Vocab scores and the like: skip without decoding
+                self.f.seek(count * struct.calcsize(_GGUF_SCALARS[item_type]), 1)
+                return None
+            items = [self.value(item_type, keep_arrays) for _ in range(count)]
+            return items if keep_arrays else None
+        raise ValueError(f"Unknown GGUF value type {vtype}")
+
+
+def read_gguf(path: str) -> dict:
+    """Read GGUF metadata and tensor shapes without touching tensor data."""
+    with open(path, "rb") as f:
+        r = _Reader(f)
+        if f.read(4) != GGUF_MAGIC:
+            raise ValueError("Not a GGUF file")
+        version = r.unpack("<I")
+        tensor_count = r.unpack("<Q")
+        kv_count = r.unpack("<Q")
+        metadata = {}
+        for _ in range(kv_count):
+            key = r.string()
+            vtype = r.unpack("<I")
+            value = r.value(vtype, keep_arrays=False)
+            if value is not None:
+                metadata[key] = value
+        params = 0
+        tensor_types: Counter = Counter()
+        for _ in range(tensor_count):
+            r.string()
+            n_dims = r.unpack("<I")
+            count = 1
+            for _ in range(n_dims):
+                count *= r.unpack("<Q")
+            tensor_types[GGML_TYPES.get(r.unpack("<I"), "unknown")] += count
+            r.unpack("<Q")  # data offset
+            params += count
+
+    arch = metadata.get("general.architecture")
+    file_type = metadata.get("general.file_type")
+    if file_type is not None:
+        quantization = GGUF_FILE_TYPES.get(file_type, str(file_type))
+    else:
+        quantization = tensor_types.most_common(1)[0][0] if tensor_types else None
+    return {
+        "format": "gguf",
+        "gguf_version": version,
+        "name": metadata.get("general.name"),
+        "type": metadata.get("general.type", "model"),  # "adapter" for LoRA GGUFs
+        "architecture": arch,
+        "parameters": params,
+        "quantization": quantization,
+        "dtype": tensor_types.most_common(1)[0][0] if tensor_types else None,
+        "context_length": metadata.get(f"{arch}.context_length") if arch else None,
+    }
+
+
+def read_safetensors_header(path: str) -> dict:
+    """Return the JSON header of a ``.safetensors`` file."""
+    with open(path, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        if length > 100 * 1024 * 1024:
+            raise ValueError("Implausible safetensors header size")
+        return json.loads(f.read(length))
+
+
+def read_safetensors_dir(directory: str, shards: list[str]) -> dict:
+    """Summarize a HF-style model directory from its shard headers and config."""
+    params = 0
+    dtypes: Counter = Counter()
+    for shard in shards:
+        header = read_safetensors_header(os.path.join(directory, shard))
+        for name, tensor in header.items():
+            if name == "__metadata__":
+                continue
+            count = 1
+            for dim in tensor["shape"]:
+                count *= dim
+            params += count
+            dtypes[tensor["dtype"]] += count
+
+    config = {}
+    config_path = os.path.join(directory, "config.json")
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            config = json.load(f)
+    architectures = config.get("architectures") or []
+    quant_config = config.get("quantization_config") or {}
+    quantization = quant_config.get("quant_method")
+    if quantization and quant_config.get("bits"):
+        quantization = f"{quantization}-{quant_config['bits']}bit"
+    return {
+        "format": "safetensors",
+        "name": os.path.basename(os.path.normpath(directory)),
+        "architecture": architectures[0] if architectures else config.get("model_type"),
+        "parameters": params,
+        "quantization": quantization,
+        "dtype": dtypes.most_common(1)[0][0] if dtypes else config.get("torch_dtype"),
+        "context_length": next(
+            (config[k] for k in CONTEXT_KEYS if isinstance(config.get(k), int)), None
+        ),
+        "shards": len(shards),
+    }
+
+
+class ModelRegistry:
+    """Index of local model files built from their headers alone.
+
+    Each ``.gguf`` file and each directory of ``.safetensors`` shards becomes
+    one entry. Entries are keyed by path and fingerprinted by the size and
+    mtime of their files, so a rescan only re-reads what changed. The index is
+    persisted to ``index_path`` and survives restarts.
+    """
+
+    def __init__(
+        self,
+        root: str | None = None,
+        index_path: str = "model_registry.json",
+        scan_interval: float = 60.0,
+    ):
+        self._root = root
+        self.index_path = index_path
+        self.scan_interval = scan_interval
+        self.entries: dict[str, dict] = {}
+        self.scanned_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._running = False
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._load()
+        settings_store.subscribe(self._on_settings_change)
+
+    def _on_settings_change(self, new: dict, old: dict) -> None:
+        # Rescan right away when the model directory moves
+        if self._root or new.get("local_model_dir") == old.get("local_model_dir"):
+            return
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    @property
+    def root(self) -> str:
+        return self._root or settings_store.get("local_model_dir", "models")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.scanned_at = data.get("scanned_at")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load model registry index: {e}")
+
+    def _save(self) -> None:
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"scanned_at": self.scanned_at, "entries": self.entries}, f)
+        os.replace(tmp, self.index_path)
+
+    def _discover(self, root: str) -> dict[str, tuple[str, list[str]]]:
+        """Map entry path to ``(kind, files)`` for every model under ``root``."""
+        found: dict[str, tuple[str, list[str]]] = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Skip HF download caches and in-flight transfers
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            shards = sorted(f for f in filenames if f.endswith(".safetensors"))
+            if shards:
+                found[dirpath] = ("safetensors", shards)
+            for name in filenames:
+                if name.endswith(".gguf"):
+                    found[os.path.join(dirpath, name)] = ("gguf", [name])
+        return found
+
+    @staticmethod
+    def _fingerprint(path: str, kind: str, files: list[str]) -> list:
+        base = path if kind == "safetensors" else os.path.dirname(path)
+        extra = ["config.json"] if kind == "safetensors" else []
+        stamp = []
+        for name in files + extra:
+            full = os.path.join(base, name)
+            if os.path.exists(full):
+                st = os.stat(full)
+                stamp.append([name, st.st_size, st.st_mtime_ns])
+        return stamp
+
+    def scan(self) -> dict:
+        """Synchronously bring the index up to date; returns change counts."""
+        root = self.root
+        found = self._discover(root) if os.path.isdir(root) else {}
+        added = updated = failed = 0
+        entries = {}
+        for path, (kind, files) in found.items():
+            fingerprint = self._fingerprint(path, kind, files)
+            previous = self.entries.get(path)
+            if previous and previous.get("fingerprint") == fingerprint:
+                entries[path] = previous
+                continue
+            try:
+                if kind == "gguf":
+                    info = read_gguf(path)
+                else:
+                    info = read_safetensors_dir(path, files)
+            except (OSError, ValueError, KeyError, struct.error) as e:
+                logger.warning(f"Could not index {path}: {e}")
+                failed += 1
+                continue
+            info.update(
+                path=path,
+                size_bytes=sum(size for _, size, _ in fingerprint),
+                fingerprint=fingerprint,
+                indexed_at=time.time(),
+            )
+            entries[path] = info
+            if previous:
+                updated += 1
+            else:
+                added += 1
+        removed = len(set(self.entries) - set(entries))
+        self.entries = entries
+        self.scanned_at = time.time()
+        if added or updated or removed:
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not persist model registry index: {e}")
+        return {
+            "root": root,
+            "models": len(entries),
+            "added": added,
+            "updated": updated,
+            "removed": removed,
+            "failed": failed,
+        }
+
+    async def refresh(self) -> dict:
+        async with self._lock:
+            return await asyncio.to_thread(self.scan)
+
+    async def run(self) -> None:
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while self._running:
+            self._wake.clear()
+            try:
+                result = await self.refresh()
+                if result["added"] or result["updated"] or result["removed"]:
+                    logger.info(f"Model registry updated: {result}")
+            except Exception as e:
+                logger.error(f"Model registry scan failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.scan_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._running = False
+        if self._wake is not None:
+            self._wake.set()
+
+    def query(
+        self,
+        format: str | None = None,
+        architecture: str | None = None,
+        quantization: str | None = None,
+        dtype: str | None = None,
+        min_params: int | None = None,
+        max_params: int | None = None,
+        min_context: int | None = None,
+        max_size_bytes: int | None = None,
+    ) -> list[dict]:
+        """Filter indexed models; string filters are case-insensitive prefixes."""
+
+        def matches(value, wanted) -> bool:
+            return wanted is None or (
+                value is not None and str(value).lower().startswith(wanted.lower())
+            )
+
+        results = []
+        for entry in self.entries.values():
+            params = entry.get("parameters") or 0
+            if not (
+                matches(entry.get("format"), format)
+                and matches(entry.get("architecture"), architecture)
+                and matches(entry.get("quantization"), quantization)
+                and matches(entry.get("dtype"), dtype)
+            ):
+                continue
+            if min_params is not None and params < min_params:
+                continue
+            if max_params is not None and params > max_params:
+                continue
+            if min_context is not None and (entry.get("context_length") or 0) < min_context:
+                continue
+            if max_size_bytes is not None and entry["size_bytes"] > max_size_bytes:
+                continue
+            results.append({k: v for k, v in entry.items() if k != "fingerprint"})
+        return sorted(results, key=lambda e: e["path"])
+
+    def get(self, path: str) -> dict | None:
+        return self.entries.get(path)
+
+
+# Singleton registry kept up to date in the background
+model_registry = ModelRegistry(
+    index_path=settings.model_registry_index,
+    scan_interval=settings.model_registry_scan_interval,
+)
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+
+import ollama
+
+from app.core.clients import clients
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _keep_alive(value: str | int) -> str | int:
+    """Ollama rejects unitless duration strings; send bare numbers as numbers."""
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    return value
+
+
+class ModelResidencyManager:
+    """Keep frequently used Ollama models loaded and evict cold ones.
+
+    A model is hot when it is pinned, or when it is used again within
+    ``hot_window`` seconds of its previous use; hot models are kept loaded
+    with ``hot_keep_alive`` and everything else gets ``cold_keep_alive``.
+    Without a ``memory_budget_mb`` nothing would ever evict hot models, so
+    then only pinned models are kept hot. With a budget, the least recently
+    used unpinned models are unloaded until the loaded set fits again.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb: int = 0,
+        hot_keep_alive: str = "-1m",
+        cold_keep_alive: str = "5m",
+        hot_window: float = 600.0,
+        client: ollama.AsyncClient | None = None,
+    ):
+        self.memory_budget_mb = memory_budget_mb
+        self.hot_keep_alive = _keep_alive(hot_keep_alive)
+        self.cold_keep_alive = _keep_alive(cold_keep_alive)
+        self.hot_window = hot_window
+        self._client = client
+        self.last_used: dict[str, float] = {}
+        self.pinned: set[str] = set()
+        self.loaded: dict[str, dict] = {}
+        self.warmups: dict[str, float] = {}
+        self.unloads = 0
+        self._lock = asyncio.Lock()
+        self._running = False
+
+    @property
+    def client(self) -> ollama.AsyncClient:
+        return self._client or clients.ollama
+
+    def is_hot(self, model: str) -> bool:
+        """Whether the next use of ``model`` should keep it loaded long-term.
+
+        Judged from the previous use, so call it before :meth:`touch`.
+        """
+        if model in self.pinned:
+            return True
+        if not self.memory_budget_mb:
+            return False
+        used = self.last_used.get(model)
+        return used is not None and time.time() - used < self.hot_window
+
+    def keep_alive_for(self, model: str) -> str | int:
+        return self.hot_keep_alive if self.is_hot(model) else self.cold_keep_alive
+
+    def touch(self, model: str) -> None:
+        self.last_used[model] = time.time()
+
+    def use(self, model: str) -> str | int:
+        """Record a request for ``model`` and return the keep-alive to send."""
+        keep_alive = self.keep_alive_for(model)
+        self.touch(model)
+        return keep_alive
+
+    def pin(self, model: str) -> None:
+        self.pinned.add(model)
+
+    def unpin(self, model: str) -> None:
+        self.pinned.discard(model)
+
+    async def warm(self, model: str) -> float:
+        """Load ``model`` ahead of the first chat and return the load time."""
+        keep_alive = self.use(model)
+        start = time.perf_counter()
+        # An empty prompt loads the model without generating anything
+        await self.client.generate(model=model, prompt="", keep_alive=keep_alive)
+        elapsed = time.perf_counter() - start
+        self.warmups[model] = elapsed
+        logger.info("Warmed model", extra={"model": model, "seconds": round(elapsed, 2)})
+        await self.enforce_budget()
+        return elapsed
+
+    async def unload(self, model: str) -> None:
+        await self.client.generate(model=model, prompt="", keep_alive=0)
+        self.loaded.pop(model, None)
+        self.unloads += 1
+        logger.info("Unloaded model", extra={"model": model})
+
+    async def refresh(self) -> dict[str, dict]:
+        """Sync the view of loaded models with ``ollama ps``."""
+        res = await self.client.ps()
+        self.loaded = {
+            m.model: {
+                "size_mb": (m.size or 0) / (1024 * 1024),
+                "vram_mb": (m.size_vram or 0) / (1024 * 1024),
+                "expires_at": m.expires_at.isoformat() if m.expires_at else None,
+            }
+            for m in res.models
+            if m.model
+        }
+        return self.loaded
+
+    async def enforce_budget(self) -> list[str]:
+        """Unload least recently used unpinned models until within budget."""
+        if not self.memory_budget_mb:
+            return []
+        async with self._lock:
+            await self.refresh()
+            total = sum(m["size_mb"] for m in self.loaded.values())
+            evicted: list[str] = []
+            candidates = sorted(
+                (name for name in self.loaded if name not in self.pinned),
+                key=lambda name: self.last_used.get(name, 0.0),
+            )
+            for name in candidates:
+                if total <= self.memory_budget_mb:
+                    break
+                total -= self.loaded[name]["size_mb"]
+                await self.unload(name)
+                evicted.append(name)
+            return evicted
+
+    async def run(self, interval: float = 30.0) -> None:
+        self._running = True
+        while self._running:
+            try:
+                await self.enforce_budget()
+            except Exception as e:
+                logger.error(f"Residency manager error: {e}")
+            await asyncio.sleep(interval)
+
+    def stop(self) -> None:
+        self._running = False
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "memory_budget_mb": self.memory_budget_mb,
+            "loaded_mb": sum(m["size_mb"] for m in self.loaded.values()),
+            "loaded": self.loaded,
+            "pinned": sorted(self.pinned),
+            "hot": sorted(m for m in self.last_used if self.is_hot(m)),
+            "idle_seconds": {m: round(now - t, 1) for m, t in self.last_used.items()},
+            "warmup_seconds": self.warmups,
+            "unloads": self.unloads,
+        }
+
+
+# Singleton residency manager shared by all Ollama callers
+residency_manager = ModelResidencyManager(
+    memory_budget_mb=settings.ollama_memory_budget_mb,
+    hot_keep_alive=settings.ollama_hot_keep_alive,
+    cold_keep_alive=settings.ollama_cold_keep_alive,
+    hot_window=settings.ollama_hot_window,
+)
@@ -1,34 +1,82 @@
+import asyncio
 from datetime import datetime
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo import ReturnDocument
+from pymongo import DESCENDING, IndexModel, ReturnDocument
 import os
-import json
 
+from ..core.settings_store import settings_store
+from ..core.pagination import NEWEST_FIRST, date_filter, encode_cursor, keyset_filter
 from ..schemas.model import SavedModel, SavedModelCreate
+from app.services.artifact_store import artifact_store
 from app.services.hf_model_io import HFModelIO
 
 
+SUMMARY_PROJECTION = {
+    "result.loss_history": 0,
+    "result.training.eval_history": 0,
+}
+
+
+def confine_model_dir(source_dir: str) -> str:
+    """Resolve a training output directory named by a client.
+
+    Ingesting replaces duplicate files with links, so only directories under
+    ``local_model_dir`` (where the tuning worker writes) are accepted;
+    anything resolving outside it raises ``ValueError``.
+    """
+    root = os.path.realpath(settings_store.get("local_model_dir", "models"))
+    path = os.path.realpath(source_dir)
+    if path == root or os.path.commonpath([root, path]) != root:
+        raise ValueError("result.model_dir must be a directory inside local_model_dir")
+    return path
+
+
 class ModelService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db["saved_models"]
-        self.settings_file = os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json")
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(
+            [
+                IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+                IndexModel("name"),
+            ]
+        )
 
     async def save_model(
         self, data: SavedModelCreate, model_dir: str, push_to_hf: bool = False
     ) -> SavedModel:
         document = data.model_dump()
+        if document.get("evaluation") is None and document.get("result"):
+            document["evaluation"] = document["result"].get("evaluation")
         document.update(
-            {"created_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+            {
+                "_id": ObjectId(),
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
         )
-        # Save model locally
-        local_path = self.save_model_locally(model_dir, document)
+        source_dir = (document.get("result") or {}).get("model_dir")
+        if source_dir:
+            source_dir = confine_model_dir(source_dir)
+        if source_dir and os.path.isdir(source_dir):
+            # Real training output: store it deduplicated and link it into place
+            manifest = await asyncio.to_thread(
+                self.save_model_artifacts, source_dir, model_dir, document
+            )
+            local_path = manifest["local_path"]
+            document["artifact"] = {
+                k: manifest[k] for k in ("ref", "bytes", "new_bytes")
+            }
+            document["artifact"]["files"] = len(manifest["files"])
+        else:
+            local_path = self.save_model_locally(model_dir, document)
         document["local_path"] = local_path
         # Optionally push to HuggingFace
         if push_to_hf:
-            settings = self._load_settings()
-            hf_token = settings.get("hf_token")
-            hf_user = settings.get("hf_user")
+            hf_token = settings_store.get("hf_token")
+            hf_user = settings_store.get("hf_user")
             if not hf_token or not hf_user:
                 raise ValueError(
                     "HuggingFace token and user/org must be set in settings to push to HuggingFace."
@@ -36,10 +84,18 @@ class ModelService:
             hf = HFModelIO(str(hf_token), str(hf_user))
             repo_id = hf.push_model(local_path, document["name"])
             document["hf_repo_id"] = repo_id
-        res = await self.collection.insert_one(document)
-        document["_id"] = res.inserted_id
+        await self.collection.insert_one(document)
         return SavedModel(**document)
 
+    def save_model_artifacts(self, source_dir: str, model_dir: str, document: dict) -> dict:
+        """Ingest ``source_dir`` into the artifact store and materialize it
+        under ``model_dir``; unchanged files are linked, not copied."""
+        ref = f"saved_{document['_id']}"
+        manifest = artifact_store.ingest(source_dir, ref)
+        dest = os.path.join(model_dir, f"{document['name'] or document['_id']}")
+        manifest["local_path"] = artifact_store.materialize(ref, dest)
+        return manifest
+
     def save_model_locally(self, model_dir: str, document: dict) -> str:
         # This is a placeholder for actual model saving logic
         # For now, just create a dummy file
@@ -51,15 +107,28 @@ class ModelService:
             f.write(b"FAKE_MODEL_DATA")
         return model_path
 
-    def _load_settings(self):
-        if os.path.exists(self.settings_file):
-            with open(self.settings_file, "r") as f:
-                return json.load(f)
-        return {}
-
-    async def list_models(self, limit: int = 100) -> list[SavedModel]:
-        cursor = self.collection.find().sort("created_at", -1).limit(limit)
-        return [SavedModel(**doc) async for doc in cursor]
+    async def list_models(
+        self,
+        limit: int = 100,
+        cursor: str | None = None,
+        name: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> tuple[list[SavedModel], str | None]:
+        """Return one page of saved model summaries and the next cursor."""
+        query: dict = date_filter(created_after, created_before)
+        if name:
+            query["name"] = name
+        if cursor:
+            query = {"$and": [query, keyset_filter(cursor)]}
+        docs = await (
+            self.collection.find(query, SUMMARY_PROJECTION)
+            .sort(NEWEST_FIRST)
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return [SavedModel(**doc) for doc in docs[:limit]], next_cursor
 
     async def get_model(self, model_id: ObjectId) -> SavedModel | None:
         doc = await self.collection.find_one({"_id": model_id})
@@ -67,6 +136,9 @@ class ModelService:
 
     async def delete_model(self, model_id: ObjectId) -> bool:
         res = await self.collection.delete_one({"_id": model_id})
+        if res.deleted_count:
+            # Blobs are reclaimed by the next artifact GC once unreferenced
+            artifact_store.delete_ref(f"saved_{model_id}")
         return res.deleted_count == 1
 
     async def rename_model(self, model_id: ObjectId, name: str) -> SavedModel | None:
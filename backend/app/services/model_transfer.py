@@ -0,0 +1,477 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from urllib.parse import quote
+
+import httpx
+
+from app.core.clients import InstrumentedTransport, clients
+from app.core.config import settings
+from app.core.metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# Finished jobs stay pollable for an hour; at most this many are kept
+JOB_RETENTION_SECONDS = 3600.0
+MAX_FINISHED_JOBS = 200
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every transfer, usable from async and thread code."""
+
+    def __init__(self, bytes_per_second: float = 0.0):
+        self.rate = bytes_per_second
+        self._allowance = bytes_per_second
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, n: int) -> float:
+        """Take ``n`` bytes from the bucket and return how long to wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(
+                self.rate, self._allowance + (now - self._last) * self.rate
+            )
+            self._last = now
+            self._allowance -= n
+            return max(0.0, -self._allowance / self.rate)
+
+    async def consume(self, n: int) -> None:
+        delay = self._reserve(n)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def consume_blocking(self, n: int) -> None:
+        delay = self._reserve(n)
+        if delay:
+            time.sleep(delay)
+
+
+@dataclass
+class FileProgress:
+    path: str
+    size: int | None = None
+    bytes_done: int = 0
+    expected_sha256: str | None = None
+    expected_blob_sha1: str | None = None
+    sha256: str | None = None
+    status: str = "pending"  # pending, running, skipped, done, failed
+    resumed_from: int = 0
+    error: str | None = None
+
+
+@dataclass
+class TransferJob:
+    kind: str  # "download" or "upload"
+    repo_id: str
+    local_dir: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    files: dict[str, FileProgress] = field(default_factory=dict)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    result: dict = field(default_factory=dict)
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def bytes_total(self) -> int:
+        return sum(f.size or 0 for f in self.files.values())
+
+    @property
+    def bytes_done(self) -> int:
+        return sum(f.bytes_done for f in self.files.values())
+
+    def snapshot(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        transferred = self.bytes_done - sum(
+            f.resumed_from for f in self.files.values()
+        )
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "repo_id": self.repo_id,
+            "local_dir": self.local_dir,
+            "status": self.status,
+            "error": self.error,
+            "bytes_total": self.bytes_total,
+            "bytes_done": self.bytes_done,
+            "progress": self.bytes_done / self.bytes_total if self.bytes_total else 0.0,
+            "bytes_per_second": transferred / elapsed if elapsed > 0 else None,
+            "elapsed_seconds": round(elapsed, 1),
+            "files": [vars(f) for f in self.files.values()],
+            "result": self.result,
+        }
+
+
+def _git_blob_sha1(path: str) -> str:
+    digest = hashlib.sha1(f"blob {os.path.getsize(path)}\0".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sha256_file(path: str, limit: int | None = None) -> "hashlib._Hash":
+    digest = hashlib.sha256()
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest
+
+
+class ThrottledReader(io.BufferedIOBase):
+    """Seekable file wrapper that counts and rate-limits reads during upload.
+
+    A ``BufferedIOBase`` because that is what ``CommitOperationAdd`` accepts
+    as ``path_or_fileobj``.
+    """
+
+    def __init__(self, path: str, progress: FileProgress, limiter: BandwidthLimiter):
+        self._f = open(path, "rb")
+        self.progress = progress
+        self.limiter = limiter
+        self.active = False  # Off while huggingface_hub hashes the file
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        if self.active and data:
+            self.limiter.consume_blocking(len(data))
+            self.progress.bytes_done = min(
+                self.progress.size or 0, self.progress.bytes_done + len(data)
+            )
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+def _hf_operation(path: str) -> str:
+    # Repo ids and file names would make a series per file; keep the verb only
+    if "/resolve/" in path:
+        return "resolve"
+    return "cdn" if not path.startswith("/api/") else "/api/" + path.split("/")[2]
+
+
+class TransferManager:
+    """Background HF downloads/uploads with per-file parallelism.
+
+    Downloads stream each file over HTTP into a ``.part`` file, resuming with
+    a Range request if a partial file exists, then verify the LFS sha256 (or
+    git blob sha1) before moving it into place. A global semaphore caps
+    concurrent file transfers and a shared token bucket caps bandwidth.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        bandwidth_bytes_per_second: float = 0.0,
+        endpoint: str | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.endpoint = (endpoint or "https://huggingface.co").rstrip("/")
+        self.limiter = BandwidthLimiter(bandwidth_bytes_per_second)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http: httpx.AsyncClient | None = None
+        self.jobs: dict[str, TransferJob] = {}
+        # Strong references; the event loop only keeps weak ones to tasks
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                transport=InstrumentedTransport(
+                    "huggingface",
+                    operation=_hf_operation,
+                    limits=httpx.Limits(max_connections=self.max_concurrency * 2),
+                ),
+            )
+        return self._http
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _spawn(self, job: TransferJob, work) -> None:
+        self._prune()
+        self.jobs[job.id] = job
+        task = asyncio.create_task(self._run(job, work))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention window or over the cap."""
+        now = time.time()
+        finished = sorted(
+            (j for j in self.jobs.values() if j.finished_at is not None),
+            key=lambda j: j.finished_at,
+        )
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished_at > JOB_RETENTION_SECONDS:
+                del self.jobs[job.id]
+
+    def get_job(self, job_id: str) -> TransferJob | None:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> list[dict]:
+        return [job.snapshot() for job in self.jobs.values()]
+
+    def start_download(
+        self, repo_id: str, local_dir: str, token: str | None, revision: str = "main"
+    ) -> TransferJob:
+        job = TransferJob(kind="download", repo_id=repo_id, local_dir=local_dir)
+        self._spawn(job, self._download(job, token, revision))
+        return job
+
+    def start_upload(
+        self,
+        local_dir: str,
+        repo_id: str,
+        token: str | None,
+        private: bool = True,
+        commit_message: str = "Upload fine-tuned model from CodeTune",
+    ) -> TransferJob:
+        job = TransferJob(kind="upload", repo_id=repo_id, local_dir=local_dir)
+        self._spawn(job, self._upload(job, token, private, commit_message))
+        return job
+
+    async def wait(self, job: TransferJob) -> TransferJob:
+        await job.done.wait()
+        if job.status == "failed":
+            raise RuntimeError(job.error or "Transfer failed")
+        return job
+
+    async def _run(self, job: TransferJob, work) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            await work
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Transfer {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job.done.set()
+
+    async def _download(self, job: TransferJob, token: str | None, revision: str):
+        api = clients.hf_api(token)
+        with track_upstream("huggingface", "model_info"):
+            info = await asyncio.to_thread(
+                api.model_info, job.repo_id, revision=revision, files_metadata=True
+            )
+        for sibling in info.siblings or []:
+            job.files[sibling.rfilename] = FileProgress(
+                path=sibling.rfilename,
+                size=sibling.size,
+                expected_sha256=sibling.lfs.sha256 if sibling.lfs else None,
+                expected_blob_sha1=None if sibling.lfs else sibling.blob_id,
+            )
+        commit = info.sha or revision
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        await asyncio.gather(
+            *(
+                self._download_file(job, f, commit, headers)
+                for f in job.files.values()
+            )
+        )
+        job.result = {"local_dir": job.local_dir, "revision": commit}
+
+    def _verify(self, progress: FileProgress, path: str, sha256: str | None) -> bool:
+        if progress.expected_sha256:
+            return sha256 == progress.expected_sha256
+        if progress.expected_blob_sha1:
+            return _git_blob_sha1(path) == progress.expected_blob_sha1
+        return True
+
+    async def _download_file(
+        self, job: TransferJob, progress: FileProgress, revision: str, headers: dict
+    ) -> None:
+        dest = os.path.join(job.local_dir, progress.path)
+        part = dest + ".part"
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+
+        if os.path.exists(dest) and os.path.getsize(dest) == progress.size:
+            sha = (await asyncio.to_thread(_sha256_file, dest)).hexdigest()
+            if await asyncio.to_thread(self._verify, progress, dest, sha):
+                progress.sha256 = sha
+                progress.bytes_done = progress.size or 0
+                progress.resumed_from = progress.bytes_done
+                progress.status = "skipped"
+                return
+
+        url = (
+            f"{self.endpoint}/{job.repo_id}/resolve/{quote(revision, safe='')}/"
+            f"{quote(progress.path)}"
+        )
+        async with self._semaphore:
+            progress.status = "running"
+            for attempt in range(2):
+                offset = os.path.getsize(part) if os.path.exists(part) else 0
+                if progress.size is not None and offset > progress.size:
+                    os.remove(part)
+                    offset = 0
+                digest = (
+                    await asyncio.to_thread(_sha256_file, part, offset)
+                    if offset
+                    else hashlib.sha256()
+                )
+                request_headers = dict(headers)
+                if offset:
+                    request_headers["Range"] = f"bytes={offset}-"
+                async with self.http.stream("GET", url, headers=request_headers) as res:
+                    if res.status_code == 416:
+                        pass  # Already complete
+                    else:
+                        res.raise_for_status()
+                        if offset and res.status_code != 206:
+                            # Server ignored the Range header; start over
+                            offset = 0
+                            digest = hashlib.sha256()
+                        progress.resumed_from = offset
+                        progress.bytes_done = offset
+                        with open(part, "ab" if offset else "wb") as out:
+                            async for chunk in res.aiter_bytes(CHUNK_SIZE):
+                                await self.limiter.consume(len(chunk))
+                                out.write(chunk)
+                                digest.update(chunk)
+                                progress.bytes_done += len(chunk)
+                sha = digest.hexdigest()
+                if await asyncio.to_thread(self._verify, progress, part, sha):
+                    os.replace(part, dest)
+                    progress.sha256 = sha
+                    progress.bytes_done = os.path.getsize(dest)
+                    progress.status = "done"
+                    return
+                # Corrupt data: discard the partial file and retry once from zero
+                logger.warning(f"Checksum mismatch for {progress.path}, retrying")
+                os.remove(part)
+            progress.status = "failed"
+            progress.error = "checksum mismatch"
+            raise ValueError(f"Checksum mismatch for {progress.path}")
+
+    async def _upload(
+        self, job: TransferJob, token: str | None, private: bool, message: str
+    ) -> None:
+        from huggingface_hub import CommitOperationAdd
+
+        api = clients.hf_api(token)
+        paths = []
+        for root, _, files in os.walk(job.local_dir):
+            for name in files:
+                full = os.path.join(root, name)
+                rel = os.path.relpath(full, job.local_dir).replace(os.sep, "/")
+                if rel.endswith(".part") or rel.startswith(".git/"):
+                    continue
+                paths.append((full, rel))
+                job.files[rel] = FileProgress(path=rel, size=os.path.getsize(full))
+
+        async def hash_one(full: str, rel: str):
+            async with self._semaphore:
+                job.files[rel].sha256 = (
+                    await asyncio.to_thread(_sha256_file, full)
+                ).hexdigest()
+
+        await asyncio.gather(*(hash_one(full, rel) for full, rel in paths))
+
+        readers = []
+        operations = []
+        for full, rel in paths:
+            reader = ThrottledReader(full, job.files[rel], self.limiter)
+            readers.append(reader)
+            operations.append(CommitOperationAdd(path_in_repo=rel, path_or_fileobj=reader))
+        for reader in readers:
+            reader.seek(0)
+            reader.active = True
+        for f in job.files.values():
+            f.status = "running"
+        try:
+            with track_upstream("huggingface", "create_repo"):
+                await asyncio.to_thread(
+                    api.create_repo, job.repo_id, private=private, exist_ok=True
+                )
+            with track_upstream("huggingface", "create_commit"):
+                await asyncio.to_thread(
+                    api.create_commit,
+                    repo_id=job.repo_id,
+                    operations=operations,
+                    commit_message=message,
+                    num_threads=self.max_concurrency,
+                )
+        finally:
+            for reader in readers:
+                reader.close()
+
+        # Confirm the Hub stored exactly what we hashed
+        with track_upstream("huggingface", "model_info"):
+            info = await asyncio.to_thread(
+                api.model_info, job.repo_id, files_metadata=True
+            )
+        remote = {s.rfilename: s for s in info.siblings or []}
+        mismatched = []
+        for rel, progress in job.files.items():
+            sibling = remote.get(rel)
+            progress.bytes_done = progress.size or 0
+            if sibling is None:
+                mismatched.append(rel)
+                progress.status = "failed"
+            elif sibling.lfs and sibling.lfs.sha256 != progress.sha256:
+                mismatched.append(rel)
+                progress.status = "failed"
+            else:
+                progress.status = "done"
+        if mismatched:
+            raise ValueError(f"Uploaded files failed verification: {mismatched}")
+        job.result = {"repo_id": job.repo_id}
+
+
+# Singleton manager shared by the model endpoints and the tuning worker
+transfer_manager = TransferManager(
+    max_concurrency=settings.hf_transfer_max_concurrency,
+    bandwidth_bytes_per_second=settings.hf_transfer_bandwidth_mbps * 1024 * 1024 / 8,
+    endpoint=settings.hf_endpoint,
+)
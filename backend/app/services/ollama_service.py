@@ -1,13 +1,22 @@
-from typing import List, Dict
+from typing import List, Dict, AsyncIterator
 import ollama
 import logging
+import os
+import time
+from app.core.clients import clients
+from app.services.admission import admission_controller
+from app.services.model_residency import residency_manager
+from app.services.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
+# Prompt template for models built from a bare GGUF (full fine-tunes and bases)
+PROMPT_TEMPLATE = "{{ if .System }}\n{{ .System }}\n{{ end }}\n{{ .Prompt }}"
+
 
 class OllamaService:
-    def __init__(self):
-        self.client = ollama.AsyncClient()
+    def __init__(self, client: ollama.AsyncClient | None = None):
+        self.client = client or clients.ollama
 
     async def list_models(self) -> List[str]:
         res = await self.client.list()
@@ -17,31 +26,119 @@ class OllamaService:
     async def pull_model(self, model: str) -> None:
         await self.client.pull(model)
 
-    async def create_model(self, name: str, modelfile: str, gguf_path: str | None = None) -> None:
+    async def create_model(
+        self, name: str, modelfile: str, gguf_path: str | None = None, warm: bool = True
+    ) -> None:
         """Create a local Ollama model from a Modelfile or GGUF checkpoint.
 
         If ``gguf_path`` is provided a minimal Modelfile will be written that
         references the GGUF file. Otherwise ``modelfile`` must point to an
-        existing Modelfile on disk.
+        existing Modelfile on disk. With ``warm`` the new model is loaded right
+        away so the first chat does not pay the load time.
         """
         file_path = modelfile
         if gguf_path:
             file_path = modelfile
-            template = (
-                f"FROM {gguf_path}\n" +
-                "TEMPLATE \"""{{ if .System }}\n{{ .System }}\n{{ end }}\n{{ .Prompt }}\""""
-            )
+            template = f"FROM {gguf_path}\n" + f'TEMPLATE """{PROMPT_TEMPLATE}"""'
             with open(file_path, "w") as f:
                 f.write(template)
         await self.client.create(model=name, from_=file_path)
+        # Responses from a previous build of this model are no longer valid
+        await response_cache.invalidate_model(name)
+        if warm:
+            try:
+                await residency_manager.warm(name)
+            except Exception:
+                logger.warning("Model warm-up failed", exc_info=True, extra={"model": name})
+
+    async def has_model(self, name: str) -> bool:
+        try:
+            await self.client.show(name)
+            return True
+        except ollama.ResponseError:
+            return False
+
+    async def ensure_base_model(self, name: str, gguf_path: str) -> str:
+        """Register a shared base GGUF once; later adapters reuse its weights.
+
+        Uses the same prompt template as :meth:`create_model`, so adapter
+        models behave like full fine-tunes of the same base.
+        """
+        if not await self.has_model(name):
+            digest = await self.client.create_blob(gguf_path)
+            await self.client.create(
+                model=name,
+                files={os.path.basename(gguf_path): digest},
+                template=PROMPT_TEMPLATE,
+            )
+            logger.info("Created shared base model", extra={"model": name})
+        return name
+
+    async def create_adapter_model(
+        self,
+        name: str,
+        base_model: str,
+        adapter_path: str,
+        modelfile: str | None = None,
+        warm: bool = True,
+    ) -> None:
+        """Create ``name`` as a LoRA ``adapter_path`` applied to ``base_model``.
+
+        Only the adapter blob is uploaded; the base weights are shared with
+        every other variant built on the same base. A Modelfile with the
+        equivalent ``FROM``/``ADAPTER`` lines is written to ``modelfile``.
+        """
+        if modelfile:
+            with open(modelfile, "w") as f:
+                f.write(f"FROM {base_model}\nADAPTER {adapter_path}\n")
+        digest = await self.client.create_blob(adapter_path)
+        await self.client.create(
+            model=name,
+            from_=base_model,
+            adapters={os.path.basename(adapter_path): digest},
+        )
+        await response_cache.invalidate_model(name)
+        if warm:
+            try:
+                await residency_manager.warm(name)
+            except Exception:
+                logger.warning("Model warm-up failed", exc_info=True, extra={"model": name})
 
-    async def chat(self, messages: List[Dict], model: str) -> str:
+    async def chat(
+        self,
+        messages: List[Dict],
+        model: str,
+        options: Dict | None = None,
+        cache: bool = False,
+        client_id: str = "anonymous",
+    ) -> str:
+        """Chat with a local model.
+
+        Requests pass through the per-model admission controller, which raises
+        :class:`~app.services.admission.AdmissionRejected` when the model's
+        queue is full or the wait times out. Cache hits skip the queue.
+        """
+        if cache:
+            return await response_cache.cached(
+                "ollama",
+                model,
+                messages,
+                options or {},
+                lambda: self.chat(messages, model, options, client_id=client_id),
+            )
         logger.debug(
             "Starting Ollama chat",
             extra={"model": model, "message_count": len(messages)},
         )
         try:
-            res = await self.client.chat(model=model, messages=messages)
+            keep_alive = residency_manager.use(model)
+            async with admission_controller.slot(model, client_id):
+                res = await self.client.chat(
+                    model=model,
+                    messages=messages,
+                    options=options,
+                    keep_alive=keep_alive,
+                )
             content = res.message.content or ""
             logger.debug(
                 "Received Ollama chat response",
@@ -51,3 +148,44 @@ class OllamaService:
         except Exception as e:
             logger.error("Ollama chat error", exc_info=True, extra={"model": model})
             raise
+
+    async def stream_chat(
+        self,
+        messages: List[Dict],
+        model: str,
+        client_id: str = "anonymous",
+        usage: Dict | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield response tokens from Ollama as they arrive.
+
+        Closing the generator closes the underlying HTTP stream so Ollama stops
+        generating for a client that has gone away.
+
+        When ``usage`` is given it receives ``admitted_at`` (``perf_counter``
+        once the admission slot is held) and Ollama's ``eval_count`` and
+        ``eval_duration`` (ns) from the final chunk.
+        """
+        logger.debug(
+            "Starting Ollama chat stream",
+            extra={"model": model, "message_count": len(messages)},
+        )
+        keep_alive = residency_manager.use(model)
+        async with admission_controller.slot(model, client_id):
+            if usage is not None:
+                usage["admitted_at"] = time.perf_counter()
+            stream = await self.client.chat(
+                model=model,
+                messages=messages,
+                stream=True,
+                keep_alive=keep_alive,
+            )
+            try:
+                async for part in stream:
+                    token = part.message.content if part.message else None
+                    if token:
+                        yield token
+                    if usage is not None and part.done:
+                        usage["eval_count"] = part.eval_count
+                        usage["eval_duration"] = part.eval_duration
+            finally:
+                await stream.aclose()
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.retry import backoff_delay
+
+try:  # Optional: cross-node fan-out
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - only the local backend is available
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+QUEUE_TOPIC = "queue"
+
+Deliver = Callable[[str, dict], None]
+
+
+def task_topic(task_id: str) -> str:
+    return f"task:{task_id}"
+
+
+class LocalBackend:
+    """In-process backend: publishing delivers straight to local subscribers.
+
+    Used for single-node deployments and as the stand-in for tests.
+    """
+
+    def __init__(self):
+        self._deliver: Deliver | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, topic: str, message: dict) -> None:
+        if self._deliver:
+            self._deliver(topic, message)
+
+    async def close(self) -> None:
+        self._deliver = None
+
+
+class RedisBackend:
+    """Fan out through Redis pub/sub so every node sees every event."""
+
+    def __init__(self, url: str, channel: str = "codetune:progress"):
+        if aioredis is None:
+            raise RuntimeError("Install 'redis' to use a Redis progress broker")
+        self.url = url
+        self.channel = channel
+        self.node_id = uuid.uuid4().hex
+        self._redis = None
+        self._listener: asyncio.Task | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        self._redis = aioredis.from_url(self.url)
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub) -> None:
+        """Deliver events until cancelled, resubscribing when Redis drops.
+
+        Events published while disconnected are lost; subscribers catch up
+        from the next event (or a fresh snapshot when they resubscribe).
+        """
+        attempt = 0
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._redis.pubsub()
+                    await pubsub.subscribe(self.channel)
+                    logger.info("Progress broker resubscribed to Redis")
+                async for raw in pubsub.listen():
+                    attempt = 0
+                    self._handle(raw)
+                error = "subscription closed"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e)
+            delay = backoff_delay(attempt, base=0.5, cap=30.0)
+            logger.warning(
+                f"Progress broker lost Redis ({error}); retrying in {delay:.1f}s"
+            )
+            attempt += 1
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+                pubsub = None
+            await asyncio.sleep(delay)
+
+    def _handle(self, raw: dict) -> None:
+        if raw.get("type") != "message":
+            return
+        try:
+            envelope = json.loads(raw["data"])
+            topic, message = envelope["topic"], envelope["message"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Dropping malformed progress event: {e!r}")
+            return
+        try:
+            self._deliver(topic, message)
+        except Exception:
+            logger.warning("Progress event delivery failed", exc_info=True)
+
+    async def publish(self, topic: str, message: dict) -> None:
+        envelope = {"node": self.node_id, "topic": topic, "message": message}
+        await self._redis.publish(self.channel, json.dumps(envelope, default=str))
+
+    async def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+class Subscriber:
+    """Per-connection mailbox that conflates events under backpressure.
+
+    Events are keyed by task, and a newer event replaces one the client has
+    not received yet, so a slow consumer always catches up to the latest
+    state without the broker buffering every intermediate update.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.topics: set[str] = set()
+        self.max_pending = max_pending
+        self.pending: OrderedDict[str, dict] = OrderedDict()
+        self.conflated = 0
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def offer(self, message: dict) -> None:
+        key = str(message.get("task_id"))
+        if key in self.pending:
+            self.conflated += 1
+            del self.pending[key]
+        self.pending[key] = message
+        while len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self._ready.set()
+
+    async def get(self) -> dict:
+        while not self.pending:
+            self._ready.clear()
+            await self._ready.wait()
+        _, message = self.pending.popitem(last=False)
+        return message
+
+
+class ProgressBroker:
+    """Fan task progress events out to WebSocket subscribers.
+
+    Topics are ``task:<id>`` for one task and ``queue`` for every task.
+    Events go through the backend first, so with a cross-node backend a
+    client connected to any node sees updates published on any other.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+        self.subscribers: set[Subscriber] = set()
+        self.published = 0
+        self._started = False
+
+    async def start(self) -> None:
+        if not self._started:
+            await self.backend.start(self._deliver)
+            self._started = True
+
+    async def close(self) -> None:
+        await self.backend.close()
+        self._started = False
+
+    def _deliver(self, topic: str, message: dict) -> None:
+        for subscriber in list(self.subscribers):
+            if topic in subscriber.topics or QUEUE_TOPIC in subscriber.topics:
+                subscriber.offer(message)
+
+    async def publish(self, task_id: str, event: dict) -> None:
+        """Publish an event for ``task_id``; never raises into the caller."""
+        message = {"type": "progress", "task_id": task_id, **event}
+        self.published += 1
+        try:
+            await self.start()
+            await self.backend.publish(task_topic(task_id), message)
+        except Exception as e:
+            logger.warning(f"Could not publish progress for {task_id}: {e}")
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "pending": sum(len(s.pending) for s in self.subscribers),
+            "conflated": sum(s.conflated for s in self.subscribers),
+            "dropped": sum(s.dropped for s in self.subscribers),
+        }
+
+
+SnapshotLoader = Callable[[str | None], Awaitable[list[dict]]]
+
+
+class ProgressSession:
+    """Handle progress subscriptions for one WebSocket connection.
+
+    Clients send ``{"type": "subscribe", "task_id": ...}`` or
+    ``{"type": "subscribe", "topic": "queue"}`` (and matching
+    ``unsubscribe``). Each subscription starts with a ``snapshot`` message
+    holding the current state, so reconnecting clients never miss the state
+    they would otherwise have polled for, followed by ``progress`` events.
+
+    Events that arrive while a snapshot is loaded are held back until it has
+    been sent, and those no newer than the snapshot are dropped, so the client
+    never sees the state go backwards.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict], Awaitable[None]],
+        load_snapshot: SnapshotLoader,
+        broker: "ProgressBroker | None" = None,
+    ):
+        self.send = send
+        self.load_snapshot = load_snapshot
+        self.broker = broker or progress_broker
+        self.subscriber: Subscriber | None = None
+        self._pump: asyncio.Task | None = None
+        # Held while a snapshot is loaded and sent; the pump waits on it
+        self._gate = asyncio.Lock()
+        # task_id -> updated_at of the last snapshot sent for it
+        self._snapshot_at: dict[str, datetime] = {}
+
+    async def handle(self, message: dict) -> None:
+        task_id = message.get("task_id")
+        topic = task_topic(str(task_id)) if task_id else message.get("topic")
+        if topic != QUEUE_TOPIC and not task_id:
+            await self.send({"type": "error", "message": "Missing task_id or topic"})
+            return
+        if message.get("type") == "unsubscribe":
+            if self.subscriber:
+                self.subscriber.topics.discard(topic)
+            return
+        async with self._gate:
+            if self.subscriber is None:
+                await self.broker.start()
+                self.subscriber = self.broker.subscribe()
+                self._pump = asyncio.create_task(self._forward())
+            # Subscribe before loading so nothing published meanwhile is missed
+            self.subscriber.topics.add(topic)
+            tasks = await self.load_snapshot(str(task_id) if task_id else None)
+            await self.send({"type": "snapshot", "topic": topic, "tasks": tasks})
+            for task in tasks:
+                updated_at = _parse_time(task.get("updated_at"))
+                if updated_at is not None:
+                    self._snapshot_at[str(task.get("task_id"))] = updated_at
+
+    def _stale(self, message: dict) -> bool:
+        seen = self._snapshot_at.get(str(message.get("task_id")))
+        updated_at = _parse_time(message.get("updated_at"))
+        return seen is not None and updated_at is not None and updated_at <= seen
+
+    async def _forward(self) -> None:
+        while True:
+            message = await self.subscriber.get()
+            async with self._gate:
+                if not self._stale(message):
+                    await self.send(message)
+
+    async def close(self) -> None:
+        if self._pump:
+            self._pump.cancel()
+        if self.subscriber:
+            self.broker.unsubscribe(self.subscriber)
+
+
+def _parse_time(value) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _make_backend():
+    if settings.progress_broker_url:
+        return RedisBackend(settings.progress_broker_url)
+    return LocalBackend()
+
+
+# Singleton broker shared by the workers and the WebSocket endpoint
+progress_broker = ProgressBroker(_make_backend())
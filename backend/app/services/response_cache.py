@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_deterministic(params: dict) -> bool:
+    """Return True when sampling settings make a response reproducible.
+
+    Greedy decoding (``temperature == 0``) or a fixed ``seed`` yield the same
+    output for the same input; anything else is sampled and must not be cached.
+    """
+    temperature = params.get("temperature")
+    if temperature is not None and float(temperature) == 0.0:
+        return True
+    return params.get("seed") is not None
+
+
+def cache_key(provider: str, model: str, messages: list[dict], params: dict) -> str:
+    payload = json.dumps(
+        {"provider": provider, "model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _base_name(model: str) -> str:
+    # Ollama treats "name" and "name:latest" as the same model
+    return model[: -len(":latest")] if model.endswith(":latest") else model
+
+
+class ResponseCache:
+    """LRU + TTL cache for deterministic chat responses.
+
+    Entries live in memory and, when a collection is given, in a persistent
+    Mongo tier that survives restarts. Persistent hits are promoted to memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, collection=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.collection = collection
+        self._indexed = False
+        self._entries: OrderedDict[str, tuple[float, str, str]] = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def _put_memory(self, key: str, model: str, value: str, expires: float) -> None:
+        self._entries[key] = (expires, model, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get(self, key: str) -> str | None:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry:
+            expires, _, value = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return value
+            del self._entries[key]
+        if self.collection is not None:
+            doc = await self.collection.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}
+            )
+            if doc:
+                remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                self._put_memory(key, doc["model"], doc["response"], now + remaining)
+                self.stats["hits"] += 1
+                self.stats["persistent_hits"] += 1
+                return doc["response"]
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, model: str, value: str) -> None:
+        self._put_memory(key, model, value, time.time() + self.ttl)
+        if self.collection is not None:
+            if not self._indexed:
+                # Let Mongo expire persistent entries on its own
+                await self.collection.create_index("expires_at", expireAfterSeconds=0)
+                await self.collection.create_index("model")
+                self._indexed = True
+            await self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "model": model,
+                    "response": value,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl),
+                },
+                upsert=True,
+            )
+
+    async def invalidate_model(self, model: str) -> int:
+        """Drop every cached response produced by ``model``."""
+        base = _base_name(model)
+        stale = [k for k, (_, m, _) in self._entries.items() if _base_name(m) == base]
+        for key in stale:
+            del self._entries[key]
+        removed = len(stale)
+        if self.collection is not None:
+            res = await self.collection.delete_many(
+                {"model": {"$in": [base, f"{base}:latest"]}}
+            )
+            removed += res.deleted_count
+        self.stats["invalidations"] += removed
+        logger.info("Invalidated cached responses", extra={"model": model, "count": removed})
+        return removed
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        if self.collection is not None:
+            await self.collection.delete_many({})
+
+    async def cached(
+        self, provider: str, model: str, messages: list[dict], params: dict, produce
+    ):
+        """Return a cached response or await ``produce()`` and store its result.
+
+        Non-deterministic sampling settings bypass the cache entirely.
+        """
+        if not is_deterministic(params):
+            self.stats["bypassed"] += 1
+            return await produce()
+        key = cache_key(provider, model, messages, params)
+        hit = await self.get(key)
+        if hit is not None:
+            return hit
+        value = await produce()
+        await self.set(key, model, value)
+        return value
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "persistent": self.collection is not None,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+def _build_cache() -> ResponseCache:
+    collection = None
+    if settings.response_cache_persistent:
+        from app.core.database import db
+
+        collection = db["response_cache"]
+    return ResponseCache(
+        max_entries=settings.response_cache_max_entries,
+        ttl=settings.response_cache_ttl,
+        collection=collection,
+    )
+
+
+# Singleton cache shared by the assistant and Ollama services
+response_cache = _build_cache()
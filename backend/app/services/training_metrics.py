@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "training_metrics"
+
+
+def lttb(points: list[tuple[float, float]], threshold: int) -> list[tuple[float, float]]:
+    """Largest-Triangle-Three-Buckets downsampling of ``(x, y)`` points.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with its neighbours, which preserves
+    the visual shape of the curve (spikes included).
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    bucket = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(math.floor(i * bucket)) + 1
+        end = int(math.floor((i + 1) * bucket)) + 1
+        next_start = end
+        next_end = min(int(math.floor((i + 2) * bucket)) + 1, n)
+        if next_start >= next_end:
+            avg_x, avg_y = points[-1]
+        else:
+            span = points[next_start:next_end]
+            avg_x = sum(p[0] for p in span) / len(span)
+            avg_y = sum(p[1] for p in span) / len(span)
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, min(end, n - 1)):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+class MetricsStore:
+    """Per-step training metrics in a MongoDB time-series collection.
+
+    Each point is ``{ts, meta: {task_id, metric}, step, value}``. Servers
+    without time-series support get a regular collection with an equivalent
+    index.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = db[COLLECTION]
+
+    async def ensure_collection(self) -> None:
+        try:
+            await self.db.create_collection(
+                COLLECTION,
+                timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+            )
+        except CollectionInvalid:
+            pass  # Already exists
+        except OperationFailure as e:
+            logger.warning(f"Time-series collections unavailable, using plain collection: {e}")
+        await self.collection.create_index(
+            [("meta.task_id", ASCENDING), ("meta.metric", ASCENDING), ("step", ASCENDING)]
+        )
+
+    async def insert(self, points: list[dict]) -> None:
+        if points:
+            await self.collection.insert_many(points, ordered=False)
+
+    async def metric_names(self, task_id: str) -> list[str]:
+        return sorted(await self.collection.distinct("meta.metric", {"meta.task_id": task_id}))
+
+    async def series(
+        self,
+        task_id: str,
+        metric: str = "loss",
+        start_step: int | None = None,
+        end_step: int | None = None,
+        points: int = 500,
+    ) -> dict:
+        """Return ``metric`` for a step range, downsampled to ``points`` points."""
+        query: dict = {"meta.task_id": task_id, "meta.metric": metric}
+        steps = {}
+        if start_step is not None:
+            steps["$gte"] = start_step
+        if end_step is not None:
+            steps["$lte"] = end_step
+        if steps:
+            query["step"] = steps
+        cursor = self.collection.find(query, {"_id": 0, "step": 1, "value": 1}).sort(
+            "step", ASCENDING
+        )
+        raw = [(doc["step"], doc["value"]) async for doc in cursor]
+        return {
+            "task_id": task_id,
+            "metric": metric,
+            "total": len(raw),
+            "points": [list(p) for p in lttb(raw, points)],
+        }
+
+
+class MetricsBuffer:
+    """Collect metrics from the training thread and flush them in batches.
+
+    ``add`` is called from the Trainer's thread; batches are written on the
+    event loop ``loop`` whenever ``batch_size`` points have accumulated or
+    ``flush_interval`` seconds have passed, so curves are visible mid-run.
+    """
+
+    def __init__(
+        self,
+        store: MetricsStore,
+        task_id: str,
+        loop: asyncio.AbstractEventLoop,
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+    ):
+        self.store = store
+        self.task_id = task_id
+        self.loop = loop
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: list[dict] = []
+        self._futures: list[Future] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, step: int, metrics: dict) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            for name, value in metrics.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                if not math.isfinite(value):
+                    continue
+                self._pending.append(
+                    {
+                        "ts": now,
+                        "meta": {"task_id": self.task_id, "metric": name},
+                        "step": int(step),
+                        "value": float(value),
+                    }
+                )
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if len(self._pending) >= self.batch_size or due:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        batch, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if batch:
+            self._futures.append(
+                asyncio.run_coroutine_threadsafe(self.store.insert(batch), self.loop)
+            )
+            self._futures = [f for f in self._futures if not f.done()]
+
+    async def aclose(self) -> None:
+        """Flush what is left and wait for outstanding writes."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            futures, self._futures = self._futures, []
+        if batch:
+            await self.store.insert(batch)
+        for future in futures:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception as e:
+                logger.warning(f"Metrics batch for {self.task_id} failed: {e}")
@@ -1,28 +1,128 @@
-from datetime import datetime
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
 
+from ..core.config import settings
+from ..core.metrics import QUEUE_DEPTH, QUEUE_OLDEST_AGE, TASK_STAGE_SECONDS, TASKS_FINISHED
+from ..core.pagination import NEWEST_FIRST, date_filter, encode_cursor, keyset_filter
 from ..schemas.tuning import TuningCreate, Tuning, TuningProgress
+from .analytics_service import TERMINAL_STATUSES, AnalyticsService
+from .progress_broker import progress_broker
+
+logger = logging.getLogger(__name__)
+
+# List views never need the per-step curves; those are only on /tuning/{id}
+SUMMARY_PROJECTION = {
+    "result.loss_history": 0,
+    "result.training.eval_history": 0,
+}
+
+
+class LeaseLost(Exception):
+    """Another worker took over a task this worker was running."""
+
+
+def new_worker_id() -> str:
+    """Identify one worker instance in task leases (host, pid, random suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
 
 class TuningService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db["tuning_tasks"]
+        self.analytics = AnalyticsService(db)
 
-    async def create_task(self, data: TuningCreate) -> Tuning:
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(
+            [
+                IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+                IndexModel(
+                    [
+                        ("status", ASCENDING),
+                        ("created_at", DESCENDING),
+                        ("_id", DESCENDING),
+                    ]
+                ),
+                # Worker polling: queued jobs of a type, oldest first
+                IndexModel(
+                    [
+                        ("job_type", ASCENDING),
+                        ("status", ASCENDING),
+                        ("created_at", ASCENDING),
+                    ]
+                ),
+            ]
+        )
+
+    async def create_task(self, data: TuningCreate, job_type: str = "tuning") -> Tuning:
         document = data.model_dump()
         document.update(
             {
+                "job_type": job_type,
                 "status": "queued",
                 "progress": 0.0,
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
             }
         )
+        await self.analytics.wait_until_writable()
         result = await self.collection.insert_one(document)
         document["_id"] = result.inserted_id
+        try:
+            await self.analytics.record_created(document["created_at"])
+        except Exception as e:
+            logger.warning(f"Could not update task analytics: {e}")
+        await progress_broker.publish(
+            str(document["_id"]), self._event(document, stage_changed=True)
+        )
         return Tuning(**document)
 
+    @staticmethod
+    def _event(doc: dict, stage_changed: bool = False, result: dict | None = None) -> dict:
+        updated_at = doc.get("updated_at")
+        event = {
+            "job_type": doc.get("job_type") or "tuning",
+            "status": doc.get("status"),
+            "progress": doc.get("progress", 0.0),
+            "stage_changed": stage_changed,
+            "updated_at": updated_at.isoformat() if updated_at else None,
+        }
+        if result is not None:
+            event["result"] = result
+        return event
+
+    async def progress_snapshot(self, task_id: str | None = None) -> list[dict]:
+        """Current state for WebSocket subscribers: one task, or every active one."""
+        if task_id:
+            if not ObjectId.is_valid(task_id):
+                return []
+            docs = [await self.collection.find_one({"_id": ObjectId(task_id)}, SUMMARY_PROJECTION)]
+        else:
+            docs = await (
+                self.collection.find(
+                    {"status": {"$nin": ["completed", "failed"]}}, SUMMARY_PROJECTION
+                )
+                .sort(NEWEST_FIRST)
+                .to_list(length=500)
+            )
+        return [
+            {"task_id": str(doc["_id"]), **self._event(doc, result=doc.get("result"))}
+            for doc in docs
+            if doc
+        ]
+
+    async def get_updated_at(self, task_id: ObjectId) -> tuple[bool, datetime | None]:
+        """Cheap existence/version check used for conditional requests."""
+        doc = await self.collection.find_one({"_id": task_id}, {"updated_at": 1})
+        return (doc is not None, doc.get("updated_at") if doc else None)
+
     async def get_task(self, task_id: ObjectId) -> Tuning | None:
         doc = await self.collection.find_one({"_id": task_id})
         return Tuning(**doc) if doc else None
@@ -34,16 +134,25 @@ class TuningService:
         status: str,
         result: dict | None = None,
     ) -> TuningProgress:
-        update = {
-            "$set": {
-                "progress": progress,
-                "status": status,
-                "updated_at": datetime.utcnow(),
-            }
-        }
+        await self.analytics.wait_until_writable()
+        now = datetime.utcnow()
+        fields = {"progress": progress, "status": status, "updated_at": now}
         if result is not None:
-            update["$set"]["result"] = result
-        await self.collection.update_one({"_id": task_id}, update)
+            fields["result"] = result
+        before = await self.collection.find_one_and_update(
+            {"_id": task_id},
+            self._status_update(fields, now),
+            projection={
+                "status": 1,
+                "progress": 1,
+                "job_type": 1,
+                "created_at": 1,
+                "status_changed_at": 1,
+            },
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is not None:
+            await self._record_transition(task_id, before, status, progress, now, result)
         doc = await self.collection.find_one({"_id": task_id})
         if not doc:
             raise ValueError(f"Tuning task with id {task_id} not found.")
@@ -55,6 +164,208 @@ class TuningService:
             updated_at=doc.get("updated_at"),
         )
 
-    async def list_tasks(self, limit: int = 100) -> list[Tuning]:
-        cursor = self.collection.find().sort("created_at", -1).limit(limit)
-        return [Tuning(**doc) async for doc in cursor]
+    @staticmethod
+    def _status_update(fields: dict, now: datetime) -> list[dict]:
+        """Pipeline update setting ``fields`` and, in the same write,
+        ``status_changed_at`` when the status actually changes (stage
+        durations are measured from it).
+        """
+        return [
+            {
+                "$set": {
+                    # $literal keeps strings such as "$..." in results verbatim
+                    **{key: {"$literal": value} for key, value in fields.items()},
+                    "status_changed_at": {
+                        "$cond": [
+                            {"$ne": ["$status", {"$literal": fields["status"]}]},
+                            now,
+                            "$status_changed_at",
+                        ]
+                    },
+                }
+            }
+        ]
+
+    async def _record_transition(
+        self,
+        task_id: ObjectId,
+        before: dict,
+        status: str,
+        progress: float,
+        now: datetime,
+        result: dict | None = None,
+    ) -> None:
+        """Metrics, analytics and progress events for an update already written."""
+        if before.get("status") != status:
+            self._observe_stage(before, status, now)
+        try:
+            await self.analytics.record_update(before, status, progress, now)
+        except Exception as e:
+            logger.warning(f"Could not update task analytics: {e}")
+        await progress_broker.publish(
+            str(task_id),
+            self._event(
+                {**before, "status": status, "progress": progress, "updated_at": now},
+                stage_changed=before.get("status") != status,
+                result=result,
+            ),
+        )
+
+    async def claim_task(
+        self,
+        job_types: list[str | None],
+        worker_id: str,
+        reclaim_expired: bool = False,
+    ) -> dict | None:
+        """Atomically claim the oldest queued task of ``job_types`` for a worker.
+
+        The task is switched to ``running`` with ``worker_id`` and a
+        ``lease_until`` in the same write, so two workers never pick up the
+        same task. With ``reclaim_expired`` a ``running`` task whose lease has
+        lapsed (its worker died) is taken over too. Returns the task as it was
+        before the claim, or ``None`` when there is nothing to do.
+        """
+        await self.analytics.wait_until_writable()
+        now = datetime.utcnow()
+        claimable: list[dict] = [{"status": "queued"}]
+        if reclaim_expired:
+            claimable.append({"status": "running", "lease_until": {"$lt": now}})
+            # Tasks started before leases existed carry none
+            claimable.append({"status": "running", "lease_until": None})
+        before = await self.collection.find_one_and_update(
+            {"job_type": {"$in": job_types}, "$or": claimable},
+            self._status_update(
+                {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "lease_until": now + timedelta(seconds=settings.task_lease_seconds),
+                    "updated_at": now,
+                },
+                now,
+            ),
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is not None:
+            await self._record_transition(
+                before["_id"], before, "running", float(before.get("progress") or 0.0), now
+            )
+        return before
+
+    async def hold_lease(self, task_id: ObjectId, worker_id: str) -> None:
+        """Renew ``worker_id``'s lease on a task until cancelled.
+
+        Run as a background task for as long as the worker is busy with the
+        task; renewals happen three times per lease period. Raises
+        :class:`LeaseLost` once the task belongs to another worker.
+        """
+        while True:
+            await asyncio.sleep(settings.task_lease_seconds / 3)
+            try:
+                result = await self.collection.update_one(
+                    {"_id": task_id, "worker_id": worker_id},
+                    {
+                        "$set": {
+                            "lease_until": datetime.utcnow()
+                            + timedelta(seconds=settings.task_lease_seconds)
+                        }
+                    },
+                )
+            except Exception as e:
+                logger.warning(f"Could not renew lease on task {task_id}: {e}")
+                continue
+            if result.matched_count == 0:
+                raise LeaseLost(f"Lease on task {task_id} was taken over by another worker")
+
+    async def run_leased(
+        self, task_id: ObjectId, worker_id: str, job: Awaitable[None]
+    ) -> bool:
+        """Run ``job`` while holding the lease on ``task_id``.
+
+        If the lease is lost the job is cancelled, so two workers never keep
+        processing the same task. Returns ``False`` in that case.
+        """
+        job_task = asyncio.ensure_future(job)
+        lease = asyncio.create_task(self.hold_lease(task_id, worker_id))
+        try:
+            await asyncio.wait({job_task, lease}, return_when=asyncio.FIRST_COMPLETED)
+            if job_task.done():
+                job_task.result()
+                return True
+            logger.warning(f"{lease.exception()}; stopping it on {worker_id}")
+            job_task.cancel()
+            try:
+                await job_task
+            except asyncio.CancelledError:
+                pass
+            return False
+        finally:
+            lease.cancel()
+            job_task.cancel()
+
+    @staticmethod
+    def _observe_stage(before: dict, status: str, now: datetime) -> None:
+        job_type = before.get("job_type") or "tuning"
+        old_status = before.get("status") or "queued"
+        entered = before.get("status_changed_at") or before.get("created_at")
+        if entered is not None:
+            TASK_STAGE_SECONDS.labels(job_type, old_status).observe(
+                (now - entered).total_seconds()
+            )
+        if status in TERMINAL_STATUSES and old_status not in TERMINAL_STATUSES:
+            TASKS_FINISHED.labels(job_type, status).inc()
+
+    async def collect_queue_metrics(self) -> None:
+        """Refresh queue depth/age gauges; registered as a scrape-time collector."""
+        pipeline = [
+            {"$match": {"status": "queued"}},
+            {
+                "$group": {
+                    "_id": {"$ifNull": ["$job_type", "tuning"]},
+                    "depth": {"$sum": 1},
+                    "oldest": {"$min": "$created_at"},
+                }
+            },
+        ]
+        now = datetime.utcnow()
+        seen = set()
+        async for row in self.collection.aggregate(pipeline):
+            seen.add(row["_id"])
+            QUEUE_DEPTH.labels(row["_id"]).set(row["depth"])
+            oldest = row.get("oldest")
+            QUEUE_OLDEST_AGE.labels(row["_id"]).set(
+                (now - oldest).total_seconds() if oldest else 0
+            )
+        # Job types whose queue drained since the last scrape
+        for (job_type,) in QUEUE_DEPTH.series():
+            if job_type not in seen:
+                QUEUE_DEPTH.labels(job_type).set(0)
+                QUEUE_OLDEST_AGE.labels(job_type).set(0)
+
+    async def list_tasks(
+        self,
+        limit: int = 100,
+        cursor: str | None = None,
+        status: list[str] | None = None,
+        job_type: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> tuple[list[Tuning], str | None]:
+        """Return one page of task summaries, newest first, and the next cursor."""
+        query: dict = date_filter(created_after, created_before)
+        if status:
+            query["status"] = {"$in": status}
+        if job_type == "tuning":
+            query["job_type"] = {"$in": [None, "tuning"]}
+        elif job_type:
+            query["job_type"] = job_type
+        if cursor:
+            query = {"$and": [query, keyset_filter(cursor)]}
+        docs = await (
+            self.collection.find(query, SUMMARY_PROJECTION)
+            .sort(NEWEST_FIRST)
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return [Tuning(**doc) for doc in docs[:limit]], next_cursor
@@ -1,42 +1,60 @@
 import asyncio
 import logging
 import os
-import json
+import math
+import shutil
 import subprocess
+import threading
+import time
+from typing import Callable
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from .tuning_service import TuningService
+from app.core.settings_store import settings_store
+from .tuning_service import TuningService, new_worker_id
 from .hf_model_io import HFModelIO
+from .artifact_store import artifact_store
+from .model_registry import model_registry
+from .model_transfer import transfer_manager
 from .ollama_service import OllamaService
+from .training_metrics import MetricsBuffer, MetricsStore, lttb
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
-from datasets import load_dataset
-from transformers import (
-    AutoModelForCausalLM,
-    AutoTokenizer,
-    Trainer,
-    TrainingArguments,
-    DataCollatorForLanguageModeling,
-    TrainerCallback,
-)
+
+# torch, transformers, datasets and peft are imported inside the methods that
+# train or evaluate, so importing this module (as the API does) stays cheap.
 
 logger = logging.getLogger("tuning_worker")
 
+# Points of ``loss_history`` kept on the task document
+HISTORY_PREVIEW_POINTS = 200
+
+
+def best_checkpoint(state) -> dict:
+    """Step and eval loss of the checkpoint ``load_best_model_at_end`` restores."""
+    path = getattr(state, "best_model_checkpoint", None)
+    step = None
+    if path:
+        suffix = os.path.basename(os.path.normpath(path)).rpartition("-")[2]
+        step = int(suffix) if suffix.isdigit() else None
+    metric = getattr(state, "best_metric", None)
+    return {
+        "best_step": step,
+        "best_eval_loss": float(metric) if metric is not None else None,
+    }
+
+
+class TrainingCancelled(Exception):
+    """Raised inside the training thread when its task was cancelled."""
+
 
 class TuningWorker:
     def __init__(self, db: AsyncIOMotorDatabase, poll_interval: float = 2.0):
         self.db = db
         self.service = TuningService(db)
         self.poll_interval = poll_interval
+        self.worker_id = new_worker_id()
         self._running = False
-        self.settings_file = os.environ.get("CODETUNE_SETTINGS_FILE", "settings.json")
         logger.info("TuningWorker initialized (not started)")
 
-    def _load_settings(self) -> dict:
-        if os.path.exists(self.settings_file):
-            with open(self.settings_file, "r") as f:
-                return json.load(f)
-        return {}
-
     def train_model(
         self,
         model_dir: str,
@@ -45,20 +63,88 @@ class TuningWorker:
         epochs: int,
         training_steps: int | None = None,
         learning_rate: float | None = None,
-        progress_cb: callable | None = None,
-    ) -> tuple[float, list[float]]:
-        dataset = load_dataset("text", data_files=dataset_path)
+        progress_cb: Callable | None = None,
+        eval_split: float = 0.0,
+        eval_steps: int = 0,
+        patience: int = 3,
+        min_delta: float = 0.0,
+        eval_batch_size: int = 8,
+        lora: dict | None = None,
+        metrics_cb: Callable | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> tuple[float, list[float], dict]:
+        """Fine-tune the model, optionally evaluating every ``eval_steps`` steps.
+
+        When periodic evaluation is enabled, training stops once validation
+        loss fails to improve by more than ``min_delta`` for ``patience``
+        consecutive evaluations (or becomes non-finite), and the best
+        checkpoint is restored before saving.
+
+        With ``lora`` only a LoRA adapter is trained and ``output_dir`` holds
+        the adapter weights instead of a full merged checkpoint.
+
+        ``metrics_cb(step, logs)`` receives every Trainer log entry (loss,
+        learning rate, eval loss, ...) as it is produced.
+
+        ``should_stop()`` is checked after every step; once it returns true
+        the run is abandoned with :class:`TrainingCancelled`.
+        """
+        from peft import LoraConfig, get_peft_model
+        from transformers import (
+            AutoModelForCausalLM,
+            AutoTokenizer,
+            Trainer,
+            TrainingArguments,
+            DataCollatorForLanguageModeling,
+            TrainerCallback,
+        )
+
+        from .model_evaluation import split_dataset
+
+        train_dataset, eval_dataset = split_dataset(dataset_path, eval_split)
         tokenizer = AutoTokenizer.from_pretrained(model_dir)
         model = AutoModelForCausalLM.from_pretrained(model_dir)
+        if lora is not None:
+            model = get_peft_model(
+                model,
+                LoraConfig(
+                    task_type="CAUSAL_LM",
+                    r=int(lora.get("rank", 8)),
+                    lora_alpha=int(lora.get("alpha", 16)),
+                    lora_dropout=float(lora.get("dropout", 0.05)),
+                    target_modules=lora.get("target_modules") or "all-linear",
+                ),
+            )
 
         def tokenize(batch):
             return tokenizer(batch["text"], truncation=True)
 
-        tokenized = dataset["train"].map(
+        tokenized = train_dataset.map(
             tokenize, batched=True, remove_columns=["text"]
         )
+        periodic_eval = bool(eval_steps and eval_dataset is not None)
+        tokenized_eval = (
+            eval_dataset.map(tokenize, batched=True, remove_columns=["text"])
+            if periodic_eval
+            else None
+        )
 
         data_collator = DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
+        eval_args = (
+            {
+                "eval_strategy": "steps",
+                "eval_steps": eval_steps,
+                "per_device_eval_batch_size": eval_batch_size,
+                "save_strategy": "steps",
+                "save_steps": eval_steps,
+                "save_total_limit": 2,
+                "load_best_model_at_end": True,
+                "metric_for_best_model": "eval_loss",
+                "greater_is_better": False,
+            }
+            if periodic_eval
+            else {"save_strategy": "no"}
+        )
         args = TrainingArguments(
             output_dir=output_dir,
             per_device_train_batch_size=1,
@@ -66,32 +152,70 @@ class TuningWorker:
             max_steps=training_steps if training_steps else -1,
             learning_rate=learning_rate if learning_rate else 5e-5,
             logging_steps=10,
-            save_strategy="no",
+            **eval_args,
         )
 
         loss_history: list[float] = []
+        eval_history: list[dict] = []
+        early_stop = {"stop_reason": "completed"}
 
         class ProgressCallback(TrainerCallback):
+            def on_step_end(self, args, state, control, **kwargs):
+                if should_stop and should_stop():
+                    raise TrainingCancelled(
+                        f"Training stopped at step {state.global_step}"
+                    )
+
             def on_epoch_end(self, args, state, control, **kwargs):
                 if progress_cb and state.epoch is not None:
                     pct = float(state.epoch) / float(epochs)
                     progress_cb(pct)
 
             def on_log(self, args, state, control, logs=None, **kwargs):
+                if logs and metrics_cb:
+                    metrics_cb(state.global_step, logs)
                 if logs and "loss" in logs:
                     try:
                         loss_history.append(float(logs["loss"]))
                     except Exception:
                         pass
 
+        class EarlyStoppingCallback(TrainerCallback):
+            # Only decides when to stop; which checkpoint is best is left to
+            # the Trainer (load_best_model_at_end ignores min_delta)
+            def __init__(self):
+                self.best: float | None = None
+                self.bad_evals = 0
+
+            def on_evaluate(self, args, state, control, metrics=None, **kwargs):
+                if not metrics or "eval_loss" not in metrics:
+                    return
+                value = float(metrics["eval_loss"])
+                eval_history.append({"step": state.global_step, "eval_loss": value})
+                if not math.isfinite(value):
+                    early_stop["stop_reason"] = "diverged"
+                    control.should_training_stop = True
+                    return
+                if self.best is None or self.best - value > min_delta:
+                    self.best = value
+                    self.bad_evals = 0
+                    return
+                self.bad_evals += 1
+                if patience and self.bad_evals >= patience:
+                    early_stop["stop_reason"] = "early_stopping"
+                    control.should_training_stop = True
+
         trainer = Trainer(
             model=model,
             args=args,
             train_dataset=tokenized,
+            eval_dataset=tokenized_eval,
             data_collator=data_collator,
         )
 
         trainer.add_callback(ProgressCallback())
+        if periodic_eval:
+            trainer.add_callback(EarlyStoppingCallback())
 
         trainer.train()
         # Try to extract the final training loss from the Trainer state
@@ -102,14 +226,86 @@ class TuningWorker:
                 break
 
         os.makedirs(output_dir, exist_ok=True)
-        model.save_pretrained(output_dir)
+        # With load_best_model_at_end the trainer already holds the best weights
+        trainer.model.save_pretrained(output_dir)
         tokenizer.save_pretrained(output_dir)
-        return float(loss) if loss is not None else 0.0, loss_history
+        if periodic_eval:
+            for entry in os.listdir(output_dir):
+                if entry.startswith("checkpoint-"):
+                    shutil.rmtree(os.path.join(output_dir, entry), ignore_errors=True)
+
+        training = {
+            "steps": trainer.state.global_step,
+            "eval_steps": eval_steps if periodic_eval else None,
+            "eval_history": eval_history,
+            **early_stop,
+            # The checkpoint the Trainer restored, not our patience baseline
+            **best_checkpoint(trainer.state),
+        }
+        return float(loss) if loss is not None else 0.0, loss_history, training
+
+    def evaluate_model(
+        self,
+        base_dir: str,
+        finetuned_dir: str,
+        dataset_path: str,
+        eval_split: float,
+        batch_size: int = 8,
+        block_size: int = 512,
+        num_workers: int | None = None,
+    ) -> dict | None:
+        """Compare base and fine-tuned perplexity on the held-out split."""
+        from .model_evaluation import ModelEvaluator, split_dataset
+
+        _, eval_dataset = split_dataset(dataset_path, eval_split)
+        if eval_dataset is None:
+            return None
+        evaluator = ModelEvaluator(
+            batch_size=batch_size, block_size=block_size, num_workers=num_workers
+        )
+        return evaluator.compare(base_dir, finetuned_dir, eval_dataset)
 
     def convert_to_gguf(self, model_dir: str, gguf_path: str, script: str) -> None:
         cmd = ["python", script, model_dir, gguf_path]
         subprocess.run(cmd, check=True)
 
+    def convert_adapter_to_gguf(
+        self, adapter_dir: str, base_dir: str, adapter_path: str, script: str
+    ) -> None:
+        """Convert only the LoRA delta with llama.cpp ``convert_lora_to_gguf.py``."""
+        cmd = ["python", script, "--base", base_dir, "--outfile", adapter_path, adapter_dir]
+        subprocess.run(cmd, check=True)
+
+    @staticmethod
+    def base_model_name(repo_id: str, revision: str, quantization: str) -> str:
+        """Ollama name of the shared base for ``repo_id`` at ``revision``."""
+        name = f"{repo_id.replace('/', '-').lower()}-base-{revision[:8]}"
+        if quantization and quantization != "none":
+            name += f"-{quantization.lower()}"
+        return name
+
+    def base_gguf(
+        self, model_dir: str, cache_dir: str, quantization: str, converter_script: str
+    ) -> tuple[str, bool]:
+        """Return the shared GGUF for a base model, converting it only once.
+
+        ``cache_dir`` is keyed by repo and revision rather than living in the
+        per-task download, so every task fine-tuning the same base reuses the
+        file. Returns ``(path, reused)``.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        gguf_path = os.path.join(cache_dir, "base.gguf")
+        target = gguf_path
+        if quantization and quantization != "none":
+            target = gguf_path.replace(".gguf", f"_{quantization}.gguf")
+        if os.path.exists(target):
+            return target, True
+        if not os.path.exists(gguf_path):
+            self.convert_to_gguf(model_dir, gguf_path, converter_script)
+        if target != gguf_path:
+            self.quantize_gguf(gguf_path, quantization)
+        return target, False
+
     def quantize_gguf(self, gguf_path: str, mode: str, quantize_bin: str = "quantize") -> str:
         """Optionally quantize the GGUF file using llama.cpp quantize utility."""
         out_path = gguf_path.replace(".gguf", f"_{mode}.gguf")
@@ -127,21 +323,28 @@ class TuningWorker:
                 logger.error(f"Worker error: {e}")
             await asyncio.sleep(self.poll_interval)
 
+    def stop(self):
+        self._running = False
+
     async def process_queued_tasks(self):
-        # Find all queued tasks
-        cursor = self.service.collection.find({"status": "queued"})
-        async for doc in cursor:
+        # Claim queued tuning tasks one at a time (batch inference jobs have
+        # their own worker); the claim is atomic so replicas never share a task
+        while self._running:
+            doc = await self.service.claim_task([None, "tuning"], self.worker_id)
+            if doc is None:
+                return
             task_id = doc["_id"]
             logger.info(f"Starting tuning for task {task_id}")
-            await self.run_tuning_task(task_id, doc)
+            await self.service.run_leased(
+                task_id, self.worker_id, self.run_tuning_task(task_id, doc)
+            )
 
     async def run_tuning_task(self, task_id: ObjectId, doc: dict):
         """Run the full fine-tuning and upload pipeline for a task."""
         try:
-            settings = self._load_settings()
-            hf_token = settings.get("hf_token")
-            hf_user = settings.get("hf_user")
-            local_dir = settings.get("local_model_dir", "models")
+            hf_token = settings_store.get("hf_token")
+            hf_user = settings_store.get("hf_user")
+            local_dir = settings_store.get("local_model_dir", "models")
 
             repo_id = doc["parameters"].get("repo_id")
             name = doc["parameters"].get("name", str(task_id))
@@ -152,13 +355,36 @@ class TuningWorker:
             quantization = doc["parameters"].get("quantization", "none")
             push = bool(doc["parameters"].get("push", False))
             converter_script = doc["parameters"].get("converter_script", "convert.py")
+            eval_split = float(doc["parameters"].get("evalSplit", 0.1))
+            eval_batch_size = int(doc["parameters"].get("evalBatchSize", 8))
+            eval_block_size = int(doc["parameters"].get("evalBlockSize", 512))
+            eval_workers = doc["parameters"].get("evalWorkers")
+            eval_steps = int(doc["parameters"].get("evalSteps", 0))
+            patience = int(doc["parameters"].get("earlyStoppingPatience", 3))
+            min_delta = float(doc["parameters"].get("earlyStoppingMinDelta", 0.0))
+            method = doc["parameters"].get("finetuneMethod", "full")
+            adapter_script = doc["parameters"].get(
+                "adapter_converter_script", "convert_lora_to_gguf.py"
+            )
+            lora = None
+            if method == "lora":
+                lora = {
+                    "rank": doc["parameters"].get("loraRank", 8),
+                    "alpha": doc["parameters"].get("loraAlpha", 16),
+                    "dropout": doc["parameters"].get("loraDropout", 0.05),
+                    "target_modules": doc["parameters"].get("loraTargetModules"),
+                }
 
             if not (hf_token and hf_user and repo_id and dataset_path):
                 raise ValueError("Missing required parameters for tuning task")
 
             await self.service.update_progress(task_id, 0.05, "downloading")
             hf = HFModelIO(hf_token, hf_user)
-            model_dir = hf.download_model(repo_id, os.path.join(local_dir, name))
+            job = await transfer_manager.wait(
+                hf.start_download(repo_id, os.path.join(local_dir, name))
+            )
+            model_dir = job.local_dir
+            revision = job.result.get("revision") or "main"
 
             await self.service.update_progress(task_id, 0.2, "training")
             output_dir = os.path.join(local_dir, f"finetuned_{task_id}")
@@ -168,59 +394,179 @@ class TuningWorker:
                     task_id, 0.2 + pct * 0.4, "training"
                 )
 
+            loop = asyncio.get_running_loop()
+
             def progress_cb(p: float):
-                asyncio.get_event_loop().call_soon_threadsafe(
-                    asyncio.create_task, async_update(p)
-                )
+                loop.call_soon_threadsafe(asyncio.create_task, async_update(p))
 
-            loss, history = self.train_model(
-                model_dir,
-                dataset_path,
-                output_dir,
-                epochs,
-                training_steps,
-                learning_rate,
-                progress_cb,
-            )
+            # Training runs in a thread so progress and metrics land mid-run
+            metrics = MetricsBuffer(MetricsStore(self.db), str(task_id), loop)
+            stop_training = threading.Event()
+            try:
+                loss, history, training = await asyncio.to_thread(
+                    self.train_model,
+                    model_dir,
+                    dataset_path,
+                    output_dir,
+                    epochs,
+                    training_steps,
+                    learning_rate,
+                    progress_cb,
+                    eval_split,
+                    eval_steps=eval_steps,
+                    patience=patience,
+                    min_delta=min_delta,
+                    eval_batch_size=eval_batch_size,
+                    lora=lora,
+                    metrics_cb=metrics.add,
+                    should_stop=stop_training.is_set,
+                )
+            except asyncio.CancelledError:
+                # The thread outlives the cancelled await; make it give up
+                stop_training.set()
+                raise
+            finally:
+                await metrics.aclose()
+            # Full curves live in training_metrics; keep a bounded preview here
+            history = [
+                value
+                for _, value in lttb(list(enumerate(history)), HISTORY_PREVIEW_POINTS)
+            ]
 
             await self.service.update_progress(
                 task_id,
                 0.6,
                 "training_complete",
-                result={"loss": loss, "loss_history": history},
+                result={"loss": loss, "loss_history": history, "training": training},
             )
 
+            evaluation = None
+            if eval_split > 0:
+                await self.service.update_progress(task_id, 0.65, "evaluating")
+                # Off the event loop so lease renewal and progress keep flowing
+                evaluation = await asyncio.to_thread(
+                    self.evaluate_model,
+                    model_dir,
+                    output_dir,
+                    dataset_path,
+                    eval_split,
+                    batch_size=eval_batch_size,
+                    block_size=eval_block_size,
+                    num_workers=int(eval_workers) if eval_workers is not None else None,
+                )
+
             repo_id_pushed = None
             if push:
-                repo_id_pushed = hf.push_model(output_dir, name)
-
-            await self.service.update_progress(task_id, 0.7, "converting")
-            gguf_path = os.path.join(output_dir, "model.gguf")
-            self.convert_to_gguf(output_dir, gguf_path, converter_script)
+                job = await transfer_manager.wait(hf.start_push(output_dir, name))
+                repo_id_pushed = job.repo_id
 
-            quantized_path = None
-            if quantization and quantization != "none":
-                await self.service.update_progress(task_id, 0.8, "quantizing")
-                quantized_path = self.quantize_gguf(gguf_path, quantization)
-
-            await self.service.update_progress(task_id, 0.9, "creating_model")
             modelfile = os.path.join(output_dir, "Modelfile")
             service = OllamaService()
-            model_source = quantized_path or gguf_path
-            await service.create_model(name, modelfile, model_source)
+            quantized_path = None
+            adapter = None
+            convert_start = time.perf_counter()
+            # Conversions shell out for minutes; they run in threads so lease
+            # renewal and progress publishing keep going meanwhile
+            if lora is not None:
+                # Only the adapter is converted; the base GGUF is shared
+                await self.service.update_progress(task_id, 0.7, "converting_adapter")
+                adapter_path = os.path.join(output_dir, "adapter.gguf")
+                await asyncio.to_thread(
+                    self.convert_adapter_to_gguf,
+                    output_dir,
+                    model_dir,
+                    adapter_path,
+                    adapter_script,
+                )
+                await self.service.update_progress(task_id, 0.8, "preparing_base")
+                base_model = self.base_model_name(repo_id, revision, quantization)
+                base_cache = os.path.join(
+                    local_dir, ".base_gguf", repo_id.replace("/", "--"), revision
+                )
+                if await service.has_model(base_model):
+                    # Ollama already holds these weights; nothing to convert
+                    gguf_path, base_reused = None, True
+                else:
+                    gguf_path, base_reused = await asyncio.to_thread(
+                        self.base_gguf,
+                        model_dir,
+                        base_cache,
+                        quantization,
+                        converter_script,
+                    )
+                    await service.ensure_base_model(base_model, gguf_path)
+                conversion_seconds = time.perf_counter() - convert_start
+
+                await self.service.update_progress(task_id, 0.9, "creating_model")
+                await service.create_adapter_model(
+                    name, base_model, adapter_path, modelfile
+                )
+                model_source = adapter_path
+                adapter = {
+                    "adapter_path": adapter_path,
+                    "adapter_bytes": os.path.getsize(adapter_path),
+                    "base_model": base_model,
+                    "base_gguf": gguf_path,
+                    "base_reused": base_reused,
+                }
+            else:
+                await self.service.update_progress(task_id, 0.7, "converting")
+                gguf_path = os.path.join(output_dir, "model.gguf")
+                await asyncio.to_thread(
+                    self.convert_to_gguf, output_dir, gguf_path, converter_script
+                )
+
+                if quantization and quantization != "none":
+                    await self.service.update_progress(task_id, 0.8, "quantizing")
+                    quantized_path = await asyncio.to_thread(
+                        self.quantize_gguf, gguf_path, quantization
+                    )
+                conversion_seconds = time.perf_counter() - convert_start
+
+                await self.service.update_progress(task_id, 0.9, "creating_model")
+                model_source = quantized_path or gguf_path
+                await service.create_model(name, modelfile, model_source)
 
             result = {
+                "finetune_method": method,
+                "conversion_seconds": round(conversion_seconds, 1),
                 "gguf_path": gguf_path,
                 "model": name,
                 "loss": loss,
                 "loss_history": history,
+                "stop_reason": training["stop_reason"],
+                "best_step": training["best_step"],
+                "best_eval_loss": training["best_eval_loss"],
+                "training": training,
                 "model_dir": output_dir,
                 "quantization": quantization,
             }
+            if evaluation:
+                result["evaluation"] = evaluation
             if quantized_path:
                 result["quantized_path"] = quantized_path
+            if adapter:
+                result["adapter"] = adapter
             if repo_id_pushed:
                 result["repo_id"] = repo_id_pushed
+            # Share tokenizer/config files and unchanged shards with earlier runs
+            manifest = await asyncio.to_thread(
+                artifact_store.ingest, output_dir, f"task_{task_id}"
+            )
+            result["artifact_new_bytes"] = manifest["new_bytes"]
+            # Index the new artifacts now rather than on the next periodic
+            # scan; the task itself succeeded either way
+            entry = None
+            try:
+                await model_registry.refresh()
+                entry = model_registry.get(model_source)
+            except Exception as e:
+                logger.warning(f"Model registry refresh failed for task {task_id}: {e}")
+            if entry:
+                result["artifact"] = {
+                    k: entry[k]
+                    for k in ("parameters", "quantization", "context_length", "size_bytes")
+                }
             await self.service.update_progress(task_id, 1.0, "completed", result=result)
             logger.info(f"Completed tuning for task {task_id}")
         except Exception as e:
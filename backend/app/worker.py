@@ -0,0 +1,82 @@
+"""Standalone entry point for the background workers.
+
+Runs the tuning and batch inference workers without the web API:
+
+    python -m app.worker
+
+Only this process imports the training stack (torch, transformers, datasets,
+peft), so API replicas started with ``EMBEDDED_WORKERS=false`` stay small and
+start quickly. Set ``PROGRESS_BROKER_URL`` so progress published here reaches
+WebSocket clients connected to the API.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.clients import clients
+from app.core.config import settings
+from app.core.database import db
+from app.core.logger import log_pipeline
+from app.core.metrics import mark_started, metrics
+from app.core.settings_store import settings_store
+from app.services.batch_inference_worker import BatchInferenceWorker
+from app.services.model_transfer import transfer_manager
+from app.services.progress_broker import progress_broker
+from app.services.tuning_worker import TuningWorker
+from app.services.tuning_service import TuningService
+
+logger = logging.getLogger("app.worker")
+
+# How long a running task may take to reach a stopping point on shutdown
+SHUTDOWN_GRACE_SECONDS = 30.0
+
+
+async def main() -> None:
+    log_pipeline.configure_from(settings)
+    if not settings.progress_broker_url:
+        logger.warning(
+            "PROGRESS_BROKER_URL is not set; progress from this worker will not "
+            "reach WebSocket clients of the API"
+        )
+    await clients.startup()
+    workers = [TuningWorker(db), BatchInferenceWorker(db)]
+    tasks = [asyncio.create_task(worker.run()) for worker in workers]
+    watcher = asyncio.create_task(settings_store.watch())
+
+    server = None
+    if settings.worker_metrics_port:
+        metrics.add_collector(TuningService(db).collect_queue_metrics)
+        server = await metrics.serve("0.0.0.0", settings.worker_metrics_port)
+        logger.info(f"Worker metrics on :{settings.worker_metrics_port}/metrics")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C raises KeyboardInterrupt
+            pass
+    logger.info(f"Worker started in {mark_started():.2f}s")
+    await stop.wait()
+
+    logger.info("Stopping workers")
+    for worker in workers:
+        worker.stop()
+    settings_store.stop()
+    _, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_GRACE_SECONDS)
+    for task in pending | {watcher}:
+        task.cancel()
+    if server is not None:
+        server.close()
+    await transfer_manager.close()
+    await progress_broker.close()
+    await clients.shutdown()
+    log_pipeline.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        log_pipeline.stop()
@@ -0,0 +1,94 @@
+"""Measure cold import time and memory of the API (or worker) process.
+
+Imports the module in a fresh interpreter and reports wall time, resident
+memory and which heavy ML packages were pulled in. Exits non-zero when a
+budget is exceeded, so it can run in CI to keep API startup lean:
+
+    python scripts/measure_startup.py --max-seconds 3 --max-rss-mb 250
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+HEAVY_MODULES = ("torch", "transformers", "datasets", "peft", "huggingface_hub")
+
+# Runs in the child; the app logs to stdout, so the report goes to a file
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from app.core.metrics import resident_memory_bytes
+open(sys.argv[1], "w").write(json.dumps({{
+    "import_seconds": round(elapsed, 3),
+    "rss_mb": round(resident_memory_bytes() / 2**20, 1),
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to average")
+    parser.add_argument("--max-seconds", type=float, help="Fail above this import time")
+    parser.add_argument("--max-rss-mb", type=float, help="Fail above this RSS")
+    parser.add_argument(
+        "--allow-heavy", action="store_true", help="Do not fail when ML packages load"
+    )
+    return parser.parse_args()
+
+
+def measure(module: str) -> dict:
+    env = {
+        # Minimal settings so the app package imports without a .env
+        "MONGODB_URI": "mongodb://localhost:27017",
+        "OPENAI_API_KEY": "dummy",
+        **os.environ,
+    }
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    with tempfile.TemporaryDirectory() as tmp:
+        report = os.path.join(tmp, "report.json")
+        subprocess.run(
+            [sys.executable, "-c", code, report],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            check=True,
+        )
+        with open(report, "r") as f:
+            return json.load(f)
+
+
+def main():
+    args = parse_args()
+    runs = [measure(args.module) for _ in range(args.runs)]
+    report = {
+        "module": args.module,
+        "import_seconds": round(sorted(r["import_seconds"] for r in runs)[len(runs) // 2], 3),
+        "rss_mb": max(r["rss_mb"] for r in runs),
+        "heavy_modules": runs[-1]["heavy_modules"],
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if args.max_seconds is not None and report["import_seconds"] > args.max_seconds:
+        failures.append(f"import took {report['import_seconds']}s > {args.max_seconds}s")
+    if args.max_rss_mb is not None and report["rss_mb"] > args.max_rss_mb:
+        failures.append(f"RSS {report['rss_mb']}MB > {args.max_rss_mb}MB")
+    if report["heavy_modules"] and not args.allow_heavy:
+        failures.append(f"heavy modules imported: {', '.join(report['heavy_modules'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Minimal settings so the app package imports without a .env
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("OPENAI_API_KEY", "dummy")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
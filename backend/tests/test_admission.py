@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+def test_waiters_are_served_round_robin_across_clients():
+    controller = AdmissionController(max_concurrency=1, max_queue=10, timeout=5)
+    order = []
+
+    async def request(client_id, name):
+        async with controller.slot("m", client_id):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def run():
+        async with controller.slot("m", "holder"):
+            tasks = [
+                asyncio.create_task(request(client, name))
+                for client, name in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")]
+            ]
+            # Let every request join the queue before the slot frees up
+            await asyncio.sleep(0.01)
+            assert controller.snapshot()["queued"] == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order == ["a1", "b1", "a2", "a3"]
+    model = controller.snapshot()["models"][0]
+    assert (model["active"], model["queued"], model["admitted"]) == (0, 0, 5)
+
+
+def test_full_queue_is_rejected_immediately():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, timeout=5)
+
+    async def run():
+        async with controller.slot("m", "a"):
+            waiter = asyncio.create_task(controller.for_model("m").acquire("b"))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.for_model("m").acquire("c")
+        await waiter
+        controller.for_model("m").release()
+        return rejected.value
+
+    rejected = asyncio.run(run())
+
+    assert rejected.reason == "queue full"
+    assert rejected.status_code == 429
+    model = controller.snapshot()["models"][0]
+    assert (model["rejected_full"], model["active"], model["queued"]) == (1, 0, 0)
+
+
+def test_wait_past_the_timeout_is_rejected_and_leaves_the_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, timeout=0.02)
+
+    async def run():
+        async with controller.slot("m", "a"):
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.for_model("m").acquire("b")
+            assert controller.snapshot()["queued"] == 0
+        return rejected.value
+
+    rejected = asyncio.run(run())
+
+    assert rejected.reason == "queue wait timed out"
+    model = controller.snapshot()["models"][0]
+    assert model["rejected_timeout"] == 1
+    assert (model["active"], model["waiting_clients"]) == (0, 0)
+
+
+def test_models_are_admitted_independently():
+    controller = AdmissionController(max_concurrency=1, max_queue=0, timeout=5)
+
+    async def run():
+        async with controller.slot("a"):
+            async with controller.slot("b"):
+                return controller.snapshot()["active"]
+
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,157 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.services import analytics_service
+from app.services.analytics_service import (
+    REBUILD_GATE_ID,
+    TOTALS_ID,
+    AnalyticsService,
+    RebuildInProgress,
+)
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            if "$gt" in condition and not (
+                value is not None and value > condition["$gt"]
+            ):
+                return False
+            if "$lte" in condition and not (
+                value is not None and value <= condition["$lte"]
+            ):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for the analytics rollups."""
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.docs = {}
+        self.on_scan = None
+
+    async def find_one(self, query):
+        return next((d for d in self.docs.values() if _matches(d, query)), None)
+
+    async def insert_one(self, doc):
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicate _id")
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def insert_many(self, docs):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = await self.find_one(query)
+        if doc is None:
+            if not upsert:
+                return SimpleNamespace(modified_count=0)
+            doc = self.docs[query["_id"]] = {"_id": query["_id"]}
+            doc.update(update.get("$setOnInsert", {}))
+        doc.update(update.get("$set", {}))
+        for path, amount in update.get("$inc", {}).items():
+            *parents, leaf = path.split(".")
+            target = doc
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = target.get(leaf, 0) + amount
+        return SimpleNamespace(modified_count=1)
+
+    async def delete_one(self, query):
+        doc = await self.find_one(query)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+
+    async def drop(self):
+        self.docs.clear()
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def rename(self, name, dropTarget=False):
+        self.database[name].docs = self.docs
+        self.docs = {}
+
+    async def find(self, query, projection=None):
+        for doc in list(self.docs.values()):
+            yield dict(doc)
+            if self.on_scan:
+                await self.on_scan()
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        collection = self[name] = FakeCollection(self, name)
+        return collection
+
+
+def make_service(tasks):
+    db = FakeDatabase()
+    for task in tasks:
+        db["tuning_tasks"].docs[task["_id"]] = task
+    service = AnalyticsService(db)
+    service.grace_seconds = 0
+    return service, db
+
+
+def test_updates_during_a_rebuild_are_not_lost(monkeypatch):
+    monkeypatch.setattr(analytics_service, "GATE_CHECK_SECONDS", 0.01)
+    created = datetime(2026, 1, 1)
+    tasks = [
+        {"_id": i, "status": "queued", "progress": 0.0, "created_at": created}
+        for i in range(3)
+    ]
+    service, db = make_service(tasks)
+    writer = AnalyticsService(db)
+    scanning = asyncio.Event()
+
+    async def pause_scan():
+        scanning.set()
+        await asyncio.sleep(0.05)
+
+    db["tuning_tasks"].on_scan = pause_scan
+
+    async def update_first_task():
+        # Same order as TuningService.update_progress
+        await scanning.wait()
+        await writer.wait_until_writable()
+        before = dict(tasks[0])
+        tasks[0].update(status="running", progress=0.5)
+        await writer.record_update(before, "running", 0.5, created + timedelta(hours=1))
+
+    async def run():
+        await asyncio.gather(service.rebuild(), update_first_task())
+
+    asyncio.run(run())
+
+    totals = db["task_analytics"].docs[TOTALS_ID]
+    assert totals["status"] == {"queued": 2, "running": 1}
+    assert totals["progress_sum"] == 0.5
+    assert REBUILD_GATE_ID not in db["task_analytics_gates"].docs
+
+
+def test_a_second_rebuild_is_refused_until_the_gate_expires():
+    service, db = make_service([])
+    gates = db["task_analytics_gates"]
+    gates.docs[REBUILD_GATE_ID] = {
+        "_id": REBUILD_GATE_ID,
+        "until": datetime.utcnow() + timedelta(minutes=5),
+    }
+
+    with pytest.raises(RebuildInProgress):
+        asyncio.run(service.rebuild())
+
+    gates.docs[REBUILD_GATE_ID]["until"] = datetime.utcnow() - timedelta(seconds=1)
+    assert asyncio.run(service.rebuild()) == {"tasks": 0, "days": 0}
+    assert not gates.docs
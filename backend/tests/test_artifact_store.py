@@ -0,0 +1,61 @@
+import os
+import stat
+
+from app.services import artifact_store as artifact_store_module
+from app.services.artifact_store import ArtifactStore
+
+
+def _writable(path) -> bool:
+    return bool(os.stat(path).st_mode & stat.S_IWUSR)
+
+
+def _model(tmp_path, payload=b"weights"):
+    source = tmp_path / "model"
+    source.mkdir(exist_ok=True)
+    (source / "weights.bin").write_bytes(payload)
+    return source
+
+
+def test_blobs_are_read_only_copies_of_the_source(tmp_path):
+    source = _model(tmp_path)
+    store = ArtifactStore(root=str(tmp_path / "store"))
+
+    manifest = store.ingest(str(source), "model")
+
+    blob = store.blob_path(manifest["files"]["weights.bin"]["digest"])
+    assert not os.path.samefile(blob, source / "weights.bin")
+    assert not _writable(blob)
+    assert _writable(source / "weights.bin")
+
+
+def test_rewriting_the_source_leaves_blobs_and_refs_intact(tmp_path):
+    source = _model(tmp_path)
+    store = ArtifactStore(root=str(tmp_path / "store"))
+    manifest = store.ingest(str(source), "v1")
+    blob = store.blob_path(manifest["files"]["weights.bin"]["digest"])
+    saved = store.materialize("v1", str(tmp_path / "saved"))
+
+    (source / "weights.bin").write_bytes(b"retrained")
+    second = store.ingest(str(source), "v2")
+
+    assert open(blob, "rb").read() == b"weights"
+    assert open(os.path.join(saved, "weights.bin"), "rb").read() == b"weights"
+    old_digest = manifest["files"]["weights.bin"]["digest"]
+    assert second["files"]["weights.bin"]["digest"] != old_digest
+
+
+def test_unchanged_sources_are_not_rehashed(tmp_path, monkeypatch):
+    source = _model(tmp_path)
+    store = ArtifactStore(root=str(tmp_path / "store"))
+    store.ingest(str(source), "v1")
+    hashed = []
+    real_hash = artifact_store_module._hash_file
+    monkeypatch.setattr(
+        artifact_store_module,
+        "_hash_file",
+        lambda path: hashed.append(path) or real_hash(path),
+    )
+
+    store.ingest(str(source), "v2")
+
+    assert hashed == []
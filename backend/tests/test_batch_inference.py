@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.retry import is_transient
+from app.services import batch_inference_worker
+from app.services.admission import AdmissionRejected
+from app.services.batch_inference_worker import (
+    BatchInferenceWorker,
+    load_checkpoint,
+    resolve_output_path,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FakeTuningService:
+    def __init__(self):
+        self.updates = []
+
+    async def update_progress(self, task_id, progress, status, result=None):
+        self.updates.append((status, result))
+
+
+def make_worker():
+    worker = BatchInferenceWorker.__new__(BatchInferenceWorker)
+    worker.service = FakeTuningService()
+    return worker
+
+
+def test_output_path_is_confined_to_output_dir(tmp_path):
+    base = tmp_path / "out"
+    assert resolve_output_path(str(base), None, "abc") == str(base / "batch_abc.jsonl")
+    assert resolve_output_path(str(base), "runs/a.jsonl", "abc") == str(
+        base / "runs" / "a.jsonl"
+    )
+    for bad in ("../escape.jsonl", "/etc/passwd", "."):
+        with pytest.raises(ValueError):
+            resolve_output_path(str(base), bad, "abc")
+
+
+def test_failed_records_are_not_checkpointed(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(
+        json.dumps({"index": 0, "response": "ok"})
+        + "\n"
+        + json.dumps({"index": 1, "error": "boom"})
+        + "\n"
+    )
+    assert load_checkpoint(str(path)) == {0}
+
+
+def test_only_transient_errors_are_retried():
+    assert is_transient(ConnectionError())
+    assert is_transient(StatusError(503))
+    assert is_transient(StatusError(429))
+    assert is_transient(AdmissionRejected("m", "queue full"))
+    assert not is_transient(StatusError(404))
+    assert not is_transient(ValueError("bad request"))
+
+
+def test_failed_prompts_are_retried_on_resume(tmp_path, monkeypatch):
+    dataset = tmp_path / "prompts.txt"
+    dataset.write_text("one\ntwo\nthree\n")
+    calls = []
+    missing = {"two"}
+
+    class FakeOllama:
+        async def chat(self, messages, model, options=None, client_id=None):
+            prompt = messages[-1]["content"]
+            calls.append(prompt)
+            if prompt in missing:
+                raise StatusError(404)
+            return prompt.upper()
+
+    monkeypatch.setattr(batch_inference_worker, "OllamaService", FakeOllama)
+    monkeypatch.setattr(
+        batch_inference_worker.settings_store,
+        "get",
+        lambda key, default=None: str(tmp_path / "out"),
+    )
+    doc = {"dataset_id": str(dataset), "parameters": {"model": "m", "concurrency": 2}}
+
+    worker = make_worker()
+    asyncio.run(worker.run_job("job", doc))
+    status, result = worker.service.updates[-1]
+    assert status == "completed"
+    assert (result["completed"], result["failed"]) == (2, 1)
+    # A 404 is not transient, so it is attempted once
+    assert calls.count("two") == 1
+
+    missing.clear()
+    calls.clear()
+    worker = make_worker()
+    asyncio.run(worker.run_job("job", doc))
+    assert calls == ["two"]
+    assert load_checkpoint(result["output_path"]) == {0, 1, 2}
+
+
+def test_worker_failure_does_not_block_producer(tmp_path, monkeypatch):
+    dataset = tmp_path / "prompts.txt"
+    dataset.write_text("".join(f"p{i}\n" for i in range(50)))
+
+    class FakeOllama:
+        async def chat(self, messages, model, options=None, client_id=None):
+            return "ok"
+
+    def broken_dumps(record):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(batch_inference_worker, "OllamaService", FakeOllama)
+    monkeypatch.setattr(
+        batch_inference_worker.settings_store,
+        "get",
+        lambda key, default=None: str(tmp_path / "out"),
+    )
+    monkeypatch.setattr(batch_inference_worker.json, "dumps", broken_dumps)
+    doc = {"dataset_id": str(dataset), "parameters": {"model": "m", "concurrency": 1}}
+
+    worker = make_worker()
+    asyncio.run(asyncio.wait_for(worker.run_job("job", doc), timeout=5))
+    status, result = worker.service.updates[-1]
+    assert status == "failed"
+    assert "disk full" in result["error"]
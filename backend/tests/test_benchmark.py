@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.schemas.benchmark import BenchmarkCreate
+from app.services import benchmark_service
+from app.services.admission import admission_controller
+from app.services.benchmark_service import BenchmarkService
+from app.services.chat_stream import StreamMetrics
+
+
+class FakeCollection:
+    async def insert_one(self, document):
+        return SimpleNamespace(inserted_id="0" * 24)
+
+    async def update_one(self, *args, **kwargs):
+        return None
+
+
+def test_stream_metrics_prefer_admission_and_eval_count():
+    metrics = StreamMetrics(provider="ollama", model="m", started=10.0)
+    metrics.usage.update(admitted_at=12.0, eval_count=40, eval_duration=2_000_000_000)
+    metrics.first_token_at = 12.5
+    metrics.finished_at = 15.0
+    metrics.tokens = 7  # stream chunks
+
+    row = metrics.as_dict()
+
+    assert row["queue_ms"] == 2000.0
+    assert row["ttft_ms"] == 500.0
+    assert row["total_ms"] == 3000.0
+    assert row["tokens"] == 40
+    assert row["tokens_per_second"] == 20.0
+
+
+def test_ollama_targets_are_capped_at_admission_capacity(monkeypatch):
+    running = {"now": 0, "peak": 0}
+
+    async def fake_stream(provider, messages, model, client_id, usage=None):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        try:
+            await asyncio.sleep(0.01)
+            yield "token"
+        finally:
+            running["now"] -= 1
+
+    monkeypatch.setattr(benchmark_service, "open_token_stream", fake_stream)
+    monkeypatch.setitem(admission_controller.overrides, "bench-model", 2)
+    monkeypatch.setattr(admission_controller, "_models", {})
+    service = BenchmarkService(
+        {"model_benchmarks": FakeCollection(), "saved_models": FakeCollection()}
+    )
+    data = BenchmarkCreate(
+        prompts=[f"p{i}" for i in range(10)],
+        targets=[{"model": "bench-model"}],
+        concurrency=16,
+    )
+
+    benchmark = asyncio.run(service.run(data))
+
+    assert running["peak"] == 2
+    assert benchmark.summary[0]["runs"] == 10
+    assert benchmark.summary[0]["errors"] == 0
@@ -0,0 +1,91 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import ollama
+from app.services.admission import AdmissionRejected
+from app.services.chat_stream import WebSocketChatSession
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, payload):
+        self.sent.append(payload)
+
+
+def test_websocket_chats_are_fitted_to_the_context_budget():
+    streamed = []
+    fitted = []
+
+    async def fitter(provider, messages, model, client_id, budget=None, strategy=None):
+        fitted.append((provider, model, client_id, budget, strategy))
+        return messages[-1:], {"dropped_messages": len(messages) - 1}
+
+    async def stream_factory(provider, messages, model, client_id):
+        streamed.append(messages)
+        yield "hi"
+
+    async def run():
+        session = WebSocketChatSession(
+            FakeWebSocket(),
+            stream_factory=stream_factory,
+            client_id="c1",
+            context_fitter=fitter,
+        )
+        await session.handle(
+            {
+                "type": "chat",
+                "id": "1",
+                "model": "m",
+                "messages": [
+                    {"role": "user", "content": "a"},
+                    {"role": "user", "content": "b"},
+                ],
+                "context_budget": 100,
+                "context_strategy": "summarize",
+            }
+        )
+        await asyncio.gather(*session.tasks.values())
+        return session.websocket.sent
+
+    sent = asyncio.run(run())
+
+    assert fitted == [("ollama", "m", "c1", 100, "summarize")]
+    assert streamed == [[{"role": "user", "content": "b"}]]
+    assert sent[-1]["type"] == "done"
+    assert sent[-1]["context"] == {"dropped_messages": 1}
+
+
+def test_websocket_chat_reports_admission_rejection():
+    async def fitter(provider, messages, model, client_id, budget=None, strategy=None):
+        raise AdmissionRejected(model, "queue full", retry_after=3)
+
+    async def run():
+        session = WebSocketChatSession(FakeWebSocket(), context_fitter=fitter)
+        await session.handle({"type": "chat", "id": "1", "model": "m", "messages": []})
+        await asyncio.gather(*session.tasks.values())
+        return session.websocket.sent
+
+    sent = asyncio.run(run())
+
+    assert sent[-1]["type"] == "error"
+    assert (sent[-1]["status"], sent[-1]["retry_after"]) == (429, 3)
+
+
+def test_stream_endpoint_maps_summary_rejection_to_429(monkeypatch):
+    async def rejected(req, service, client_id):
+        raise AdmissionRejected(req.model, "queue full", retry_after=2)
+
+    monkeypatch.setattr(ollama, "fit_context", rejected)
+    app = FastAPI()
+    app.include_router(ollama.router)
+    app.dependency_overrides[ollama.get_service] = object
+    client = TestClient(app)
+
+    response = client.post("/ollama/chat/stream", json={"messages": [], "model": "m"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
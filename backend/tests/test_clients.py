@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, BadRequestError
+
+from app.core import clients as clients_module
+from app.core import retry
+from app.core.clients import InstrumentedTransport
+from app.services.assistant_service import AssistantService
+
+
+def _completion(content):
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Stand in for the network below InstrumentedTransport: a fake
+    OpenAI-compatible server answering from a list of canned replies."""
+    state = {"replies": [], "requests": [], "delay": 0.0}
+    observed = []
+
+    async def handle(transport, request):
+        state["requests"].append(request)
+        await asyncio.sleep(state["delay"])
+        reply = state["replies"].pop(0) if state["replies"] else 200
+        if isinstance(reply, Exception):
+            raise reply
+        body = json.loads(request.content or b"{}")
+        content = " ".join(m["content"] for m in body.get("messages", []))
+        payload = _completion(f"echo: {content}") if reply == 200 else {"error": {}}
+        return httpx.Response(reply, json=payload, request=request)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", handle)
+    monkeypatch.setattr(
+        clients_module,
+        "observe_upstream",
+        lambda service, operation, seconds, error: observed.append(
+            (service, operation, error)
+        ),
+    )
+    monkeypatch.setattr(retry, "backoff_delay", lambda *args: 0)
+    state["observed"] = observed
+    return state
+
+
+def _assistant(max_retries=2):
+    client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            transport=InstrumentedTransport("openai", segments=3)
+        ),
+    )
+    return AssistantService(client=client, timeout=5, max_retries=max_retries)
+
+
+def test_transport_labels_operations_and_counts_errors(upstream):
+    upstream["replies"] = [200, 404, 503, 429, httpx.ConnectError("refused")]
+    transport = InstrumentedTransport("ollama")
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            for path in ("/api/chat", "/api/tags/extra", "/api/chat", "/api/chat"):
+                await client.get(f"http://fake-ollama{path}")
+            with pytest.raises(httpx.ConnectError):
+                await client.get("http://fake-ollama/api/generate")
+
+    asyncio.run(run())
+
+    assert upstream["observed"] == [
+        ("ollama", "/api/chat", False),
+        ("ollama", "/api/tags", False),
+        ("ollama", "/api/chat", True),
+        ("ollama", "/api/chat", True),
+        ("ollama", "/api/generate", True),
+    ]
+
+
+def test_assistant_retries_transient_errors_against_a_fake_server(upstream):
+    upstream["replies"] = [503, 200]
+
+    reply = asyncio.run(_assistant().chat([{"role": "user", "content": "hi"}]))
+
+    assert reply == "echo: hi"
+    assert upstream["observed"] == [
+        ("openai", "/v1/chat/completions", True),
+        ("openai", "/v1/chat/completions", False),
+    ]
+
+
+def test_assistant_does_not_retry_client_errors(upstream):
+    upstream["replies"] = [400]
+
+    with pytest.raises(BadRequestError):
+        asyncio.run(_assistant().chat([{"role": "user", "content": "hi"}]))
+
+    assert len(upstream["requests"]) == 1
+
+
+def test_concurrent_assistant_chats_do_not_serialize(upstream):
+    upstream["delay"] = 0.2
+    assistant = _assistant()
+
+    async def run():
+        start = time.perf_counter()
+        replies = await asyncio.gather(
+            *(assistant.chat([{"role": "user", "content": str(i)}]) for i in range(5))
+        )
+        return replies, time.perf_counter() - start
+
+    replies, elapsed = asyncio.run(run())
+
+    assert replies == [f"echo: {i}" for i in range(5)]
+    assert elapsed < 0.6
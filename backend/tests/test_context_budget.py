@@ -0,0 +1,81 @@
+import asyncio
+
+from app.services.context_budget import SUMMARY_PREFIX, ContextManager
+
+
+def _turn(role, n):
+    return {"role": role, "content": f"{role} {n} " + "x" * 400}
+
+
+def test_budget_is_looked_up_per_model():
+    manager = ContextManager(
+        default_budget=8000, budgets={"llama3": 4000, "gpt-4o": 120000}
+    )
+    assert manager.budget_for("gpt-4o") == 120000
+    assert manager.budget_for("llama3:8b") == 4000
+    assert manager.budget_for("mistral") == 8000
+
+
+def test_system_messages_keep_their_position():
+    manager = ContextManager(keep_recent=2)
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        *[_turn("user", i) for i in range(4)],
+        {"role": "system", "content": "Answer in French from now on."},
+        *[_turn("user", i) for i in range(4, 6)],
+    ]
+
+    result, info = asyncio.run(manager.fit(messages, "m", budget=300))
+
+    assert info["dropped_messages"] == 4
+    assert result == [messages[0], messages[5], messages[6], messages[7]]
+
+
+def test_summary_replaces_dropped_turns_in_place():
+    manager = ContextManager(keep_recent=2, strategy="summarize")
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        *[_turn("user", i) for i in range(4)],
+        {"role": "system", "content": "Answer in French from now on."},
+        *[_turn("user", i) for i in range(4, 6)],
+    ]
+
+    async def summarizer(older):
+        return "earlier turns"
+
+    result, info = asyncio.run(
+        manager.fit(messages, "m", budget=600, summarizer=summarizer)
+    )
+
+    assert info["summarized"]
+    assert result[0] == messages[0]
+    assert result[1] == {"role": "system", "content": SUMMARY_PREFIX + "earlier turns"}
+    assert result[-3:] == messages[5:]
+
+
+def test_summaries_are_not_shared_across_models_or_budgets():
+    manager = ContextManager(keep_recent=2, strategy="summarize")
+    messages = [_turn("user", i) for i in range(8)]
+    calls = []
+
+    async def summarizer(older):
+        calls.append(len(older))
+        return f"summary {len(calls)}"
+
+    async def run():
+        first, _ = await manager.fit(messages, "a", budget=600, summarizer=summarizer)
+        other_model, _ = await manager.fit(
+            messages, "b", budget=600, summarizer=summarizer
+        )
+        other_budget, _ = await manager.fit(
+            messages, "a", budget=700, summarizer=summarizer
+        )
+        again, _ = await manager.fit(messages, "a", budget=600, summarizer=summarizer)
+        return first, other_model, other_budget, again
+
+    first, other_model, other_budget, again = asyncio.run(run())
+
+    assert len(calls) == 3
+    assert other_model[0]["content"].endswith("summary 2")
+    assert other_budget[0]["content"].endswith("summary 3")
+    assert again == first
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from app.services.model_catalog import ModelCatalog
+
+FIXTURE = [
+    {
+        "id": "org/llama-7b",
+        "downloads": 500,
+        "likes": 9,
+        "pipeline_tag": "text-generation",
+        "tags": ["llama", "gguf"],
+    },
+    # Older listings name the fields modelId and task
+    {
+        "modelId": "org/mistral-7b",
+        "downloads": 900,
+        "likes": 3,
+        "task": "text-generation",
+        "tags": ["mistral"],
+    },
+    {
+        "id": "org/llama-13b",
+        "downloads": 200,
+        "likes": 1,
+        "pipeline_tag": "text-generation",
+        "tags": ["llama"],
+    },
+    {
+        "id": "org/embedder",
+        "downloads": 900,
+        "likes": 7,
+        "pipeline_tag": "feature-extraction",
+        "tags": [],
+    },
+]
+
+
+def make_catalog(tmp_path, models=FIXTURE):
+    fixture = tmp_path / "fixture.json"
+    fixture.write_text(json.dumps(models))
+    return ModelCatalog(
+        snapshot_path=str(tmp_path / "snapshot.json"), fixture_path=str(fixture)
+    )
+
+
+def _ids(page):
+    return [item["id"] for item in page["items"]]
+
+
+def test_pages_follow_the_sort_order_without_gaps(tmp_path):
+    catalog = make_catalog(tmp_path)
+    assert asyncio.run(catalog.refresh())
+
+    first = catalog.query(limit=2)
+    second = catalog.query(limit=2, cursor=first["next_cursor"])
+
+    # Ties on downloads are broken by id
+    assert _ids(first) == ["org/embedder", "org/mistral-7b"]
+    assert _ids(second) == ["org/llama-7b", "org/llama-13b"]
+    assert second["next_cursor"] is None
+    assert not first["stale"]
+
+
+def test_search_by_tag_task_and_text(tmp_path):
+    catalog = make_catalog(tmp_path)
+    asyncio.run(catalog.refresh())
+
+    assert _ids(catalog.query(tag="LLAMA")) == ["org/llama-7b", "org/llama-13b"]
+    assert _ids(catalog.query(task="feature-extraction")) == ["org/embedder"]
+    assert _ids(catalog.query(q="13b", tag="llama")) == ["org/llama-13b"]
+    assert _ids(catalog.query(sort="likes", task="text-generation")) == [
+        "org/llama-7b",
+        "org/mistral-7b",
+        "org/llama-13b",
+    ]
+
+
+def test_failed_refresh_keeps_serving_the_snapshot(tmp_path):
+    catalog = make_catalog(tmp_path)
+    asyncio.run(catalog.refresh())
+
+    restarted = make_catalog(tmp_path)
+    assert restarted.load_snapshot()
+    (tmp_path / "fixture.json").write_text("not json")
+
+    assert not asyncio.run(restarted.refresh())
+    page = restarted.query()
+    assert len(page["items"]) == 4
+    assert page["stale"]
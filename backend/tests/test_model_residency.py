@@ -0,0 +1,21 @@
+from app.services.model_residency import ModelResidencyManager
+
+
+def test_first_use_is_cold_and_repeat_use_is_hot_with_budget():
+    manager = ModelResidencyManager(memory_budget_mb=8000, hot_window=600)
+    assert manager.use("llama") == "5m"
+    assert manager.use("llama") == "-1m"
+
+
+def test_without_budget_only_pinned_models_stay_loaded():
+    manager = ModelResidencyManager(memory_budget_mb=0)
+    manager.use("llama")
+    assert manager.use("llama") == "5m"
+    manager.pin("llama")
+    assert manager.use("llama") == "-1m"
+
+
+def test_unitless_keep_alive_is_sent_as_number():
+    manager = ModelResidencyManager(hot_keep_alive="-1", cold_keep_alive="300")
+    assert manager.hot_keep_alive == -1
+    assert manager.cold_keep_alive == 300
@@ -0,0 +1,19 @@
+import pytest
+
+from app.services import model_service
+from app.services.model_service import confine_model_dir
+
+
+def test_model_dir_must_be_inside_local_model_dir(tmp_path, monkeypatch):
+    root = tmp_path / "models"
+    (root / "finetuned_1").mkdir(parents=True)
+    (tmp_path / "elsewhere").mkdir()
+    (root / "escape").symlink_to(tmp_path / "elsewhere")
+    monkeypatch.setattr(
+        model_service.settings_store, "get", lambda key, default=None: str(root)
+    )
+
+    assert confine_model_dir(str(root / "finetuned_1")) == str(root / "finetuned_1")
+    for bad in (root, root / "escape", tmp_path / "elsewhere", "/etc"):
+        with pytest.raises(ValueError):
+            confine_model_dir(str(bad))
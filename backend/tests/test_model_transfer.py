@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import time
+
+from huggingface_hub import CommitOperationAdd
+
+from app.services.model_transfer import (
+    MAX_FINISHED_JOBS,
+    BandwidthLimiter,
+    FileProgress,
+    ThrottledReader,
+    TransferJob,
+    TransferManager,
+)
+
+
+def test_throttled_reader_builds_commit_operation(tmp_path):
+    payload = b"weights" * 1000
+    path = tmp_path / "model.safetensors"
+    path.write_bytes(payload)
+    progress = FileProgress(path="model.safetensors", size=len(payload))
+    reader = ThrottledReader(str(path), progress, BandwidthLimiter())
+
+    op = CommitOperationAdd(path_in_repo="model.safetensors", path_or_fileobj=reader)
+
+    assert op.upload_info.sha256.hex() == hashlib.sha256(payload).hexdigest()
+    assert op.upload_info.size == len(payload)
+    # Hashing happened with accounting off; the upload itself is counted
+    assert progress.bytes_done == 0
+    reader.seek(0)
+    reader.active = True
+    with op.as_file() as f:
+        assert f.read() == payload
+    assert progress.bytes_done == len(payload)
+    reader.close()
+
+
+def test_finished_jobs_are_pruned():
+    manager = TransferManager()
+    now = time.time()
+    stale = TransferJob(kind="download", repo_id="a/b", local_dir="x")
+    stale.finished_at = now - 7200
+    running = TransferJob(kind="download", repo_id="a/c", local_dir="x")
+    manager.jobs = {stale.id: stale, running.id: running}
+    for i in range(MAX_FINISHED_JOBS + 5):
+        job = TransferJob(kind="download", repo_id=f"a/{i}", local_dir="x")
+        job.finished_at = now - i
+        manager.jobs[job.id] = job
+
+    manager._prune()
+
+    assert stale.id not in manager.jobs
+    assert running.id in manager.jobs
+    assert sum(j.finished_at is not None for j in manager.jobs.values()) == MAX_FINISHED_JOBS
+
+
+def test_spawned_tasks_are_referenced():
+    async def scenario():
+        manager = TransferManager()
+        job = TransferJob(kind="download", repo_id="a/b", local_dir="x")
+        gate = asyncio.Event()
+
+        async def work():
+            await gate.wait()
+
+        manager._spawn(job, work())
+        assert len(manager._tasks) == 1
+        gate.set()
+        await manager.wait(job)
+        await asyncio.sleep(0)
+        assert not manager._tasks
+
+    asyncio.run(scenario())
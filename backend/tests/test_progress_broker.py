@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from app.services import progress_broker as broker_module
+from app.services.progress_broker import (
+    LocalBackend,
+    ProgressBroker,
+    ProgressSession,
+    RedisBackend,
+)
+
+
+class FakePubSub:
+    def __init__(self, script):
+        self.script = script
+        self.closed = False
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        for item in self.script:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub(self.scripts.pop(0))
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+
+def _message(payload):
+    return {"type": "message", "data": json.dumps(payload)}
+
+
+def test_listener_skips_bad_events_and_reconnects(monkeypatch):
+    monkeypatch.setattr(broker_module, "backoff_delay", lambda *a, **k: 0)
+    backend = RedisBackend.__new__(RedisBackend)
+    backend.channel = "progress"
+    backend._redis = FakeRedis(
+        [
+            [
+                {"type": "subscribe", "data": 1},
+                _message({"message": {"status": "running"}}),  # no topic
+                {"type": "message", "data": "not json"},
+                _message({"topic": "task:1", "message": {"progress": 0.5}}),
+                ConnectionError("connection reset"),
+            ],
+            [_message({"topic": "task:1", "message": {"progress": 0.6}})],
+        ]
+    )
+    delivered = []
+    backend._deliver = lambda topic, message: delivered.append((topic, message))
+
+    async def scenario():
+        first = backend._redis.pubsub()
+        listener = asyncio.create_task(backend._listen(first))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        listener.cancel()
+        return first
+
+    first = asyncio.run(scenario())
+
+    assert delivered == [("task:1", {"progress": 0.5}), ("task:1", {"progress": 0.6})]
+    assert first.closed
+
+
+def _session_run(snapshot_at, event_at):
+    """Publish an event while the snapshot loads; return what the client got."""
+    broker = ProgressBroker(LocalBackend())
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def load_snapshot(task_id):
+        await broker.publish("t1", {"status": "running", "updated_at": event_at})
+        await asyncio.sleep(0)
+        return [{"task_id": "t1", "status": "running", "updated_at": snapshot_at}]
+
+    async def scenario():
+        session = ProgressSession(send, load_snapshot, broker)
+        await session.handle({"type": "subscribe", "task_id": "t1"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await session.close()
+
+    asyncio.run(scenario())
+    return sent
+
+
+def test_snapshot_goes_out_before_newer_events():
+    sent = _session_run("2026-01-01T00:00:01", "2026-01-01T00:00:02")
+    assert [m["type"] for m in sent] == ["snapshot", "progress"]
+
+
+def test_events_older_than_the_snapshot_are_dropped():
+    sent = _session_run("2026-01-01T00:00:02", "2026-01-01T00:00:01")
+    assert [m["type"] for m in sent] == ["snapshot"]
@@ -0,0 +1,93 @@
+import asyncio
+
+from app.services import response_cache as cache_module
+from app.services.response_cache import ResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+
+    async def run():
+        await cache.set("a", "m", "A")
+        await cache.set("b", "m", "B")
+        assert await cache.get("a") == "A"  # "b" is now the oldest
+        await cache.set("c", "m", "C")
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == ["A", None, "C"]
+    assert cache.stats["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock[0])
+    cache = ResponseCache(ttl=60)
+
+    async def run():
+        await cache.set("a", "m", "A")
+        clock[0] += 59
+        fresh = await cache.get("a")
+        clock[0] += 2
+        return fresh, await cache.get("a")
+
+    assert asyncio.run(run()) == ("A", None)
+    assert cache.get_stats()["size"] == 0
+
+
+def test_keys_isolate_provider_model_messages_and_params():
+    greedy = {"temperature": 0}
+    other_messages = [{"role": "user", "content": "hey"}]
+    base = cache_key("ollama", "m", MESSAGES, greedy)
+    variants = [
+        cache_key("assistant", "m", MESSAGES, greedy),
+        cache_key("ollama", "other", MESSAGES, greedy),
+        cache_key("ollama", "m", other_messages, greedy),
+        cache_key("ollama", "m", MESSAGES, {"temperature": 0, "seed": 1}),
+    ]
+
+    assert len({base, *variants}) == 5
+    # Parameter order does not matter
+    assert cache_key("ollama", "m", MESSAGES, {"seed": 1, "temperature": 0}) == (
+        variants[-1]
+    )
+
+
+def test_only_deterministic_requests_are_cached():
+    cache = ResponseCache()
+    calls = []
+
+    async def produce():
+        calls.append(1)
+        return f"answer {len(calls)}"
+
+    async def run():
+        greedy = [
+            await cache.cached("ollama", "m", MESSAGES, {"temperature": 0}, produce)
+            for _ in range(2)
+        ]
+        sampled = [
+            await cache.cached("ollama", "m", MESSAGES, {"temperature": 0.7}, produce)
+            for _ in range(2)
+        ]
+        return greedy, sampled
+
+    greedy, sampled = asyncio.run(run())
+
+    assert greedy == ["answer 1", "answer 1"]
+    assert sampled == ["answer 2", "answer 3"]
+    assert cache.stats["bypassed"] == 2
+
+
+def test_invalidating_a_model_covers_its_latest_tag():
+    cache = ResponseCache()
+
+    async def run():
+        await cache.set("a", "llama3:latest", "A")
+        await cache.set("b", "llama3", "B")
+        await cache.set("c", "mistral", "C")
+        removed = await cache.invalidate_model("llama3")
+        return removed, await cache.get("c")
+
+    assert asyncio.run(run()) == (2, "C")
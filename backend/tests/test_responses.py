@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.core import responses
+from app.core.responses import FastJSONResponse
+
+
+class Item(BaseModel):
+    name: str
+    size: int
+
+
+def make_client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/typed", response_model=Item)
+    async def typed():
+        return {"name": "a", "size": "3", "secret": "dropped"}
+
+    @app.get("/invalid", response_model=Item)
+    async def invalid():
+        return {"name": "a"}
+
+    @app.get("/untyped")
+    async def untyped():
+        return {"at": datetime(2024, 1, 2, 3, 4, 5), 1: "int key"}
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_response_model_still_validates_and_filters():
+    client = make_client()
+
+    assert client.get("/typed").json() == {"name": "a", "size": 3}
+    assert client.get("/invalid").status_code == 500
+
+
+def test_responses_render_with_orjson(monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    rendered = []
+
+    class SpyOrjson:
+        OPT_NON_STR_KEYS = orjson.OPT_NON_STR_KEYS
+
+        @staticmethod
+        def dumps(content, option=None):
+            rendered.append(content)
+            return orjson.dumps(content, option=option)
+
+    monkeypatch.setattr(responses, "orjson", SpyOrjson)
+    client = make_client()
+
+    response = client.get("/untyped")
+    assert response.json() == {"at": "2024-01-02T03:04:05", "1": "int key"}
+    client.get("/typed")
+    assert rendered[-1] == {"name": "a", "size": 3}
+
+
+def test_falls_back_to_stdlib_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+
+    assert FastJSONResponse({"a": [1, 2]}).body == b'{"a":[1,2]}'
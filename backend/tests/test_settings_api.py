@@ -0,0 +1,29 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import settings as settings_endpoint
+from app.core.settings_store import SettingsStore
+
+
+def test_update_keeps_keys_outside_the_schema(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    path.write_text(
+        json.dumps({"local_model_dir": "models", "batch_output_dir": "out"})
+    )
+    monkeypatch.setattr(settings_endpoint, "settings_store", SettingsStore(str(path)))
+    app = FastAPI()
+    app.include_router(settings_endpoint.router)
+    client = TestClient(app)
+
+    response = client.post("/settings", json={"dataset_dir": "data", "hf_user": None})
+
+    assert response.status_code == 200
+    assert response.json()["local_model_dir"] == "models"
+    assert json.loads(path.read_text()) == {
+        "local_model_dir": "models",
+        "batch_output_dir": "out",
+        "dataset_dir": "data",
+        "hf_user": None,
+    }
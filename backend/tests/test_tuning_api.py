@@ -0,0 +1,21 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import tuning
+
+
+class MissingTaskService:
+    async def get_updated_at(self, task_id):
+        return False, None
+
+
+def test_progress_of_unknown_task_is_404():
+    app = FastAPI()
+    app.include_router(tuning.router)
+    app.dependency_overrides[tuning.get_service] = MissingTaskService
+    client = TestClient(app)
+
+    response = client.get("/tuning/unknown/progress")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Task not found"}
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.schemas.tuning import TuningCreate
+from app.services import tuning_service
+from app.services.tuning_service import TuningService
+
+
+class FakeCollection:
+    async def insert_one(self, document):
+        return SimpleNamespace(inserted_id="0" * 24)
+
+    async def update_one(self, *args, **kwargs):
+        raise ConnectionError("analytics unavailable")
+
+    async def find_one(self, *args, **kwargs):
+        return None
+
+
+def test_status_changed_at_is_set_in_the_same_update():
+    now = datetime(2026, 1, 1)
+
+    (stage,) = TuningService._status_update(
+        {"status": "running", "result": {"error": "$bad"}}, now
+    )
+
+    assert stage["$set"]["result"] == {"$literal": {"error": "$bad"}}
+    assert stage["$set"]["status_changed_at"] == {
+        "$cond": [
+            {"$ne": ["$status", {"$literal": "running"}]},
+            now,
+            "$status_changed_at",
+        ]
+    }
+
+
+def test_create_task_survives_analytics_failure():
+    service = TuningService(
+        {
+            "tuning_tasks": FakeCollection(),
+            "task_analytics": FakeCollection(),
+            "task_analytics_gates": FakeCollection(),
+        }
+    )
+
+    task = asyncio.run(
+        service.create_task(TuningCreate(dataset_id="data.txt", parameters={}))
+    )
+
+    assert task.status == "queued"
+
+
+class LeaseCollection:
+    def __init__(self, owned):
+        self.owned = owned
+
+    async def update_one(self, query, update):
+        return SimpleNamespace(matched_count=1 if self.owned else 0)
+
+
+def _leased_service(monkeypatch, owned):
+    monkeypatch.setattr(tuning_service.settings, "task_lease_seconds", 0.03)
+    service = TuningService.__new__(TuningService)
+    service.collection = LeaseCollection(owned)
+    return service
+
+
+def test_losing_the_lease_cancels_the_job(monkeypatch):
+    service = _leased_service(monkeypatch, owned=False)
+    state = {"cancelled": False}
+
+    async def job():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    finished = asyncio.run(
+        asyncio.wait_for(service.run_leased("t1", "w1", job()), timeout=2)
+    )
+
+    assert finished is False
+    assert state["cancelled"]
+
+
+def test_job_finishes_while_the_lease_is_held(monkeypatch):
+    service = _leased_service(monkeypatch, owned=True)
+    renewals = []
+    update_one = service.collection.update_one
+
+    async def counting_update(query, update):
+        renewals.append(query)
+        return await update_one(query, update)
+
+    service.collection.update_one = counting_update
+
+    async def job():
+        await asyncio.sleep(0.05)
+
+    assert asyncio.run(service.run_leased("t1", "w1", job())) is True
+    assert renewals and renewals[0] == {"_id": "t1", "worker_id": "w1"}
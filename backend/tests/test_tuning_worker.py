@@ -0,0 +1,154 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app.services import tuning_worker
+from app.services.tuning_worker import TuningWorker, best_checkpoint
+
+
+class FakeTuningService:
+    def __init__(self):
+        self.updates = []
+
+    async def update_progress(self, task_id, progress, status, result=None):
+        self.updates.append((status, result))
+
+
+class FakeMetricsBuffer:
+    def __init__(self, *args):
+        pass
+
+    def add(self, step, logs):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class FakeOllama:
+    has_base = False
+    calls = []
+
+    async def has_model(self, name):
+        return self.has_base
+
+    async def ensure_base_model(self, name, gguf_path):
+        self.calls.append(("ensure_base_model", name, gguf_path))
+
+    async def create_adapter_model(self, name, base_model, adapter_path, modelfile):
+        self.calls.append(("create_adapter_model", name, base_model, adapter_path))
+
+
+def _lora_worker(tmp_path, monkeypatch, has_base):
+    settings = {"hf_token": "t", "hf_user": "u", "local_model_dir": str(tmp_path)}
+    monkeypatch.setattr(
+        tuning_worker.settings_store,
+        "get",
+        lambda key, default=None: settings.get(key, default),
+    )
+    hf = SimpleNamespace(start_download=lambda repo_id, local_dir: local_dir)
+    monkeypatch.setattr(tuning_worker, "HFModelIO", lambda token, user: hf)
+
+    async def wait(local_dir):
+        return SimpleNamespace(local_dir=local_dir, result={"revision": "abc123"})
+
+    monkeypatch.setattr(tuning_worker.transfer_manager, "wait", wait)
+    monkeypatch.setattr(tuning_worker, "MetricsBuffer", FakeMetricsBuffer)
+    monkeypatch.setattr(tuning_worker, "MetricsStore", lambda db: None)
+    FakeOllama.has_base = has_base
+    FakeOllama.calls = []
+    monkeypatch.setattr(tuning_worker, "OllamaService", FakeOllama)
+    monkeypatch.setattr(
+        tuning_worker.artifact_store, "ingest", lambda path, ref: {"new_bytes": 0}
+    )
+
+    async def refresh():
+        pass
+
+    monkeypatch.setattr(tuning_worker.model_registry, "refresh", refresh)
+
+    worker = TuningWorker.__new__(TuningWorker)
+    worker.db = None
+    worker.service = FakeTuningService()
+    threads = {}
+
+    def train_model(model_dir, dataset_path, output_dir, *args, **kwargs):
+        training = {
+            "stop_reason": "completed",
+            "best_step": None,
+            "best_eval_loss": None,
+        }
+        return 0.5, [0.5], training
+
+    def convert_adapter_to_gguf(adapter_dir, base_dir, adapter_path, script):
+        threads["adapter"] = threading.current_thread()
+        with open(adapter_path, "wb") as f:
+            f.write(b"lora")
+
+    def base_gguf(model_dir, cache_dir, quantization, script):
+        threads["base"] = threading.current_thread()
+        return f"{cache_dir}/base.gguf", False
+
+    worker.train_model = train_model
+    worker.convert_adapter_to_gguf = convert_adapter_to_gguf
+    worker.base_gguf = base_gguf
+    doc = {
+        "dataset_id": "data.txt",
+        "parameters": {
+            "repo_id": "org/base",
+            "name": "tuned",
+            "finetuneMethod": "lora",
+            "evalSplit": 0,
+        },
+    }
+    return worker, doc, threads
+
+
+def test_lora_task_converts_only_the_adapter_off_the_loop(tmp_path, monkeypatch):
+    worker, doc, threads = _lora_worker(tmp_path, monkeypatch, has_base=False)
+    (tmp_path / "finetuned_t1").mkdir()
+
+    asyncio.run(worker.run_tuning_task("t1", doc))
+
+    status, result = worker.service.updates[-1]
+    assert status == "completed", result
+    main = threading.main_thread()
+    assert threads["adapter"] is not main and threads["base"] is not main
+    base_model = TuningWorker.base_model_name("org/base", "abc123", "none")
+    adapter = result["adapter"]
+    assert adapter["base_model"] == base_model
+    assert adapter["adapter_bytes"] == 4
+    assert adapter["base_reused"] is False
+    assert FakeOllama.calls[0] == (
+        "ensure_base_model",
+        base_model,
+        adapter["base_gguf"],
+    )
+    assert FakeOllama.calls[1][:3] == ("create_adapter_model", "tuned", base_model)
+
+
+def test_lora_task_reuses_a_base_ollama_already_has(tmp_path, monkeypatch):
+    worker, doc, threads = _lora_worker(tmp_path, monkeypatch, has_base=True)
+    (tmp_path / "finetuned_t1").mkdir()
+
+    asyncio.run(worker.run_tuning_task("t1", doc))
+
+    status, result = worker.service.updates[-1]
+    assert status == "completed", result
+    assert "base" not in threads
+    assert result["adapter"]["base_reused"] is True
+    assert [call[0] for call in FakeOllama.calls] == ["create_adapter_model"]
+
+
+def test_best_step_comes_from_the_restored_checkpoint():
+    # With min_delta the patience baseline may stay at an earlier step, but
+    # load_best_model_at_end restores the checkpoint with the lowest loss
+    state = SimpleNamespace(
+        best_model_checkpoint="/tmp/out/checkpoint-300/", best_metric=1.2345
+    )
+
+    assert best_checkpoint(state) == {"best_step": 300, "best_eval_loss": 1.2345}
+    assert best_checkpoint(SimpleNamespace()) == {
+        "best_step": None,
+        "best_eval_loss": None,
+    }
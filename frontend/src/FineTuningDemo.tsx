@@ -49,6 +49,8 @@ import {
   type SavedModel,
   createTuning,
   getTuningProgress,
+  subscribeTuningProgress,
+  type TuningProgress,
   fetchModels,
   fetchOllamaModels,
   listDatasets,
@@ -110,6 +112,7 @@ export function FineTuningDemo() {
   const [trainingModel, setTrainingModel] = useState<string>("gpt-3.5-turbo");
   const [modelSaved, setModelSaved] = useState(false);
   const intervalRef = useRef<NodeJS.Timeout | null>(null);
+  const unsubscribeRef = useRef<(() => void) | null>(null);
   const [startTime, setStartTime] = useState<number | null>(null);
   const [timeRemaining, setTimeRemaining] = useState<string | null>(null);
   const [modelName, setModelName] = useState<string>("No Name");
@@ -167,13 +170,13 @@ export function FineTuningDemo() {
     }
   }, []);
 
-  // Resume polling if a training task is already in progress
+  // Resume tracking if a training task is already in progress
   useEffect(() => {
     const existing = localStorage.getItem("codetune_task_id");
     if (existing) {
       setTraining(true);
       setStartTime(Date.now());
-      startPolling(existing);
+      trackProgress(existing);
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
@@ -208,6 +211,7 @@ export function FineTuningDemo() {
   useEffect(() => {
     return () => {
       if (intervalRef.current) clearInterval(intervalRef.current);
+      unsubscribeRef.current?.();
     };
   }, []);
 
@@ -286,74 +290,94 @@ export function FineTuningDemo() {
       return;
     }
     localStorage.setItem("codetune_task_id", task.id);
-    startPolling(task.id);
+    trackProgress(task.id);
+  };
+
+  const stopTracking = () => {
+    if (intervalRef.current) clearInterval(intervalRef.current);
+    intervalRef.current = null;
+    unsubscribeRef.current?.();
+    unsubscribeRef.current = null;
+  };
+
+  const applyProgress = (prog: TuningProgress) => {
+    const pct = prog.progress <= 1 ? prog.progress * 100 : prog.progress;
+    setTrainingProgress(Math.round(pct));
+    setCurrentStatus(prog.status);
+    // Estimate time remaining
+    if (startTime && pct > 0 && pct < 100) {
+      const elapsed = (Date.now() - startTime) / 1000; // seconds
+      const estTotal = elapsed / (pct / 100);
+      const remaining = estTotal - elapsed;
+      setTimeRemaining(
+        remaining > 0
+          ? `${Math.floor(remaining / 60)}m ${Math.round(
+              remaining % 60,
+            )}s left`
+          : null,
+      );
+    } else if (pct >= 100) {
+      setTimeRemaining(null);
+    }
+    if (prog.result) {
+      if ("loss" in prog.result) {
+        setQualityLoss(prog.result.loss as number);
+      }
+      if ("loss_history" in prog.result) {
+        setTrainingHistory(prog.result.loss_history as number[]);
+      }
+      if ("gguf_path" in prog.result) {
+        setGgufPath(prog.result.gguf_path as string);
+      }
+      if ("quantized_path" in prog.result) {
+        setQuantizedPath(prog.result.quantized_path as string);
+      }
+      if ("model_dir" in prog.result) {
+        setModelDir(prog.result.model_dir as string);
+      }
+      if ("repo_id" in prog.result) {
+        setHfRepoId(prog.result.repo_id as string);
+      }
+      if ("model" in prog.result) {
+        setOllamaModel(prog.result.model as string);
+      }
+    }
+    setAnalysis(prog.status);
+    setCurrentStatus(prog.status);
+    if (prog.status === "completed" || prog.status === "failed") {
+      stopTracking();
+      setTraining(false);
+      setAnalysis(
+        prog.status === "completed" ? "Training complete" : "Training failed",
+      );
+      localStorage.removeItem("codetune_task_id");
+      setCurrentStatus(prog.status);
+      if (prog.status === "completed" && prog.result) {
+        localStorage.setItem(
+          "codetune_last_result",
+          JSON.stringify(prog.result),
+        );
+      }
+    }
+  };
+
+  // Live updates over the /ws progress subscription; polling is only the
+  // fallback for when the socket cannot be used
+  const trackProgress = (id: string) => {
+    stopTracking();
+    unsubscribeRef.current = subscribeTuningProgress(id, applyProgress, () => {
+      unsubscribeRef.current = null;
+      startPolling(id);
+    });
   };
 
   const startPolling = (id: string) => {
     if (intervalRef.current) clearInterval(intervalRef.current);
     intervalRef.current = setInterval(async () => {
       try {
-        const prog = await getTuningProgress(id);
-        const pct = prog.progress <= 1 ? prog.progress * 100 : prog.progress;
-        setTrainingProgress(Math.round(pct));
-        setCurrentStatus(prog.status);
-        // Estimate time remaining
-        if (startTime && pct > 0 && pct < 100) {
-          const elapsed = (Date.now() - startTime) / 1000; // seconds
-          const estTotal = elapsed / (pct / 100);
-          const remaining = estTotal - elapsed;
-          setTimeRemaining(
-            remaining > 0
-              ? `${Math.floor(remaining / 60)}m ${Math.round(
-                  remaining % 60,
-                )}s left`
-              : null,
-          );
-        } else if (pct >= 100) {
-          setTimeRemaining(null);
-        }
-        if (prog.result) {
-          if ("loss" in prog.result) {
-            setQualityLoss(prog.result.loss as number);
-          }
-          if ("loss_history" in prog.result) {
-            setTrainingHistory(prog.result.loss_history as number[]);
-          }
-          if ("gguf_path" in prog.result) {
-            setGgufPath(prog.result.gguf_path as string);
-          }
-          if ("quantized_path" in prog.result) {
-            setQuantizedPath(prog.result.quantized_path as string);
-          }
-          if ("model_dir" in prog.result) {
-            setModelDir(prog.result.model_dir as string);
-          }
-          if ("repo_id" in prog.result) {
-            setHfRepoId(prog.result.repo_id as string);
-          }
-          if ("model" in prog.result) {
-            setOllamaModel(prog.result.model as string);
-          }
-        }
-        setAnalysis(prog.status);
-        setCurrentStatus(prog.status);
-        if (prog.status === "completed" || prog.status === "failed") {
-          if (intervalRef.current) clearInterval(intervalRef.current);
-          setTraining(false);
-          setAnalysis(
-            prog.status === "completed" ? "Training complete" : "Training failed",
-          );
-          localStorage.removeItem("codetune_task_id");
-          setCurrentStatus(prog.status);
-          if (prog.status === "completed" && prog.result) {
-            localStorage.setItem(
-              "codetune_last_result",
-              JSON.stringify(prog.result),
-            );
-          }
-        }
+        applyProgress(await getTuningProgress(id));
       } catch {
-        if (intervalRef.current) clearInterval(intervalRef.current);
+        stopTracking();
         setTraining(false);
         setAnalysis("Error fetching progress");
       }
@@ -148,6 +148,69 @@ export async function getTuningProgress(
   return res.json();
 }
 
+type ProgressMessage = TuningProgress & {
+  type: "snapshot" | "progress" | "error";
+  tasks?: TuningProgress[];
+};
+
+function progressSocketUrl(): string {
+  const base = API_URL || window.location.origin;
+  return `${base.replace(/^http/, "ws")}/ws`;
+}
+
+/**
+ * Subscribe to live progress for a task over the `/ws` WebSocket.
+ *
+ * `onProgress` receives the initial snapshot and then every update. `onError`
+ * is called once if the socket fails, closes, or the task is unknown, so the
+ * caller can fall back to polling. Returns a function that unsubscribes.
+ */
+export function subscribeTuningProgress(
+  taskId: string,
+  onProgress: (progress: TuningProgress) => void,
+  onError: () => void,
+): () => void {
+  let done = false;
+  let ws: WebSocket;
+  const fail = () => {
+    if (done) return;
+    done = true;
+    ws.close();
+    onError();
+  };
+  try {
+    ws = new WebSocket(progressSocketUrl());
+  } catch {
+    setTimeout(onError, 0);
+    return () => {};
+  }
+  ws.onopen = () =>
+    ws.send(JSON.stringify({ type: "subscribe", task_id: taskId }));
+  ws.onmessage = (e) => {
+    let msg: ProgressMessage;
+    try {
+      msg = JSON.parse(e.data);
+    } catch {
+      return; // plain-text echo frames
+    }
+    if (msg.type === "snapshot") {
+      const task = msg.tasks?.[0];
+      if (task) onProgress(task);
+      else fail();
+    } else if (msg.type === "progress" && msg.task_id === taskId) {
+      onProgress(msg);
+    } else if (msg.type === "error") {
+      fail();
+    }
+  };
+  ws.onerror = fail;
+  ws.onclose = fail;
+  return () => {
+    done = true;
+    ws.close();
+  };
+}
+
 // Ollama endpoints
 export async function fetchOllamaModels(): Promise<string[]> {
   const url = `${API_URL}/api/v1/ollama/models`;